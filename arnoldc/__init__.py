@@ -3,25 +3,37 @@ Carrega os nomes principais do módulo ArnoldC.
 """
 
 
+from contextlib import nullcontext
 from typing import Optional
 from .arnoldc_ast import Expr, Stmt, Value, Program 
 from .ctx import Ctx
-from .errors import SemanticError, ArnoldCError
+from .errors import SemanticError, ArnoldCError, report_errors
+from .memo import enable_memo, memo_stats
 from .node import Node
-from .parser import lex, parse, parse_cst, parse_expr
+from .optimizer import optimize
+from .output import BufferedSink, CaptureSink, Sink, use_sink
+from .parser import is_program_source, lex, parse, parse_cst, parse_expr
 from .runtime import evaluate as runtime_evaluate
+from .transpiler import compile_to_python
 
 __all__ = [
+    "BufferedSink",
+    "CaptureSink",
     "Ctx",
     "arnoldc_eval",
+    "compile_to_python",
+    "enable_memo",
     "Expr",
     "lex",
+    "memo_stats",
     "Node",
+    "optimize",
     "parse_cst",
     "parse",
     "parse_expr",
     "Stmt",
     "SemanticError",
+    "Sink",
     "ArnoldCError",
 ]
 
@@ -30,6 +42,9 @@ def arnoldc_eval(
     src: str | Node, 
     env: Ctx | dict[str, Value] | None = None,
     skip_validation: bool = False,
+    engine: str = "tree",
+    opt_level: int = 0,
+    output: Optional[Sink] = None,
 ) -> Optional[Value]: 
     """
     Avalia o código fonte ArnoldC e retorna o valor resultante (se for uma expressão)
@@ -43,7 +58,18 @@ def arnoldc_eval(
             ambiente vazio será criado. Aceita um dicionário mapeando nomes de
             variáveis para seus valores ou uma instância de `Ctx`.
         skip_validation:
-            Se `True`, ignora a validação do código fonte antes da avaliação.
+            Se `True`, ignora a validação de um nó AST antes da avaliação
+            (código fonte em string é sempre validado durante o parsing).
+        engine:
+            Engine usada para executar programas: "tree" (interpretador de
+            árvore), "vm" (bytecode executado na máquina virtual) ou "py"
+            (programa traduzido para Python).
+        opt_level:
+            Nível de otimização aplicado a programas antes da execução (veja
+            `optimizer.py`). O nível 0 executa a árvore sem alterações.
+        output:
+            Destino da saída de 'TALK TO THE HAND' (veja `output.py`). Se
+            omitido, usa o destino atual (por padrão, o `sys.stdout`).
     """
     if env is None:
         env = Ctx.from_dict({})
@@ -53,27 +79,24 @@ def arnoldc_eval(
     ast_node: Node 
 
     if isinstance(src, str):
-        try:
-            ast_node = parse_expr(src)
-        except Exception: 
+        # parse e parse_expr já validam a árvore produzida. Um programa
+        # nunca é uma expressão válida, então só o parser certo é chamado.
+        if is_program_source(src):
             ast_node = parse(src)
+        else:
+            try:
+                ast_node = parse_expr(src)
+            except Exception:
+                ast_node = parse(src)
     else:
         ast_node = src
+        if not skip_validation:
+            ast_node.validate_tree()
 
-    if not skip_validation:
-        ast_node.validate_tree()
-
-    try:
+    with use_sink(output) if output is not None else nullcontext(), report_errors(env):
         if isinstance(ast_node, Program):
-            runtime_evaluate(ast_node, env)
+            ast_node = optimize(ast_node, opt_level)
+            runtime_evaluate(ast_node, env, engine)
             return None
         else:
-            return ast_node.eval(env)
-    except (SemanticError, ArnoldCError) as e:
-        print(f"Programa terminou com um erro: {e}")
-        print("Variáveis:", env)
-        raise
-    except Exception as e:
-        print(f"Programa terminou com um erro inesperado: {e}")
-        print("Variáveis:", env)
-        raise
\ No newline at end of file
+            return ast_node.eval(env)
\ No newline at end of file
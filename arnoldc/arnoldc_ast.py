@@ -1,11 +1,12 @@
 from abc import ABC
-from dataclasses import dataclass
-from typing import List, Optional, Union
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional, Union
 
-from .ctx import Ctx
+from .ctx import DYNAMIC, UNSET, Ctx, Frame
 
 from .node import Node, Cursor
 from .errors import ArnoldCError, SemanticError, ForceReturn
+from .output import emit
 
 
 RESERVED_KEYWORDS = {
@@ -25,24 +26,103 @@ RESERVED_KEYWORDS = {
 
 Value = Union[int, str]
 
+
+def annotation(default: Any) -> Any:
+    """
+    Atributo de um nó preenchido depois da construção (pelo transformador,
+    pelo resolvedor ou pelo otimizador). Não faz parte do construtor, da
+    comparação nem do `repr`, e não é percorrido como filho.
+    """
+    return field(default=default, init=False, repr=False, compare=False)
+
+
+class Completion:
+    """
+    Registro de término antecipado de um bloco, produzido por 'I'LL BE BACK'.
+
+    Os comandos retornam None quando terminam normalmente. `Return.eval`
+    retorna um `Completion` com o valor de retorno, que é repassado por
+    blocos, condicionais e laços até a chamada do método. Dessa forma o
+    retorno não precisa lançar e capturar uma exceção a cada chamada.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Optional[Value]):
+        self.value = value
+
+    def __repr__(self) -> str:
+        return f"Completion({self.value!r})"
+
+
+class TailCall(Completion):
+    """
+    Chamada recursiva em posição de cauda, produzida por `CallMethod.eval`.
+
+    Em vez de chamar o método, o comando termina o corpo atual com os
+    argumentos da próxima chamada, e o laço em `Method.eval` reexecuta o
+    corpo com os parâmetros novos. Assim a recursão em cauda roda com pilha
+    e memória constantes.
+    """
+
+    __slots__ = ("callee", "args", "name")
+
+    def __init__(self, callee: Callable, args: list, name: str):
+        self.value = None
+        self.callee = callee
+        self.args = args
+        self.name = name
+
+    def call(self) -> Optional[Value]:
+        """
+        Faz a chamada comum (quando o nome do método aponta para outra
+        instância do mesmo método, criada em outro frame).
+        """
+        try:
+            return self.callee(*self.args)
+        except TypeError as e:
+            raise ArnoldCError(f"Erro na chamada do método '{self.name}': {e}")
+
+    def __repr__(self) -> str:
+        return f"TailCall({self.name!r}, {self.args!r})"
+
 class Expr(Node, ABC):
     """
     Classe base para expressões.
     Em ArnoldC, expressões geralmente resultam em um valor para a 'pilha de avaliação'
     dentro de um bloco de atribuição ou são literais/variáveis.
     """
-    pass
 
+    __slots__ = ()
 
+    def validate_tree(self):
+        """
+        Valida o nó atual e todos os filhos em uma única passada.
+        """
+        from .validator import validate
+        validate(self)
+
+
+@dataclass(slots=True)
 class Stmt(Node, ABC):
     """
     Classe base para comandos.
     Comandos em ArnoldC são as frases de ação ou blocos de controle de fluxo.
     """
-    pass
 
+    # Linha do código fonte, preenchida pelo transformador (None em nós
+    # criados de outra forma).
+    line: Optional[int] = annotation(None)
+
+    def validate_tree(self):
+        """
+        Valida o nó atual e todos os filhos em uma única passada.
+        """
+        from .validator import validate
+        validate(self)
 
-@dataclass
+
+@dataclass(slots=True)
 class Program(Node):
     """
     Representa um programa ArnoldC completo.
@@ -50,21 +130,28 @@ class Program(Node):
     """
     stmts: list[Stmt]
 
+    # Estatísticas da eliminação de código morto (veja `deadcode.py`).
+    dead_code: Any = annotation(None)
+
     def eval(self, ctx: Ctx):
         for stmt in self.stmts:
-            stmt.eval(ctx)
+            if stmt.eval(ctx) is not None:
+                raise_return_outside_method()
         return None
-    
-    def validate_self(self, cursor: Cursor):
-        for stmt in self.stmts:
-            stmt.validate_self(stmt.cursor(cursor))
+
+    def validate_tree(self):
+        """
+        Valida o nó atual e todos os filhos em uma única passada.
+        """
+        from .validator import validate
+        validate(self)
 
 #
 # EXPRESSÕES
 #
 
 
-@dataclass
+@dataclass(slots=True)
 class Var(Expr):
     """
     Uma variável no código
@@ -72,11 +159,17 @@ class Var(Expr):
     """
     name: str
 
+    # Endereço calculado por `resolver.py` (por padrão, busca pelo nome).
+    depth: int = annotation(DYNAMIC)
+    slot: int = annotation(0)
+
     def eval(self, ctx: Ctx):
-        return ctx[self.name]
+        if self.depth == 0:
+            return ctx.slots[self.slot]  # type: ignore[attr-defined]
+        return ctx.load(self.name, self.depth, self.slot)
 
 
-@dataclass
+@dataclass(slots=True)
 class Literal(Expr):
     """
     Representa valores literais no código: strings, números inteiros.
@@ -91,7 +184,7 @@ class Literal(Expr):
     def validate_self(self, cursor: 'Cursor'):
         pass
     
-@dataclass
+@dataclass(slots=True)
 class Bool(Expr): 
     value: bool
     
@@ -106,7 +199,7 @@ class Bool(Expr):
 # COMANDOS
 #
 
-@dataclass
+@dataclass(slots=True)
 class Print(Stmt):
     """
     Representa uma instrução de impressão.
@@ -116,15 +209,10 @@ class Print(Stmt):
     target: Union[Literal, Var]
     
     def eval(self, ctx: Ctx):
-        from .runtime import print_arnoldc
-        value_to_print = self.target.eval(ctx)
-        print_arnoldc(value_to_print)
+        emit(self.target.eval(ctx))
 
-    def validate_self(self, cursor: Cursor):
-        self.target.validate_self(self.target.cursor(cursor))
-        
 
-@dataclass
+@dataclass(slots=True)
 class Return(Stmt):
     """
     Representa uma instrução de retorno em métodos.
@@ -132,24 +220,12 @@ class Return(Stmt):
     """
     value: Optional[Expr] = None
 
-    def eval(self, ctx: Ctx):
+    def eval(self, ctx: Ctx) -> Completion:
         val = self.value.eval(ctx) if self.value is not None else None
-        raise ForceReturn(val)
+        return Completion(val)
 
-    def validate_self(self, cursor: Cursor):
-        in_method = False
-        for ancestor_cursor in cursor.parents():
-            if isinstance(ancestor_cursor.node, Method):
-                in_method = True
-                break
-        if not in_method:
-            raise SemanticError("Não é possível usar 'I'LL BE BACK' fora de um método.", token="I'LL BE BACK")
-        
-        if self.value:
-            self.value.validate_self(self.value.cursor(cursor))
 
-
-@dataclass
+@dataclass(slots=True)
 class VarDef(Stmt):
     """
     Representa uma declaração de variável.
@@ -158,25 +234,15 @@ class VarDef(Stmt):
     name: str
     value: Expr
 
+    # Posição da variável no frame do bloco (None no escopo global).
+    slot: Optional[int] = annotation(None)
+
     def eval(self, ctx: Ctx):
         initial_value = self.value.eval(ctx)
-        ctx.var_def(self.name, initial_value)
-        
-    def validate_self(self, cursor: Cursor):
-        if self.name in RESERVED_KEYWORDS:
-            raise SemanticError("nome inválido", token=self.name)
-        
-        for ancestor_cursor in cursor.parents():
-            ancestor_node = ancestor_cursor.node
-            if isinstance(ancestor_node, Method): 
-                param_names = {p for p in ancestor_node.params} 
-                if self.name in param_names:
-                    raise SemanticError("variável com nome de parâmetro", token=self.name)
-                break
-        self.value.validate_self(self.value.cursor(cursor))
+        define(ctx, self.name, self.slot, initial_value)
 
 
-@dataclass
+@dataclass(slots=True)
 class If(Stmt):
     """
     Representa uma instrução condicional.
@@ -186,20 +252,19 @@ class If(Stmt):
     then_branch: 'StatementBlock'
     else_branch: Optional['StatementBlock'] = None
 
-    def eval(self, ctx: Ctx):
-        if is_arnoldc_true(self.cond.eval(ctx)):
-            self.then_branch.eval(ctx)
-        elif self.else_branch is not None:
-            self.else_branch.eval(ctx)
+    # Condição sempre inteira ou booleana (anotado por `typecheck.py`).
+    int_cond: bool = annotation(False)
 
-    def validate_self(self, cursor: Cursor):
-        self.cond.validate_self(self.cond.cursor(cursor))
-        self.then_branch.validate_self(self.then_branch.cursor(cursor))
-        if self.else_branch:
-            self.else_branch.validate_self(self.else_branch.cursor(cursor))
+    def eval(self, ctx: Ctx) -> Optional[Completion]:
+        truth = bool if self.int_cond else is_arnoldc_true
+        if truth(self.cond.eval(ctx)):
+            return self.then_branch.eval(ctx)
+        elif self.else_branch is not None:
+            return self.else_branch.eval(ctx)
+        return None
 
 
-@dataclass
+@dataclass(slots=True)
 class While(Stmt):
     """
     Representa um laço de repetição.
@@ -208,16 +273,44 @@ class While(Stmt):
     cond: Expr
     body: 'StatementBlock'
 
-    def eval(self, ctx: Ctx):
-        while is_arnoldc_true(self.cond.eval(ctx)):
-            self.body.eval(ctx)
-
-    def validate_self(self, cursor: Cursor):
-        self.cond.validate_self(self.cond.cursor(cursor))
-        self.body.validate_self(self.body.cursor(cursor))
+    # Laço contado reconhecido por `loops.py` (anotado por `resolver.py`).
+    counted: Any = annotation(None)
+    # Contador de iterações da engine "tiered" (veja `tiers.py`).
+    tier: Any = annotation(None)
+    # Condição sempre inteira ou booleana (anotado por `typecheck.py`).
+    int_cond: bool = annotation(False)
+
+    def eval(self, ctx: Ctx) -> Optional[Completion]:
+        if (tier := self.tier) is not None:
+            return tier.run(ctx)
+        if (counted := self.counted) is not None and (start := counted.start(ctx)):
+            return counted.run(self.body, ctx, start)
+
+        truth = bool if self.int_cond else is_arnoldc_true
+        body = self.body
+        if body.pool is None:
+            while truth(self.cond.eval(ctx)):
+                if (completion := body.eval(ctx)) is not None:
+                    return completion
+            return None
+
+        # O mesmo frame é usado em todas as iterações e apenas limpo no
+        # início de cada uma.
+        frame = body.acquire(ctx)
+        slots = frame.slots
+        blank = body.blank
+        try:
+            while truth(self.cond.eval(ctx)):
+                slots[:] = blank
+                for stmt in body.stmts:
+                    if (completion := stmt.eval(frame)) is not None:
+                        return completion
+        finally:
+            body.release(frame)
+        return None
 
 
-@dataclass
+@dataclass(slots=True)
 class StatementBlock(Stmt):
     """
     Representa um bloco de comandos em ArnoldC (qualquer sequência de comandos
@@ -226,23 +319,60 @@ class StatementBlock(Stmt):
     """
     stmts: list[Stmt]
 
-    def eval(self, ctx: Ctx):
-        inner_ctx = ctx.push({})
-        for stmt in self.stmts:
-            stmt.eval(inner_ctx)
-            
-    def validate_self(self, cursor: Cursor):
-        declared_vars_in_block = set()
-        for stmt in self.stmts:
-            if isinstance(stmt, VarDef):
-                var_name = stmt.name
-                if var_name in declared_vars_in_block:
-                    raise SemanticError("variável já declarada", token=var_name)
-                declared_vars_in_block.add(var_name)
-            stmt.validate_self(stmt.cursor(cursor))
-
+    # Layout do frame do bloco, calculado por `resolver.py`. Blocos sem
+    # declarações não criam um escopo (`new_scope`) e blocos cujos frames não
+    # podem ser capturados por métodos reaproveitam frames de `pool`.
+    slot_index: Optional[dict[str, int]] = annotation(None)
+    nslots: int = annotation(0)
+    blank: Optional[list] = annotation(None)
+    new_scope: bool = annotation(True)
+    pool: Optional[list[Frame]] = annotation(None)
+
+    def eval(self, ctx: Ctx) -> Optional[Completion]:
+        if not self.new_scope:
+            for stmt in self.stmts:
+                if (completion := stmt.eval(ctx)) is not None:
+                    return completion
+            return None
+
+        if self.pool is None:
+            inner_ctx = Frame(self.slot_index or {}, [UNSET] * self.nslots, ctx)
+            for stmt in self.stmts:
+                if (completion := stmt.eval(inner_ctx)) is not None:
+                    return completion
+            return None
+
+        inner_ctx = self.acquire(ctx)
+        try:
+            for stmt in self.stmts:
+                if (completion := stmt.eval(inner_ctx)) is not None:
+                    return completion
+        finally:
+            self.release(inner_ctx)
+        return None
 
-@dataclass
+    def acquire(self, ctx: Ctx) -> Frame:
+        """
+        Retira um frame do pool (ou cria um novo) e o prepara para executar
+        o bloco dentro de `ctx`.
+        """
+        if self.pool:
+            frame = self.pool.pop()
+            frame.slots[:] = self.blank
+            frame.parent = ctx
+            frame.globals = ctx.globals
+            return frame
+        return Frame(self.slot_index, self.blank.copy(), ctx)
+
+    def release(self, frame: Frame) -> None:
+        """
+        Devolve ao pool um frame obtido com `acquire`.
+        """
+        frame.parent = None  # type: ignore[assignment]
+        self.pool.append(frame)  # type: ignore[union-attr]
+
+
+@dataclass(slots=True)
 class Method(Stmt):
     """
     Representa um método (função) em ArnoldC.
@@ -252,46 +382,71 @@ class Method(Stmt):
     params: List[str] 
     body: 'StatementBlock' 
     returns_value: bool = False 
-    
+
+    # Posição do método no frame do bloco (None no escopo global) e layout
+    # do frame de parâmetros, calculados por `resolver.py`.
+    slot: Optional[int] = annotation(None)
+    param_index: Optional[dict[str, int]] = annotation(None)
+    # Tamanho do cache de memoização (0 desliga) e o cache, criado na
+    # primeira definição do método (veja `memo.py`).
+    memo_size: int = annotation(0)
+    memo: Any = annotation(None)
+    # Contador de chamadas da engine "tiered" (veja `tiers.py`).
+    tier: Any = annotation(None)
+
     def eval(self, ctx: Ctx):
+        param_index = self.param_index
+        if param_index is None:
+            param_index = {name: i for i, name in enumerate(self.params)}
+        # Com a engine "tiered", o corpo é executado pela camada do método,
+        # que conta as chamadas e troca para o código compilado.
+        run_body = self.body.eval if self.tier is None else self.tier
+
         def arnoldc_method_callable(*args_values):
-            if len(args_values) != len(self.params):
-                raise TypeError(f"Número incorreto de argumentos para o método '{self.name}'. Esperado {len(self.params)}, recebido {len(args_values)}")
-            
-            method_ctx = ctx.push({}) 
-            for param_name, arg_value in zip(self.params, args_values):
-                method_ctx.var_def(param_name, arg_value)
-            
-            try:
-                self.body.eval(method_ctx)
+            # Nome usado na chamada em cauda que originou a iteração atual
+            # (None na primeira): erros de tipo são reportados como se
+            # tivessem passado pelo `CallMethod` correspondente.
+            call_name = None
+            while True:
+                try:
+                    if len(args_values) != len(self.params):
+                        raise TypeError(f"Número incorreto de argumentos para o método '{self.name}'. Esperado {len(self.params)}, recebido {len(args_values)}")
+
+                    method_ctx = Frame(param_index, list(args_values), ctx)
+
+                    completion = run_body(method_ctx)
+                except TypeError as e:
+                    if call_name is None:
+                        raise
+                    raise ArnoldCError(f"Erro na chamada do método '{call_name}': {e}")
+                if completion.__class__ is not TailCall:
+                    break
+                if completion.callee is not registered:
+                    return completion.call()
+                args_values = completion.args
+                call_name = completion.name
+
+            if completion is None:
                 if self.returns_value:
                     raise SemanticError(f"Método '{self.name}' que retorna valor não tem 'I'LL BE BACK' explícito.")
                 return None # Void method
-            except ForceReturn as e:
-                if not self.returns_value and e.value is not None:
-                     raise SemanticError(f"Método void '{self.name}' não pode retornar um valor.")
-                return e.value
-            
-        ctx.var_def(self.name, arnoldc_method_callable)
+            if not self.returns_value and completion.value is not None:
+                raise SemanticError(f"Método void '{self.name}' não pode retornar um valor.")
+            return completion.value
+
+        arnoldc_method_callable.method = self
+        registered = arnoldc_method_callable
+        if self.memo_size:
+            from .memo import memoize
+            registered = memoize(self, arnoldc_method_callable)
+        define(ctx, self.name, self.slot, registered)
 
     def validate_self(self, cursor: Cursor):
-        if self.name in RESERVED_KEYWORDS:
-            raise SemanticError("nome inválido", token=self.name)
-        
-        if len(self.params) != len(set(self.params)):
-            seen_params = set()
-            duplicated_name = None
-            for p_name in self.params:
-                if p_name in seen_params:
-                    duplicated_name = p_name
-                    break
-                seen_params.add(p_name)
-            raise SemanticError("parâmetro duplicado", token=duplicated_name)
-        
-        self.body.validate_self(self.body.cursor(cursor))
+        from .validator import check_method_signature
+        check_method_signature(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class AssignmentBlock(Stmt):
     """
     Representa o bloco de atribuição complexo do ArnoldC.
@@ -304,9 +459,22 @@ class AssignmentBlock(Stmt):
     initial_value_expr: Expr
     operations: list['OperationExpr'] 
 
+    # Endereço da variável de destino, calculado por `resolver.py`.
+    target_depth: int = annotation(DYNAMIC)
+    target_slot: int = annotation(0)
+    # Pares (função, operando) quando todos os valores são inteiros ou
+    # booleanos (anotado por `typecheck.py`).
+    int_ops: Optional[tuple] = annotation(None)
+
     def eval(self, ctx: Ctx):
         current_value = self.initial_value_expr.eval(ctx)
 
+        if (int_ops := self.int_ops) is not None:
+            for operation, operand in int_ops:
+                current_value = operation(current_value, operand.eval(ctx))
+            ctx.store(self.target_var, self.target_depth, self.target_slot, current_value)
+            return
+
         for op_node in self.operations:
             operand_value = op_node.operand.eval(ctx)
             if isinstance(op_node, AddOp):
@@ -330,61 +498,81 @@ class AssignmentBlock(Stmt):
             else:
                 raise NotImplementedError(f"Operação ArnoldC não implementada: {type(op_node).__name__}")
         
-        ctx.assign(self.target_var, current_value)
+        ctx.store(self.target_var, self.target_depth, self.target_slot, current_value)
 
-    def validate_self(self, cursor: Cursor):
-        self.initial_value_expr.validate_self(self.initial_value_expr.cursor(cursor))
-        for op_node in self.operations:
-            op_node.validate_self(op_node.cursor(cursor))
 
+@dataclass(slots=True)
+class Increment(Stmt):
+    """
+    Soma uma constante a uma variável. Não existe na sintaxe de ArnoldC: é
+    produzido por `optimizer.py` a partir de blocos da forma
+
+    GET TO THE CHOPPER x
+    HERE IS MY INVITATION x
+    GET UP 1
+    ENOUGH TALK
+
+    Um `delta` negativo representa 'GET DOWN -delta' (e não 'GET UP delta',
+    que daria outro erro de tipo para uma string).
+    """
+    target_var: str
+    delta: int
+
+    # Endereço da variável, calculado por `resolver.py`.
+    target_depth: int = annotation(DYNAMIC)
+    target_slot: int = annotation(0)
 
-@dataclass
+    def eval(self, ctx: Ctx):
+        delta = self.delta
+        if self.target_depth == 0:
+            slots = ctx.slots  # type: ignore[attr-defined]
+            value = slots[self.target_slot]
+            slots[self.target_slot] = value + delta if delta >= 0 else value - -delta
+            return
+        value = ctx.load(self.target_var, self.target_depth, self.target_slot)
+        value = value + delta if delta >= 0 else value - -delta
+        ctx.store(self.target_var, self.target_depth, self.target_slot, value)
+
+
+@dataclass(slots=True)
 class OperationExpr(Expr, ABC):
     operand: Expr
 
 
-@dataclass
+@dataclass(slots=True)
 class AddOp(OperationExpr): # GET UP
     def eval(self, ctx: Ctx): pass
-    def validate_self(self, cursor: Cursor): self.operand.validate_self(self.operand.cursor(cursor))
 
-@dataclass
+@dataclass(slots=True)
 class SubOp(OperationExpr): # GET DOWN
     def eval(self, ctx: Ctx): pass
-    def validate_self(self, cursor: Cursor): self.operand.validate_self(self.operand.cursor(cursor))
 
-@dataclass
+@dataclass(slots=True)
 class MulOp(OperationExpr): # YOU'RE FIRED
     def eval(self, ctx: Ctx): pass
-    def validate_self(self, cursor: Cursor): self.operand.validate_self(self.operand.cursor(cursor))
 
-@dataclass
+@dataclass(slots=True)
 class DivOp(OperationExpr): # HE HAD TO SPLIT
     def eval(self, ctx: Ctx): pass
-    def validate_self(self, cursor: Cursor): self.operand.validate_self(self.operand.cursor(cursor))
 
-@dataclass
+@dataclass(slots=True)
 class EqOp(OperationExpr): # YOU ARE NOT YOU YOU ARE ME
     def eval(self, ctx: Ctx): pass
-    def validate_self(self, cursor: Cursor): self.operand.validate_self(self.operand.cursor(cursor))
 
-@dataclass
+@dataclass(slots=True)
 class GtOp(OperationExpr): # LET OFF SOME STEAM BENNET
     def eval(self, ctx: Ctx): pass
-    def validate_self(self, cursor: Cursor): self.operand.validate_self(self.operand.cursor(cursor))
 
-@dataclass
+@dataclass(slots=True)
 class OrOp(OperationExpr): # CONSIDER THAT A DIVORCE
     def eval(self, ctx: Ctx): pass
-    def validate_self(self, cursor: Cursor): self.operand.validate_self(self.operand.cursor(cursor))
 
-@dataclass
+@dataclass(slots=True)
 class AndOp(OperationExpr): # KNOCK KNOCK
     def eval(self, ctx: Ctx): pass
-    def validate_self(self, cursor: Cursor): self.operand.validate_self(self.operand.cursor(cursor))
 
 
-@dataclass
+@dataclass(slots=True)
 class CallMethod(Stmt):
     """
     Representa uma chamada de método em ArnoldC.
@@ -394,28 +582,55 @@ class CallMethod(Stmt):
     method_name: str
     arguments: list[Expr]
 
+    # Endereços do método e da variável de resultado (veja `resolver.py`).
+    method_depth: int = annotation(DYNAMIC)
+    method_slot: int = annotation(0)
+    result_depth: int = annotation(DYNAMIC)
+    result_slot: int = annotation(0)
+    # Método que contém a chamada, se ela for recursiva e estiver em posição
+    # de cauda (veja `resolver.py`).
+    tail: Optional["Method"] = annotation(None)
+
     def eval(self, ctx: Ctx):
-        method_callable = ctx[self.method_name]
+        method_callable = ctx.load(self.method_name, self.method_depth, self.method_slot)
         args_values = [arg.eval(ctx) for arg in self.arguments]
 
+        if self.tail is not None and getattr(method_callable, "method", None) is self.tail:
+            return TailCall(method_callable, args_values, self.method_name)
+
         if callable(method_callable):
             try:
                 result = method_callable(*args_values)
                 if result is not None:
-                    ctx.assign(self.result_var, result)
+                    ctx.store(self.result_var, self.result_depth, self.result_slot, result)
             except TypeError as e:
                 raise ArnoldCError(f"Erro na chamada do método '{self.method_name}': {e}")
             except ForceReturn as e:
-                 ctx.assign(self.result_var, e.value)
+                 # Funções Python do ambiente ainda podem retornar desta forma.
+                 ctx.store(self.result_var, self.result_depth, self.result_slot, e.value)
             
         else:
             raise ArnoldCError(f"'{self.method_name}' não é um método.")
-
-    def validate_self(self, cursor: Cursor):
-        for arg in self.arguments:
-            arg.validate_self(arg.cursor(cursor))
             
             
+def raise_return_outside_method():
+    raise SemanticError("Não é possível usar 'I'LL BE BACK' fora de um método.", token="I'LL BE BACK")
+
+
+def define(ctx: Ctx, name: str, slot: Optional[int], value: "Value") -> None:
+    """
+    Declara uma variável: no frame do bloco, se o resolvedor calculou a sua
+    posição, ou pelo nome (escopo global ou árvore não resolvida).
+    """
+    if slot is None:
+        ctx.var_def(name, value)
+        return
+    slots = ctx.slots  # type: ignore[attr-defined]
+    if slots[slot] is not UNSET:
+        raise NameError(f"Variável '{name}' já foi declarada neste escopo.")
+    slots[slot] = value
+
+
 def is_arnoldc_true(value: "Value") -> bool:
     """Em ArnoldC, 0 é falso, qualquer outro inteiro é verdadeiro. Strings são verdadeiras."""
     if isinstance(value, int):
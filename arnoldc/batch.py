@@ -0,0 +1,138 @@
+"""
+Execução de muitos programas ArnoldC em lote (comando `arnoldc batch`).
+
+Os arquivos são distribuídos entre processos de um `ProcessPoolExecutor`.
+Cada processo carrega o parser uma única vez (no inicializador) e executa
+vários programas, evitando o custo de iniciar o interpretador por arquivo.
+A saída de cada programa é capturada em memória (`CaptureSink`) e o
+resultado de cada execução vira uma linha JSON do relatório:
+
+    {"file": ..., "status": "ok" | "error", "exit_code": 0 | 1,
+     "output": ..., "error": null | {"type": ..., "message": ..., "phase": ...},
+     "parse_ms": ..., "run_ms": ..., "total_ms": ...}
+"""
+
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional, TextIO
+
+from .cache import load_program
+from .ctx import Ctx
+from .output import CaptureSink, use_sink
+from .parser import get_parser
+from .runtime import evaluate
+
+
+def collect_files(patterns: Iterable[str], manifest: Optional[str] = None) -> list[str]:
+    """
+    Expande os padrões glob (com suporte a `**`) e as linhas do manifesto
+    (um caminho ou padrão por linha, relativo ao diretório do manifesto;
+    linhas vazias e comentários com `#` são ignorados). Arquivos repetidos
+    aparecem uma única vez, na ordem em que foram encontrados.
+    """
+    entries = list(patterns)
+    if manifest is not None:
+        base = Path(manifest).parent
+        with open(manifest, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    entries.append(str(base / line))
+
+    files: dict[str, None] = {}
+    for entry in entries:
+        matches = sorted(glob.glob(entry, recursive=True)) if glob.has_magic(entry) else [entry]
+        for path in matches:
+            files.setdefault(path, None)
+    return list(files)
+
+
+def init_worker() -> None:
+    """
+    Inicializador dos processos: constrói (ou carrega do cache) o parser.
+    """
+    get_parser()
+
+
+def run_file(path: str, engine: str = "tree", opt_level: int = 0, use_cache: bool = True) -> dict[str, Any]:
+    """
+    Executa um arquivo e retorna o registro do relatório.
+    """
+    result: dict[str, Any] = {
+        "file": path,
+        "status": "ok",
+        "exit_code": 0,
+        "output": "",
+        "error": None,
+        "parse_ms": 0.0,
+        "run_ms": 0.0,
+    }
+    start = phase_start = time.perf_counter()
+    phase = "parse"
+    sink = CaptureSink()
+    try:
+        with open(path, encoding="utf-8") as f:
+            source = f.read()
+        program = load_program(source, opt_level, use_cache=use_cache)
+        phase_start = time.perf_counter()
+        result["parse_ms"] = (phase_start - start) * 1e3
+
+        phase = "run"
+        with use_sink(sink):
+            evaluate(program, Ctx.from_dict({}), engine)
+        result["run_ms"] = (time.perf_counter() - phase_start) * 1e3
+    except Exception as e:
+        if phase == "run":
+            result["run_ms"] = (time.perf_counter() - phase_start) * 1e3
+        result["status"] = "error"
+        result["exit_code"] = 1
+        result["error"] = {"type": type(e).__name__, "message": str(e), "phase": phase}
+    result["output"] = sink.getvalue()
+    result["total_ms"] = (time.perf_counter() - start) * 1e3
+    return result
+
+
+def run_batch(
+    files: list[str],
+    jobs: Optional[int] = None,
+    engine: str = "tree",
+    opt_level: int = 0,
+    use_cache: bool = True,
+) -> Iterator[dict[str, Any]]:
+    """
+    Executa os arquivos e produz os resultados na mesma ordem de `files`.
+
+    Com `jobs == 1` os programas rodam no próprio processo.
+    """
+    options = (engine, opt_level, use_cache)
+    if jobs == 1:
+        init_worker()
+        for path in files:
+            yield run_file(path, *options)
+        return
+
+    jobs = jobs or os.cpu_count() or 1
+    chunksize = max(1, len(files) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker) as executor:
+        n = len(files)
+        yield from executor.map(
+            run_file, files, [engine] * n, [opt_level] * n, [use_cache] * n, chunksize=chunksize
+        )
+
+
+def write_report(results: Iterable[dict[str, Any]], stream: TextIO) -> dict[str, Any]:
+    """
+    Escreve os resultados em JSONL e retorna um resumo da execução.
+    """
+    summary = {"files": 0, "ok": 0, "errors": 0, "total_ms": 0.0}
+    for result in results:
+        stream.write(json.dumps(result, ensure_ascii=False))
+        stream.write("\n")
+        summary["files"] += 1
+        summary["ok" if result["status"] == "ok" else "errors"] += 1
+        summary["total_ms"] += result["total_ms"]
+    return summary
@@ -0,0 +1,155 @@
+"""
+Benchmarks embutidos (comando `arnoldc bench`).
+
+Executa os programas do corpus (por padrão, `benchmarks/corpus` na raiz do
+repositório) com algumas execuções de aquecimento e várias repetições, e
+mede separadamente cada fase: parsing (Lark + `ArnoldCTransformer`),
+validação e execução. Para cada fase é reportado o melhor tempo entre as
+repetições. A saída dos programas é capturada em memória.
+
+Os resultados podem ser salvos em JSON e usados como referência em execuções
+seguintes: uma fase mais lenta que a referência (além da tolerância) é
+reportada como regressão e o comando termina com código 1.
+
+    python -m arnoldc bench --save referencia.json
+    # ... altera o interpretador ...
+    python -m arnoldc bench --baseline referencia.json
+"""
+
+import json
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .ctx import Ctx
+from .optimizer import optimize
+from .output import CaptureSink, use_sink
+from .parser import DIR, get_parser
+from .runtime import evaluate
+from .transformer import ArnoldCTransformer
+
+CORPUS_DIR = DIR.parent / "benchmarks" / "corpus"
+
+PHASES = ("parse", "validate", "execute")
+
+# Diferenças menores que isso (em ms) nunca são consideradas regressões:
+# fases muito curtas variam bastante de uma execução para outra.
+MIN_REGRESSION_MS = 1.0
+
+
+def corpus_files(paths: Iterable[str] = ()) -> list[Path]:
+    """
+    Arquivos do benchmark: os caminhos dados (diretórios são expandidos) ou
+    o corpus padrão.
+    """
+    files: list[Path] = []
+    for path in map(Path, paths or [str(CORPUS_DIR)]):
+        if path.is_dir():
+            files.extend(sorted(path.glob("*.arnoldc")))
+        else:
+            files.append(path)
+    return files
+
+
+def run_once(source: str, engine: str, opt_level: int) -> dict[str, float]:
+    """
+    Executa o programa uma vez e retorna o tempo (em ms) de cada fase.
+    """
+    start = time.perf_counter()
+    program = ArnoldCTransformer().transform(get_parser().parse(source, start="start"))
+    parsed = time.perf_counter()
+    program.validate_tree()
+    program = optimize(program, opt_level)
+    validated = time.perf_counter()
+    with use_sink(CaptureSink()):
+        evaluate(program, Ctx.from_dict({}), engine)
+    executed = time.perf_counter()
+    return {
+        "parse": (parsed - start) * 1e3,
+        "validate": (validated - parsed) * 1e3,
+        "execute": (executed - validated) * 1e3,
+    }
+
+
+def measure(source: str, engine: str = "tree", opt_level: int = 0, warmup: int = 1, repeat: int = 5) -> dict[str, float]:
+    """
+    Melhor tempo de cada fase em `repeat` execuções, depois de `warmup`
+    execuções descartadas.
+    """
+    for _ in range(warmup):
+        run_once(source, engine, opt_level)
+    best = {phase: float("inf") for phase in PHASES}
+    for _ in range(repeat):
+        for phase, elapsed in run_once(source, engine, opt_level).items():
+            best[phase] = min(best[phase], elapsed)
+    return best
+
+
+def regressions(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    tolerance: float,
+) -> list[tuple[str, str, float, float]]:
+    """
+    Lista as fases (programa, fase, referência, atual) mais lentas que a
+    referência por mais de `tolerance` (fração) e de `MIN_REGRESSION_MS`.
+    """
+    found = []
+    for name, phases in results.items():
+        for phase, elapsed in phases.items():
+            before = baseline.get(name, {}).get(phase)
+            if before is None:
+                continue
+            if elapsed > before * (1 + tolerance) and elapsed - before > MIN_REGRESSION_MS:
+                found.append((name, phase, before, elapsed))
+    return found
+
+
+def run_bench(
+    paths: Iterable[str] = (),
+    engine: str = "tree",
+    opt_level: int = 0,
+    warmup: int = 1,
+    repeat: int = 5,
+    baseline_path: Optional[str] = None,
+    save_path: Optional[str] = None,
+    tolerance: float = 0.10,
+) -> int:
+    """
+    Executa o benchmark, imprime a tabela de resultados e retorna o código
+    de saída do comando (1 se houver regressões).
+    """
+    baseline: dict[str, dict[str, float]] = {}
+    if baseline_path:
+        with open(baseline_path, encoding="utf-8") as f:
+            saved = json.load(f)
+        baseline = saved["results"]
+        if (saved.get("engine"), saved.get("opt_level")) != (engine, opt_level):
+            print(f"Atenção: a referência foi medida com engine={saved.get('engine')} -O{saved.get('opt_level')}.")
+
+    print(f"engine={engine} -O{opt_level} aquecimento={warmup} repetições={repeat} (melhor tempo, em ms)")
+    header = f"{'programa':>16} {'parse':>9} {'validate':>9} {'execute':>9} {'total':>9}"
+    if baseline:
+        header += f" {'antes':>9} {'ganho':>7}"
+    print(header)
+
+    results: dict[str, dict[str, float]] = {}
+    for path in corpus_files(paths):
+        source = path.read_text(encoding="utf-8")
+        phases = measure(source, engine, opt_level, warmup, repeat)
+        results[path.stem] = phases
+        total = sum(phases.values())
+        line = f"{path.stem:>16} " + " ".join(f"{phases[phase]:>9.2f}" for phase in PHASES) + f" {total:>9.2f}"
+        if path.stem in baseline:
+            before = sum(baseline[path.stem].values())
+            line += f" {before:>9.2f} {before / total:>6.2f}x"
+        print(line)
+
+    if save_path:
+        with open(save_path, "w", encoding="utf-8") as f:
+            json.dump({"engine": engine, "opt_level": opt_level, "results": results}, f, indent=2)
+
+    found = regressions(results, baseline, tolerance)
+    for name, phase, before, elapsed in found:
+        print(f"REGRESSÃO: {name}/{phase}: {before:.2f} ms -> {elapsed:.2f} ms (+{(elapsed / before - 1) * 100:.0f}%)")
+    return 1 if found else 0
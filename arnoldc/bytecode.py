@@ -0,0 +1,477 @@
+"""
+Compilador da árvore sintática para bytecode.
+
+Cada `Program` e cada `Method` é compilado para um `CodeObject`: um vetor
+plano de inteiros (pares opcode/argumento), uma tabela de constantes e uma
+tabela de nomes. O bytecode é executado pela máquina de pilha em `vm.py`.
+
+Variáveis declaradas no nível mais externo do programa continuam vivendo no
+dicionário do `Ctx` global (assim o ambiente passado para `arnoldc_eval` é
+atualizado como no interpretador de árvore). As demais variáveis são
+resolvidas em tempo de compilação para posições (slots) no vetor de locais
+de um frame, seguindo a ordem textual das declarações, como acontece na
+busca dinâmica feita pelo `Ctx`.
+"""
+
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Optional
+
+from .arnoldc_ast import (
+    AddOp,
+    AndOp,
+    AssignmentBlock,
+    Bool,
+    CallMethod,
+    DivOp,
+    EqOp,
+    Expr,
+    GtOp,
+    If,
+    Increment,
+    Literal,
+    Method,
+    MulOp,
+    OrOp,
+    Print,
+    Program,
+    Return,
+    StatementBlock,
+    Stmt,
+    SubOp,
+    Var,
+    VarDef,
+    While,
+)
+
+
+class Op(IntEnum):
+    """
+    Opcodes da máquina virtual.
+
+    A máquina usa um acumulador: cargas (`LOAD_*`) colocam um valor no
+    acumulador, operações combinam o acumulador com o registrador `rhs` (ou
+    diretamente com um operando, nas superinstruções `*_CONST`, `*_FAST` e
+    `*_GLOBAL`) e armazenamentos (`STORE_*`) gravam o acumulador em uma
+    variável. A pilha só é usada para montar os argumentos de chamadas.
+
+    Todos os opcodes ocupam duas posições no vetor de código: o opcode e o
+    seu argumento (zero quando não é usado).
+    """
+
+    LOAD_FAST = 1
+    LOAD_GLOBAL = 2
+    LOAD_CONST = 3
+    LOAD_DEREF = 4
+    STORE_FAST = 5
+    STORE_GLOBAL = 6
+    STORE_DEREF = 7
+    DEF_GLOBAL = 8
+    ADD_CONST = 9
+    SUB_CONST = 10
+    ADD_FAST = 11
+    SUB_FAST = 12
+    ADD_GLOBAL = 13
+    SUB_GLOBAL = 14
+    JUMP_IF_TRUE = 15
+    JUMP_IF_FALSE = 16
+    JUMP = 17
+    RHS_CONST = 18
+    RHS_FAST = 19
+    RHS_GLOBAL = 20
+    RHS_DEREF = 21
+    ADD = 22
+    SUB = 23
+    MUL = 24
+    DIV = 25
+    EQ = 26
+    GT = 27
+    OR = 28
+    AND = 29
+    PUSH = 30
+    CALL = 31
+    JUMP_IF_NONE = 32
+    RETURN_VALUE = 33
+    RETURN_NONE = 34
+    RETURN_FROM_VOID = 35
+    MISSING_RETURN = 36
+    PRINT = 37
+    MAKE_METHOD = 38
+    HALT = 39
+
+
+BINARY_OPS = {
+    AddOp: Op.ADD,
+    SubOp: Op.SUB,
+    MulOp: Op.MUL,
+    DivOp: Op.DIV,
+    EqOp: Op.EQ,
+    GtOp: Op.GT,
+    OrOp: Op.OR,
+    AndOp: Op.AND,
+}
+
+# Superinstruções que combinam a leitura do operando com a operação.
+FUSED_OPS = {
+    (Op.ADD, Op.LOAD_CONST): Op.ADD_CONST,
+    (Op.SUB, Op.LOAD_CONST): Op.SUB_CONST,
+    (Op.ADD, Op.LOAD_FAST): Op.ADD_FAST,
+    (Op.SUB, Op.LOAD_FAST): Op.SUB_FAST,
+    (Op.ADD, Op.LOAD_GLOBAL): Op.ADD_GLOBAL,
+    (Op.SUB, Op.LOAD_GLOBAL): Op.SUB_GLOBAL,
+}
+
+RHS_OPS = {
+    Op.LOAD_CONST: Op.RHS_CONST,
+    Op.LOAD_FAST: Op.RHS_FAST,
+    Op.LOAD_GLOBAL: Op.RHS_GLOBAL,
+    Op.LOAD_DEREF: Op.RHS_DEREF,
+}
+
+STORE_OPS = {
+    Op.LOAD_FAST: Op.STORE_FAST,
+    Op.LOAD_DEREF: Op.STORE_DEREF,
+    Op.LOAD_GLOBAL: Op.STORE_GLOBAL,
+}
+
+# Argumentos compostos: (profundidade, slot) em LOAD/STORE_DEREF e
+# (nome, número de argumentos) em CALL.
+DEREF_SHIFT = 32
+DEREF_MASK = (1 << DEREF_SHIFT) - 1
+CALL_SHIFT = 16
+CALL_MASK = (1 << CALL_SHIFT) - 1
+
+
+@dataclass
+class CodeObject:
+    """
+    Resultado da compilação de um programa ou de um método.
+    """
+
+    name: str
+    code: list[int]
+    consts: list[Any]
+    names: list[str]
+    nslots: int
+    nparams: int = 0
+    returns_value: bool = False
+    # Método memoizado cujo cache é consultado nas chamadas (veja `memo.py`).
+    memo_method: Optional[Method] = None
+
+    def __str__(self) -> str:
+        return f"<code {self.name}>"
+
+    def disassemble(self) -> str:
+        """
+        Representação legível do bytecode (útil para depuração).
+        """
+        lines = [f"code {self.name} (slots={self.nslots}, params={self.nparams})"]
+        for pc in range(0, len(self.code), 2):
+            op, arg = Op(self.code[pc]), self.code[pc + 1]
+            lines.append(f"  {pc:>5} {op.name:<18} {self._describe(op, arg)}")
+        for const in self.consts:
+            if isinstance(const, CodeObject):
+                lines.append("")
+                lines.append(const.disassemble())
+        return "\n".join(lines)
+
+    def _describe(self, op: Op, arg: int) -> str:
+        match op:
+            case Op.LOAD_CONST | Op.RHS_CONST | Op.ADD_CONST | Op.SUB_CONST | Op.MAKE_METHOD:
+                const = self.consts[arg]
+                return f"{arg} ({const.name if isinstance(const, CodeObject) else repr(const)})"
+            case Op.LOAD_GLOBAL | Op.STORE_GLOBAL | Op.DEF_GLOBAL | Op.RHS_GLOBAL | Op.ADD_GLOBAL | Op.SUB_GLOBAL:
+                return f"{arg} ({self.names[arg]})"
+            case Op.LOAD_DEREF | Op.STORE_DEREF | Op.RHS_DEREF:
+                return f"depth={arg >> DEREF_SHIFT} slot={arg & DEREF_MASK}"
+            case Op.CALL:
+                return f"{self.names[arg >> CALL_SHIFT]} argc={arg & CALL_MASK}"
+            case Op.LOAD_FAST | Op.STORE_FAST | Op.RHS_FAST | Op.ADD_FAST | Op.SUB_FAST:
+                return str(arg)
+            case Op.JUMP | Op.JUMP_IF_TRUE | Op.JUMP_IF_FALSE | Op.JUMP_IF_NONE:
+                return f"-> {arg}"
+        return ""
+
+
+@dataclass
+class _Function:
+    """
+    Estado de compilação de um único `CodeObject`.
+
+    `scopes` é a pilha de escopos léxicos ativos, mapeando nomes para slots.
+    No programa principal o escopo mais externo é o `Ctx` global e por isso
+    é representado por `None`.
+    """
+
+    name: str
+    parent: Optional["_Function"]
+    scopes: list[Optional[dict[str, int]]]
+    returns_value: bool = False
+    code: list[int] = field(default_factory=list)
+    consts: list[Any] = field(default_factory=list)
+    const_index: dict[tuple[type, Any], int] = field(default_factory=dict)
+    names: list[str] = field(default_factory=list)
+    name_index: dict[str, int] = field(default_factory=dict)
+    labels: set[int] = field(default_factory=set)
+    nslots: int = 0
+
+    def emit(self, op: Op, arg: int = 0) -> int:
+        self.code.append(int(op))
+        self.code.append(arg)
+        return len(self.code) - 1
+
+    def patch(self, position: int, target: int) -> None:
+        self.code[position] = target
+        self.labels.add(target)
+
+    def label(self) -> int:
+        """
+        Marca a posição atual como destino de um salto.
+        """
+        self.labels.add(len(self.code))
+        return len(self.code)
+
+    def holds(self, load_op: Op, arg: int) -> bool:
+        """
+        Verifica se o acumulador certamente já contém a variável lida por
+        `load_op`, ou seja, se a instrução anterior acabou de gravá-la e a
+        posição atual não é destino de nenhum salto.
+        """
+        if len(self.code) < 2 or len(self.code) in self.labels or self.code[-1] != arg:
+            return False
+        last = self.code[-2]
+        if load_op == Op.LOAD_GLOBAL:
+            return last == Op.STORE_GLOBAL or last == Op.DEF_GLOBAL
+        return load_op in STORE_OPS and last == STORE_OPS[load_op]
+
+    def const(self, value: Any) -> int:
+        if isinstance(value, CodeObject):
+            self.consts.append(value)
+            return len(self.consts) - 1
+        # a chave inclui o tipo para não confundir 1 com True
+        key = (type(value), value)
+        if key not in self.const_index:
+            self.const_index[key] = len(self.consts)
+            self.consts.append(value)
+        return self.const_index[key]
+
+    def name_ref(self, name: str) -> int:
+        if name not in self.name_index:
+            self.name_index[name] = len(self.names)
+            self.names.append(name)
+        return self.name_index[name]
+
+    def new_slot(self) -> int:
+        self.nslots += 1
+        return self.nslots - 1
+
+
+class Compiler:
+    """
+    Compila nós da AST para `CodeObject`s.
+    """
+
+    def __init__(self):
+        self.fn: _Function
+
+    def compile_program(self, program: Program) -> CodeObject:
+        self.fn = _Function("<program>", None, [None])
+        for stmt in program.stmts:
+            self.stmt(stmt)
+        self.fn.emit(Op.HALT)
+        return self._finish(self.fn)
+
+    def _finish(self, fn: _Function, nparams: int = 0, returns_value: bool = False) -> CodeObject:
+        return CodeObject(
+            name=fn.name,
+            code=fn.code,
+            consts=fn.consts,
+            names=fn.names,
+            nslots=fn.nslots,
+            nparams=nparams,
+            returns_value=returns_value,
+        )
+
+    #
+    # Resolução de nomes
+    #
+
+    def resolve(self, name: str) -> tuple[Op, int]:
+        """
+        Retorna o par (opcode de leitura, argumento) para a variável.
+        """
+        depth = 0
+        fn: Optional[_Function] = self.fn
+        while fn is not None:
+            for scope in reversed(fn.scopes):
+                if scope is None:
+                    return Op.LOAD_GLOBAL, self.fn.name_ref(name)
+                if name in scope:
+                    if depth == 0:
+                        return Op.LOAD_FAST, scope[name]
+                    return Op.LOAD_DEREF, (depth << DEREF_SHIFT) | scope[name]
+            fn = fn.parent
+            depth += 1
+        return Op.LOAD_GLOBAL, self.fn.name_ref(name)
+
+    def store(self, name: str) -> None:
+        """
+        Atribui o acumulador a uma variável existente (como `Ctx.assign`).
+        """
+        op, arg = self.resolve(name)
+        self.fn.emit(STORE_OPS[op], arg)
+
+    def declare(self, name: str) -> None:
+        """
+        Declara uma variável no escopo atual e armazena o acumulador nela
+        (como `Ctx.var_def`).
+        """
+        scope = self.fn.scopes[-1]
+        if scope is None:
+            self.fn.emit(Op.DEF_GLOBAL, self.fn.name_ref(name))
+        else:
+            scope[name] = slot = self.fn.new_slot()
+            self.fn.emit(Op.STORE_FAST, slot)
+
+    #
+    # Expressões
+    #
+
+    def operand(self, node: Expr) -> tuple[Op, int]:
+        """
+        Retorna o par (opcode de leitura, argumento) para a expressão.
+        """
+        if isinstance(node, Var):
+            return self.resolve(node.name)
+        elif isinstance(node, (Literal, Bool)):
+            return Op.LOAD_CONST, self.fn.const(node.value)
+        raise NotImplementedError(f"Expressão não suportada pela VM: {type(node).__name__}")
+
+    def expr(self, node: Expr) -> None:
+        """
+        Carrega o valor da expressão no acumulador.
+        """
+        op, arg = self.operand(node)
+        if not self.fn.holds(op, arg):
+            self.fn.emit(op, arg)
+
+    #
+    # Comandos
+    #
+
+    def stmt(self, node: Stmt) -> None:
+        method = getattr(self, f"stmt_{type(node).__name__}", None)
+        if method is None:
+            raise NotImplementedError(f"Comando não suportado pela VM: {type(node).__name__}")
+        method(node)
+
+    def stmt_Print(self, node: Print) -> None:
+        self.expr(node.target)
+        self.fn.emit(Op.PRINT)
+
+    def stmt_VarDef(self, node: VarDef) -> None:
+        self.expr(node.value)
+        self.declare(node.name)
+
+    def stmt_AssignmentBlock(self, node: AssignmentBlock) -> None:
+        self.expr(node.initial_value_expr)
+        for op_node in node.operations:
+            try:
+                binary_op = BINARY_OPS[type(op_node)]
+            except KeyError:
+                msg = f"Operação ArnoldC não implementada: {type(op_node).__name__}"
+                raise NotImplementedError(msg) from None
+
+            load_op, arg = self.operand(op_node.operand)
+            if fused := FUSED_OPS.get((binary_op, load_op)):
+                self.fn.emit(fused, arg)
+            else:
+                self.fn.emit(RHS_OPS[load_op], arg)
+                self.fn.emit(binary_op)
+        self.store(node.target_var)
+
+    def stmt_Increment(self, node: Increment) -> None:
+        self.expr(Var(node.target_var))
+        if node.delta < 0:
+            self.fn.emit(Op.SUB_CONST, self.fn.const(-node.delta))
+        else:
+            self.fn.emit(Op.ADD_CONST, self.fn.const(node.delta))
+        self.store(node.target_var)
+
+    def stmt_StatementBlock(self, node: StatementBlock) -> None:
+        self.fn.scopes.append({})
+        for stmt in node.stmts:
+            self.stmt(stmt)
+        self.fn.scopes.pop()
+
+    def stmt_If(self, node: If) -> None:
+        self.expr(node.cond)
+        jump_else = self.fn.emit(Op.JUMP_IF_FALSE)
+        self.stmt(node.then_branch)
+        if node.else_branch is not None and node.else_branch.stmts:
+            jump_end = self.fn.emit(Op.JUMP)
+            self.fn.patch(jump_else, len(self.fn.code))
+            self.stmt(node.else_branch)
+            self.fn.patch(jump_end, len(self.fn.code))
+        else:
+            self.fn.patch(jump_else, len(self.fn.code))
+
+    def stmt_While(self, node: While) -> None:
+        # A condição é repetida no fim do laço, de modo que cada iteração
+        # executa um único salto.
+        self.expr(node.cond)
+        jump_end = self.fn.emit(Op.JUMP_IF_FALSE)
+        start = self.fn.label()
+        self.stmt(node.body)
+        self.expr(node.cond)
+        self.fn.emit(Op.JUMP_IF_TRUE, start)
+        self.fn.patch(jump_end, len(self.fn.code))
+
+    def stmt_Method(self, node: Method) -> None:
+        # O nome é declarado antes de compilar o corpo para permitir recursão.
+        scope = self.fn.scopes[-1]
+        if scope is not None:
+            scope[node.name] = slot = self.fn.new_slot()
+
+        outer = self.fn
+        self.fn = _Function(node.name, outer, [{}], node.returns_value)
+        for param in node.params:
+            self.fn.scopes[-1][param] = self.fn.new_slot()
+        self.stmt(node.body)
+        self.fn.emit(Op.MISSING_RETURN if node.returns_value else Op.RETURN_NONE)
+        code = self._finish(self.fn, len(node.params), node.returns_value)
+        if node.memo_size:
+            code.memo_method = node
+        self.fn = outer
+
+        self.fn.emit(Op.MAKE_METHOD, self.fn.const(code))
+        if scope is None:
+            self.fn.emit(Op.DEF_GLOBAL, self.fn.name_ref(node.name))
+        else:
+            self.fn.emit(Op.STORE_FAST, slot)
+
+    def stmt_CallMethod(self, node: CallMethod) -> None:
+        self.fn.emit(*self.resolve(node.method_name))
+        self.fn.emit(Op.PUSH)
+        for arg in node.arguments:
+            self.expr(arg)
+            self.fn.emit(Op.PUSH)
+        name = self.fn.name_ref(node.method_name)
+        self.fn.emit(Op.CALL, (name << CALL_SHIFT) | len(node.arguments))
+        jump_end = self.fn.emit(Op.JUMP_IF_NONE)
+        self.store(node.result_var)
+        self.fn.patch(jump_end, len(self.fn.code))
+
+    def stmt_Return(self, node: Return) -> None:
+        if node.value is None:
+            self.fn.emit(Op.LOAD_CONST, self.fn.const(None))
+        else:
+            self.expr(node.value)
+        self.fn.emit(Op.RETURN_VALUE if self.fn.returns_value else Op.RETURN_FROM_VOID)
+
+
+def compile_program(program: Program) -> CodeObject:
+    """
+    Compila um programa completo para bytecode.
+    """
+    return Compiler().compile_program(program)
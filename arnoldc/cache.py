@@ -0,0 +1,100 @@
+"""
+Cache em disco de programas já compilados.
+
+Parecido com o `__pycache__` do Python: a árvore sintática validada (e
+otimizada) de cada programa é serializada com `pickle` em
+`cache_dir()/programs`. A chave de cada entrada é um hash do código fonte,
+do nível de otimização, da gramática (veja `parser.grammar_hash`) e do
+código do próprio interpretador, de modo que qualquer mudança em um deles
+invalida a entrada. Em um acerto, o programa é carregado sem passar pelo
+parser.
+
+As escritas são atômicas (`parser.atomic_write`), então vários processos
+podem compartilhar o mesmo diretório de cache. O cache só deve ser usado em
+diretórios do próprio usuário: carregar um pickle executa código.
+"""
+
+import hashlib
+import pickle
+import shutil
+from functools import cache
+from pathlib import Path
+from typing import Optional
+
+from .arnoldc_ast import Program
+from .optimizer import optimize
+from .parser import DIR, atomic_write, cache_dir, grammar_hash, parse
+
+
+@cache
+def interpreter_hash() -> str:
+    """
+    Hash do código fonte do pacote: os nós da árvore (e, portanto, o formato
+    serializado) mudam junto com o interpretador.
+    """
+    digest = hashlib.sha256()
+    for path in sorted(DIR.glob("*.py")):
+        digest.update(path.name.encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def program_key(source: str, opt_level: int = 0) -> str:
+    key = "\n".join([grammar_hash(), interpreter_hash(), str(opt_level), source])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def programs_dir() -> Path:
+    return cache_dir() / "programs"
+
+
+def program_cache_path(key: str) -> Path:
+    return programs_dir() / f"{key}.pickle"
+
+
+def load_cached(key: str) -> Optional[Program]:
+    """
+    Carrega um programa do cache. Entradas ausentes ou corrompidas retornam
+    None.
+    """
+    try:
+        with program_cache_path(key).open("rb") as f:
+            program = pickle.load(f)
+    except Exception:
+        return None
+    return program if isinstance(program, Program) else None
+
+
+def store_cached(key: str, program: Program) -> None:
+    atomic_write(
+        program_cache_path(key),
+        lambda f: pickle.dump(program, f, protocol=pickle.HIGHEST_PROTOCOL),
+    )
+
+
+def load_program(source: str, opt_level: int = 0, use_cache: bool = True) -> Program:
+    """
+    Retorna o programa validado e otimizado no nível `opt_level`, usando o
+    cache em disco se `use_cache` for verdadeiro.
+    """
+    if not use_cache:
+        return optimize(parse(source), opt_level)
+
+    key = program_key(source, opt_level)
+    if (program := load_cached(key)) is not None:
+        return program
+    program = optimize(parse(source), opt_level)
+    store_cached(key, program)
+    return program
+
+
+def clear_cache() -> int:
+    """
+    Remove os programas do cache e retorna quantas entradas foram apagadas.
+    """
+    path = programs_dir()
+    if not path.is_dir():
+        return 0
+    count = sum(1 for entry in path.iterdir() if entry.suffix == ".pickle")
+    shutil.rmtree(path, ignore_errors=True)
+    return count
@@ -11,14 +11,28 @@ padrão do Python e não requer instalação de dependências externas.
 """
 
 import argparse
+import sys
+from contextlib import contextmanager
+from typing import Iterator, Optional
 
 from lark import Token
 
 
-from . import arnoldc_eval
+from . import arnoldc_eval, compile_to_python
+from .cache import clear_cache, load_program
 from .ctx import Ctx
+from .memo import DEFAULT_MEMO_SIZE, enable_memo, memo_report
+from .optimizer import LEVELS, optimize
+from .output import FLUSH_POLICIES, BufferedSink, Sink, StdoutSink
 from .parser import lex, parse, parse_cst, parse_expr
-from .runtime import print_arnoldc
+from .runtime import ENGINES, print_arnoldc
+from .tiers import LOOP_THRESHOLD, METHOD_THRESHOLD
+
+# Intervalo (em segundos) entre as verificações do arquivo no modo --watch.
+WATCH_INTERVAL = 0.25
+
+# Engines que não suportam memoização (veja `flat.py`).
+NO_MEMO_ENGINES = ("flat",)
 
 
 def make_argparser():
@@ -61,6 +75,205 @@ def make_argparser():
         action="store_true",
         help="Mostra o código fonte do arquivo de entrada.",
     )
+    run_parser.add_argument(
+        "-e",
+        "--engine",
+        choices=ENGINES,
+        default="tree",
+        help=(
+            "Engine de execução: interpretador de árvore (tree), closures (closure), máquina virtual (vm), "
+            "Python (py), representação plana (flat) ou árvore com compilação dos trechos mais executados (tiered)."
+        ),
+    )
+    run_parser.add_argument(
+        "-O",
+        dest="opt_level",
+        type=int,
+        choices=LEVELS,
+        default=0,
+        metavar="NÍVEL",
+        help="Nível de otimização da árvore sintática: -O1 ou -O2 (padrão: 0, sem otimizações).",
+    )
+    run_parser.add_argument(
+        "-o",
+        "--output",
+        metavar="ARQUIVO",
+        help="Escreve a saída do programa no arquivo em vez da saída padrão.",
+    )
+    run_parser.add_argument(
+        "--flush",
+        choices=FLUSH_POLICIES,
+        help="Política de flush da saída: a cada linha, quando o buffer enche (padrão com --output) ou só ao final.",
+    )
+    run_parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Mede o número de execuções e o tempo de cada comando (usa o interpretador de árvore).",
+    )
+    run_parser.add_argument(
+        "--flamegraph",
+        metavar="ARQUIVO",
+        help="Com o profiler, salva as pilhas de execução no formato collapsed (flamegraph).",
+    )
+    run_parser.add_argument(
+        "--tier-calls",
+        type=int,
+        default=METHOD_THRESHOLD,
+        metavar="CHAMADAS",
+        help=f"Com a engine tiered, chamadas de um método antes de compilá-lo (padrão: {METHOD_THRESHOLD}).",
+    )
+    run_parser.add_argument(
+        "--tier-loops",
+        type=int,
+        default=LOOP_THRESHOLD,
+        metavar="ITERAÇÕES",
+        help=f"Com a engine tiered, iterações de um laço antes de compilá-lo (padrão: {LOOP_THRESHOLD}).",
+    )
+    run_parser.add_argument(
+        "--tier-stats",
+        action="store_true",
+        help="Com a engine tiered, mostra os métodos e laços promovidos ao final da execução.",
+    )
+    run_parser.add_argument(
+        "--memo",
+        action="store_true",
+        help="Memoiza os métodos puros com um cache LRU por método (-O2 já memoiza; não suportado pela engine flat).",
+    )
+    run_parser.add_argument(
+        "--memo-size",
+        type=int,
+        default=None,
+        metavar="ENTRADAS",
+        help=f"Entradas do cache de cada método memoizado; implica --memo (padrão: {DEFAULT_MEMO_SIZE}).",
+    )
+    run_parser.add_argument(
+        "--memo-stats",
+        action="store_true",
+        help="Mostra os acertos e falhas dos caches de memoização ao final da execução.",
+    )
+    run_parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Mostra quantas variáveis, métodos, ramos e nós o otimizador removeu como código morto (com -O1 ou -O2).",
+    )
+    run_parser.add_argument(
+        "--typecheck",
+        action="store_true",
+        help="Verifica os tipos antes de executar e não executa o programa se houver erros.",
+    )
+    run_parser.add_argument(
+        "-w",
+        "--watch",
+        action="store_true",
+        help="Executa o programa de novo a cada alteração do arquivo, analisando só os trechos alterados.",
+    )
+    run_parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Executa cada comando assim que ele é analisado, sem carregar o arquivo inteiro (para programas muito grandes; usa o interpretador de árvore).",
+    )
+    run_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Não usa o cache de programas compilados (sempre faz o parsing).",
+    )
+    run_parser.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="Apaga o cache de programas compilados antes de executar.",
+    )
+    run_parser.add_argument(
+        "--emit-py",
+        action="store_true",
+        help="Imprime o código Python gerado para o programa (sem executá-lo).",
+    )
+
+    batch_parser = subparsers.add_parser("batch", help="Executa vários arquivos ArnoldC em paralelo")
+    batch_parser.add_argument(
+        "patterns",
+        nargs="*",
+        metavar="PADRÃO",
+        help="Arquivos ou padrões glob (ex.: 'provas/**/*.arnoldc').",
+    )
+    batch_parser.add_argument(
+        "-m",
+        "--manifest",
+        metavar="ARQUIVO",
+        help="Arquivo com um caminho (ou padrão) por linha.",
+    )
+    batch_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Número de processos (padrão: número de CPUs).",
+    )
+    batch_parser.add_argument(
+        "-r",
+        "--report",
+        metavar="ARQUIVO",
+        default="-",
+        help="Arquivo do relatório JSONL (padrão: saída padrão).",
+    )
+    batch_parser.add_argument(
+        "-e",
+        "--engine",
+        choices=ENGINES,
+        default="tree",
+        help="Engine de execução.",
+    )
+    batch_parser.add_argument(
+        "-O",
+        dest="opt_level",
+        type=int,
+        choices=LEVELS,
+        default=0,
+        metavar="NÍVEL",
+        help="Nível de otimização da árvore sintática.",
+    )
+    batch_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Não usa o cache de programas compilados.",
+    )
+
+    bench_parser = subparsers.add_parser("bench", help="Executa os benchmarks embutidos")
+    bench_parser.add_argument(
+        "paths",
+        nargs="*",
+        metavar="CAMINHO",
+        help="Arquivos ou diretórios do benchmark (padrão: benchmarks/corpus).",
+    )
+    bench_parser.add_argument(
+        "-e",
+        "--engine",
+        choices=ENGINES,
+        default="tree",
+        help="Engine de execução.",
+    )
+    bench_parser.add_argument(
+        "-O",
+        dest="opt_level",
+        type=int,
+        choices=LEVELS,
+        default=0,
+        metavar="NÍVEL",
+        help="Nível de otimização da árvore sintática.",
+    )
+    bench_parser.add_argument("--warmup", type=int, default=1, help="Execuções de aquecimento.")
+    bench_parser.add_argument("--repeat", type=int, default=5, help="Repetições medidas.")
+    bench_parser.add_argument("--save", metavar="ARQUIVO", help="Salva os resultados em JSON.")
+    bench_parser.add_argument(
+        "--baseline",
+        metavar="ARQUIVO",
+        help="Compara com resultados salvos e falha se alguma fase ficar mais lenta.",
+    )
+    bench_parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.10,
+        help="Fração de lentidão tolerada antes de acusar regressão (padrão: 0.10).",
+    )
 
     return parser
 
@@ -73,6 +286,17 @@ def main():
     args = parser.parse_args()
 
     if args.command == "run":
+        check_memo_args(parser, args)
+
+    if args.command == "run" and args.stream:
+        try:
+            stream(args)
+        except FileNotFoundError:
+            print(f"Arquivo {args.file} não encontrado.")
+            exit(1)
+        except Exception as e:
+            on_error(e, args.pm)
+    elif args.command == "run":
         try:
             with open(args.file, "r") as f:
                 source = f.read()
@@ -80,6 +304,9 @@ def main():
             print(f"Arquivo {args.file} não encontrado.")
             exit(1)
 
+        if args.clear_cache:
+            clear_cache()
+
         if args.show:
             line_len = 60
             head = f"=== {args.file} ="
@@ -90,18 +317,223 @@ def main():
             print_color("=" * line_len, "blue")
             print()
 
-        if not args.ast and not args.cst and not args.lex:
+        if args.watch:
+            watch(args)
+        elif not args.ast and not args.cst and not args.lex and not args.emit_py:
             try:
-                ast = parse(source) 
-                arnoldc_eval(ast, Ctx.from_dict({}))
+                ast = load_program(source, args.opt_level, use_cache=not args.no_cache)
+                if (size := memo_size(args)) is not None:
+                    enable_memo(ast, size)
+                if args.typecheck and not typecheck(ast):
+                    exit(1)
+                run(ast, args)
             except Exception as e:
                 on_error(e, args.pm)
 
         else:
             debug_source(source, args)
+    elif args.command == "batch":
+        exit(batch(args))
+    elif args.command == "bench":
+        from .bench import run_bench
+
+        exit(
+            run_bench(
+                args.paths,
+                args.engine,
+                args.opt_level,
+                args.warmup,
+                args.repeat,
+                baseline_path=args.baseline,
+                save_path=args.save,
+                tolerance=args.tolerance,
+            )
+        )
     else:
         parser.print_help()
         
+def run(ast, args):
+    """
+    Executa o programa, escrevendo a saída no destino escolhido na linha de
+    comando.
+    """
+    try:
+        if args.profile or args.flamegraph:
+            profile(ast, args)
+        elif args.engine == "tiered":
+            tiered(ast, args)
+        else:
+            run_program(ast, args)
+    finally:
+        if args.memo_stats:
+            print(memo_report(ast), file=sys.stderr)
+        if args.stats:
+            from .deadcode import dead_code_report
+
+            print(dead_code_report(ast), file=sys.stderr)
+
+
+def typecheck(ast) -> bool:
+    """
+    Mostra os erros de tipo do programa (opção `--typecheck`). Retorna
+    False se houver algum.
+    """
+    from .typecheck import check_types
+
+    errors = check_types(ast)
+    for error in errors:
+        print(f"Erro de tipo: {error}", file=sys.stderr)
+    return not errors
+
+
+def profile(ast, args):
+    from .profiler import Profiler
+
+    profiler = Profiler(ast)
+    args.engine = "tree"
+    try:
+        with profiler.instrument():
+            run_program(ast, args)
+    finally:
+        print(profiler.report(), file=sys.stderr)
+        if args.flamegraph:
+            profiler.write_collapsed(args.flamegraph)
+
+
+def tiered(ast, args):
+    from .tiers import TierManager, use_tiers
+
+    manager = TierManager(args.tier_calls, args.tier_loops)
+    try:
+        with use_tiers(manager):
+            run_program(ast, args)
+    finally:
+        if args.tier_stats:
+            print(manager.report(), file=sys.stderr)
+
+
+def watch(args):
+    """
+    Executa o programa sempre que o arquivo muda (opção `--watch`), até o
+    usuário interromper com Ctrl+C. Só os trechos alterados passam pelo
+    parser (veja `incremental.py`).
+    """
+    import copy
+    import os
+    import time
+
+    from .incremental import IncrementalParser
+
+    document = IncrementalParser()
+    last_change = None
+    try:
+        while True:
+            try:
+                change = os.stat(args.file).st_mtime_ns
+            except FileNotFoundError:
+                change = None
+            if change is not None and change != last_change:
+                last_change = change
+                with open(args.file, encoding="utf-8") as f:
+                    source = f.read()
+                try:
+                    ast = document.update(source)
+                except Exception as e:
+                    print(f"Erro: {e}", file=sys.stderr)
+                else:
+                    size = memo_size(args)
+                    if args.opt_level or size is not None:
+                        # O otimizador altera a árvore, que é reaproveitada
+                        # na próxima execução.
+                        ast = optimize(copy.deepcopy(ast), args.opt_level)
+                    if size is not None:
+                        enable_memo(ast, size)
+                    try:
+                        run(ast, args)
+                    except Exception:
+                        pass  # arnoldc_eval já mostrou o erro
+                print(f"=== Aguardando alterações em {args.file} (Ctrl+C para sair)", file=sys.stderr)
+            time.sleep(WATCH_INTERVAL)
+    except KeyboardInterrupt:
+        pass
+
+
+def memo_size(args) -> Optional[int]:
+    """
+    Tamanho do cache de memoização pedido com `--memo` ou `--memo-size`
+    (None se a memoização não foi pedida).
+    """
+    if args.memo_size is not None:
+        return args.memo_size
+    return DEFAULT_MEMO_SIZE if args.memo else None
+
+
+def check_memo_args(parser: argparse.ArgumentParser, args) -> None:
+    """
+    Recusa tamanhos de cache inválidos e `--memo` em engines sem suporte a
+    memoização.
+    """
+    if args.memo_size is not None and args.memo_size < 1:
+        parser.error("--memo-size precisa ser pelo menos 1.")
+    if memo_size(args) is not None and args.engine in NO_MEMO_ENGINES:
+        parser.error(f"a engine {args.engine} não suporta memoização (--memo).")
+
+
+def run_program(ast, args):
+    with output_sink(args) as sink:
+        arnoldc_eval(ast, Ctx.from_dict({}), skip_validation=True, engine=args.engine, output=sink)
+
+
+def stream(args):
+    """
+    Executa o arquivo em fluxo, sem carregá-lo inteiro (opção `--stream`).
+    """
+    from .streaming import eval_stream
+
+    with output_sink(args) as sink:
+        eval_stream(args.file, Ctx.from_dict({}), args.opt_level, output=sink)
+
+
+@contextmanager
+def output_sink(args) -> Iterator[Sink]:
+    """
+    Destino da saída escolhido na linha de comando.
+    """
+    if args.output is None:
+        yield StdoutSink() if args.flush is None else BufferedSink(sys.stdout, args.flush)
+        return
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        yield BufferedSink(f, args.flush or "size")
+
+
+def batch(args) -> int:
+    """
+    Executa o comando `batch` e retorna o código de saída: 1 se algum
+    programa terminou com erro.
+    """
+    from .batch import collect_files, run_batch, write_report
+
+    files = collect_files(args.patterns, args.manifest)
+    if not files:
+        print("Nenhum arquivo encontrado.", file=sys.stderr)
+        return 1
+
+    results = run_batch(files, args.jobs, args.engine, args.opt_level, use_cache=not args.no_cache)
+    if args.report == "-":
+        summary = write_report(results, sys.stdout)
+    else:
+        with open(args.report, "w", encoding="utf-8") as f:
+            summary = write_report(results, f)
+
+    print(
+        f"{summary['files']} programas: {summary['ok']} ok, {summary['errors']} com erro "
+        f"({summary['total_ms']:.1f} ms no total)",
+        file=sys.stderr,
+    )
+    return 1 if summary["errors"] else 0
+
+
 def print_color(str: str, color: str):
     try:
         from rich import print
@@ -123,7 +555,7 @@ def debug_source(source: str, args):
     Mostra informações de depuração sobre o código ArnoldC passado como argumento.
     """
     if args.ast:
-        ast = parse(source)
+        ast = optimize(parse(source), args.opt_level)
         for node in ast.lark_descendents():
             if isinstance(node, Token):
                 descr = repr(node)
@@ -143,4 +575,7 @@ def debug_source(source: str, args):
 
     if args.lex:
         for token in lex(source):
-            print(f"{token.type}: {token.value}")
\ No newline at end of file
+            print(f"{token.type}: {token.value}")
+
+    if args.emit_py:
+        print(compile_to_python(optimize(parse(source), args.opt_level)))
\ No newline at end of file
@@ -0,0 +1,556 @@
+"""
+Compilação da árvore sintática para closures Python.
+
+Cada nó (`Stmt` ou `Expr`) é convertido uma única vez em uma função
+especializada que recebe o `Ctx` e executa o nó. Todo o trabalho que o
+interpretador de árvore refaz a cada execução (`isinstance` para escolher a
+operação, leitura de atributos do nó, chamadas a `eval` de literais) é feito
+em tempo de compilação. Por exemplo, um `AssignmentBlock` com apenas somas de
+literais vira uma única closure que soma uma constante pré-calculada.
+
+Diferente da VM e da engine "py", as closures usam o próprio `Ctx` como
+ambiente de execução: cada bloco empilha um escopo, variáveis são definidas
+com `var_def` e métodos são valores guardados no contexto. O comportamento
+é o mesmo do interpretador de árvore, inclusive para ambientes com funções
+Python e para o estado final do contexto.
+"""
+
+from typing import Any, Callable, Optional
+
+from .arnoldc_ast import (
+    AddOp,
+    AssignmentBlock,
+    Bool,
+    CallMethod,
+    Completion,
+    Expr,
+    If,
+    Increment,
+    Literal,
+    Method,
+    Print,
+    Program,
+    Return,
+    StatementBlock,
+    Stmt,
+    SubOp,
+    TailCall,
+    Var,
+    VarDef,
+    While,
+    is_arnoldc_true,
+    raise_return_outside_method,
+)
+from .ctx import Ctx
+from .errors import ArnoldCError, ForceReturn, SemanticError
+from .node import Node
+from .operations import OPERATIONS
+from .output import emit
+
+# Closure que avalia um nó no contexto dado. Closures de comandos retornam um
+# `Completion` quando executam 'I'LL BE BACK' e None nos demais casos.
+Thunk = Callable[[Ctx], Any]
+
+# Closure que aplica uma operação de um bloco de atribuição: recebe o valor
+# atual e o contexto e retorna o novo valor.
+Step = Callable[[Any, Ctx], Any]
+
+
+#
+# ACESSO A VARIÁVEIS
+#
+
+
+def load_var(name: str) -> Thunk:
+    """
+    Equivalente a `ctx[name]`, mas percorrendo os escopos em um laço.
+    """
+
+    def load(ctx: Ctx) -> Any:
+        while ctx is not None:
+            scope = ctx.scope
+            if name in scope:
+                return scope[name]
+            ctx = ctx.parent  # type: ignore[assignment]
+        raise KeyError(f"Variable '{name}' not found in context.")
+
+    return load
+
+
+def store_var(name: str) -> Callable[[Ctx, Any], None]:
+    """
+    Equivalente a `ctx.assign(name, value)`.
+    """
+
+    def store(ctx: Ctx, value: Any) -> None:
+        while ctx is not None:
+            scope = ctx.scope
+            if name in scope:
+                scope[name] = value
+                return
+            ctx = ctx.parent  # type: ignore[assignment]
+        raise NameError(f"Variável '{name}' não definida.")
+
+    return store
+
+
+class ClosureCompiler:
+    """
+    Converte nós da árvore sintática em closures.
+
+    Os métodos `stmt_<Classe>` e `expr_<Classe>` retornam a closure de cada
+    tipo de nó.
+    """
+
+    def compile_program(self, program: Program) -> Thunk:
+        return self.sequence(program.stmts)
+
+    #
+    # Expressões
+    #
+
+    def expr(self, node: Expr) -> Thunk:
+        method = getattr(self, f"expr_{type(node).__name__}", None)
+        if method is None:
+            raise NotImplementedError(f"Expressão não suportada: {type(node).__name__}")
+        return method(node)
+
+    def expr_Var(self, node: Var) -> Thunk:
+        return load_var(node.name)
+
+    def expr_Literal(self, node: Literal) -> Thunk:
+        value = node.value
+        return lambda ctx: value
+
+    expr_Bool = expr_Literal
+
+    def constant(self, node: Expr) -> tuple[bool, Any]:
+        """
+        Retorna (True, valor) se a expressão for um literal.
+        """
+        if isinstance(node, (Literal, Bool)):
+            return True, node.value
+        return False, None
+
+    def truth(self, node: Expr) -> Callable[[Ctx], bool]:
+        """
+        Closure que calcula o valor de verdade (`is_arnoldc_true`) da
+        expressão.
+        """
+        is_const, value = self.constant(node)
+        if is_const:
+            result = is_arnoldc_true(value)
+            return lambda ctx: result
+
+        if isinstance(node, Var):
+            name = node.name
+
+            # Busca da variável feita aqui mesmo, sem chamar `load_var`: a
+            # condição de laços é o caminho mais executado dos programas.
+            def var_truth(ctx: Ctx) -> bool:
+                while ctx is not None:
+                    scope = ctx.scope
+                    if name in scope:
+                        value = scope[name]
+                        if value.__class__ is int:
+                            return value != 0
+                        return is_arnoldc_true(value)
+                    ctx = ctx.parent  # type: ignore[assignment]
+                raise KeyError(f"Variable '{name}' not found in context.")
+
+            return var_truth
+
+        get = self.expr(node)
+
+        def truth(ctx: Ctx) -> bool:
+            value = get(ctx)
+            if value.__class__ is int:
+                return value != 0
+            return is_arnoldc_true(value)
+
+        return truth
+
+    #
+    # Comandos
+    #
+
+    def stmt(self, node: Stmt) -> Thunk:
+        method = getattr(self, f"stmt_{type(node).__name__}", None)
+        if method is None:
+            raise NotImplementedError(f"Comando não suportado: {type(node).__name__}")
+        return method(node)
+
+    def may_return(self, node: Node) -> bool:
+        """
+        Verifica se o comando pode executar um 'I'LL BE BACK' (fora de
+        métodos aninhados).
+        """
+        if isinstance(node, Return):
+            return True
+        if isinstance(node, Method):
+            return False
+        return any(self.may_return(child) for child in node.children())
+
+    def sequence(self, stmts: list[Stmt]) -> Thunk:
+        """
+        Closure que executa os comandos em ordem no mesmo contexto.
+
+        Só é preciso verificar o resultado de cada comando se algum deles
+        puder retornar do método.
+        """
+        compiled = tuple(self.stmt(stmt) for stmt in stmts)
+        if any(self.may_return(stmt) for stmt in stmts):
+
+            def run_checked(ctx: Ctx) -> Optional[Completion]:
+                for stmt in compiled:
+                    if (completion := stmt(ctx)) is not None:
+                        return completion
+                return None
+
+            return run_checked
+
+        match compiled:
+            case ():
+                return lambda ctx: None
+            case (only,):
+                return only
+            case (first, second):
+
+                def run_two(ctx: Ctx) -> None:
+                    first(ctx)
+                    second(ctx)
+
+                return run_two
+
+        def run_all(ctx: Ctx) -> None:
+            for stmt in compiled:
+                stmt(ctx)
+
+        return run_all
+
+    def stmt_StatementBlock(self, node: StatementBlock) -> Thunk:
+        body = self.sequence(node.stmts)
+
+        def block(ctx: Ctx) -> Optional[Completion]:
+            return body(ctx.push({}))
+
+        return block
+
+    def stmt_Print(self, node: Print) -> Thunk:
+        get = self.expr(node.target)
+        return lambda ctx: emit(get(ctx))
+
+    def stmt_VarDef(self, node: VarDef) -> Thunk:
+        name = node.name
+        get = self.expr(node.value)
+        return lambda ctx: ctx.var_def(name, get(ctx))
+
+    def stmt_AssignmentBlock(self, node: AssignmentBlock) -> Thunk:
+        if self.is_increment(node):
+            op_node = node.operations[0]
+            return self.increment(node.target_var, type(op_node), op_node.operand.value)
+
+        store = store_var(node.target_var)
+        initial = self.expr(node.initial_value_expr)
+        steps = self.steps(node.operations)
+
+        match steps:
+            case ():
+
+                def assign(ctx: Ctx) -> None:
+                    store(ctx, initial(ctx))
+
+            case (step,):
+
+                def assign(ctx: Ctx) -> None:
+                    store(ctx, step(initial(ctx), ctx))
+
+            case _:
+
+                def assign(ctx: Ctx) -> None:
+                    value = initial(ctx)
+                    for step in steps:
+                        value = step(value, ctx)
+                    store(ctx, value)
+
+        return assign
+
+    def is_increment(self, node: AssignmentBlock) -> bool:
+        """
+        Verifica se o bloco é da forma `x = x + c` (ou `x - c`), com `c` um
+        literal inteiro.
+        """
+        if len(node.operations) != 1:
+            return False
+        op_node = node.operations[0]
+        initial = node.initial_value_expr
+        return (
+            isinstance(initial, Var)
+            and initial.name == node.target_var
+            and type(op_node) in (AddOp, SubOp)
+            and isinstance(op_node.operand, Literal)
+            and type(op_node.operand.value) is int
+        )
+
+    def stmt_Increment(self, node: Increment) -> Thunk:
+        if node.delta < 0:
+            return self.increment(node.target_var, SubOp, -node.delta)
+        return self.increment(node.target_var, AddOp, node.delta)
+
+    def increment(self, name: str, op_type: type, delta: int) -> Thunk:
+        """
+        Closure para `x = x + c`: como a variável lida e a atribuída são a
+        mesma, o escopo é encontrado uma única vez e atualizado no lugar.
+        """
+        if op_type is SubOp:
+
+            def decrement(ctx: Ctx) -> None:
+                while ctx is not None:
+                    scope = ctx.scope
+                    if name in scope:
+                        scope[name] = scope[name] - delta
+                        return
+                    ctx = ctx.parent  # type: ignore[assignment]
+                raise KeyError(f"Variable '{name}' not found in context.")
+
+            return decrement
+
+        def increment(ctx: Ctx) -> None:
+            while ctx is not None:
+                scope = ctx.scope
+                if name in scope:
+                    scope[name] = scope[name] + delta
+                    return
+                ctx = ctx.parent  # type: ignore[assignment]
+            raise KeyError(f"Variable '{name}' not found in context.")
+
+        return increment
+
+    def steps(self, operations: list[Expr]) -> tuple[Step, ...]:
+        """
+        Converte as operações de um bloco de atribuição em closures.
+
+        Sequências de somas (ou de subtrações) de literais inteiros são
+        agrupadas em uma única operação com a constante já calculada.
+        """
+        result: list[Step] = []
+        i = 0
+        while i < len(operations):
+            op_node = operations[i]
+            op_type = type(op_node)
+            if op_type in (AddOp, SubOp):
+                total = 0
+                j = i
+                while (
+                    j < len(operations)
+                    and type(operations[j]) is op_type
+                    and isinstance(operations[j].operand, Literal)
+                    and type(operations[j].operand.value) is int
+                ):
+                    total += operations[j].operand.value
+                    j += 1
+                if j > i:
+                    result.append(self.add_const(op_type, total))
+                    i = j
+                    continue
+            result.append(self.step(op_node))
+            i += 1
+        return tuple(result)
+
+    def add_const(self, op_type: type, value: int) -> Step:
+        if op_type is AddOp:
+            return lambda acc, ctx: acc + value
+        return lambda acc, ctx: acc - value
+
+    def step(self, op_node: Expr) -> Step:
+        op_type = type(op_node)
+        is_const, value = self.constant(op_node.operand)
+        get = self.expr(op_node.operand)
+
+        if op_type is AddOp:
+            if is_const:
+                return lambda acc, ctx: acc + value
+            return lambda acc, ctx: acc + get(ctx)
+        if op_type is SubOp:
+            if is_const:
+                return lambda acc, ctx: acc - value
+            return lambda acc, ctx: acc - get(ctx)
+
+        try:
+            func = OPERATIONS[op_type]
+        except KeyError:
+            raise NotImplementedError(f"Operação ArnoldC não implementada: {op_type.__name__}") from None
+        if is_const:
+            return lambda acc, ctx: func(acc, value)
+        return lambda acc, ctx: func(acc, get(ctx))
+
+    def stmt_If(self, node: If) -> Thunk:
+        cond = self.truth(node.cond)
+        then_branch = self.stmt(node.then_branch)
+        if node.else_branch is None:
+
+            def if_then(ctx: Ctx) -> Optional[Completion]:
+                if cond(ctx):
+                    return then_branch(ctx)
+                return None
+
+            return if_then
+
+        else_branch = self.stmt(node.else_branch)
+
+        def if_else(ctx: Ctx) -> Optional[Completion]:
+            if cond(ctx):
+                return then_branch(ctx)
+            return else_branch(ctx)
+
+        return if_else
+
+    def stmt_While(self, node: While) -> Thunk:
+        cond = self.truth(node.cond)
+        body = self.stmt(node.body)
+
+        if self.may_return(node.body):
+
+            def checked_loop(ctx: Ctx) -> Optional[Completion]:
+                while cond(ctx):
+                    if (completion := body(ctx)) is not None:
+                        return completion
+                return None
+
+            return checked_loop
+
+        def loop(ctx: Ctx) -> None:
+            while cond(ctx):
+                body(ctx)
+
+        return loop
+
+    def stmt_Method(self, node: Method) -> Thunk:
+        name = node.name
+        params = tuple(node.params)
+        nparams = len(params)
+        returns_value = node.returns_value
+        body = self.stmt(node.body)
+        # Só métodos com chamadas em cauda (veja `stmt_CallMethod`) precisam
+        # do laço que reexecuta o corpo.
+        has_tail_calls = any(
+            isinstance(child, CallMethod) and child.tail is node for child in node.body.descendants()
+        )
+
+        def run_body(ctx: Ctx, args_values: tuple) -> Optional[Completion]:
+            if len(args_values) != nparams:
+                raise TypeError(
+                    f"Número incorreto de argumentos para o método '{name}'. "
+                    f"Esperado {nparams}, recebido {len(args_values)}"
+                )
+
+            method_ctx = ctx.push({})
+            for param_name, arg_value in zip(params, args_values):
+                method_ctx.var_def(param_name, arg_value)
+            return body(method_ctx)
+
+        def result(completion: Optional[Completion]) -> Any:
+            if completion is None:
+                if returns_value:
+                    raise SemanticError(f"Método '{name}' que retorna valor não tem 'I'LL BE BACK' explícito.")
+                return None
+            if not returns_value and completion.value is not None:
+                raise SemanticError(f"Método void '{name}' não pode retornar um valor.")
+            return completion.value
+
+        def define(ctx: Ctx) -> None:
+            if not has_tail_calls:
+
+                def arnoldc_method_callable(*args_values):
+                    return result(run_body(ctx, args_values))
+
+            else:
+
+                def arnoldc_method_callable(*args_values):
+                    # Chamadas em cauda reexecutam o corpo neste laço (veja
+                    # `Method.eval`).
+                    call_name = None
+                    while True:
+                        try:
+                            completion = run_body(ctx, args_values)
+                        except TypeError as e:
+                            if call_name is None:
+                                raise
+                            raise ArnoldCError(f"Erro na chamada do método '{call_name}': {e}")
+                        if completion.__class__ is not TailCall:
+                            return result(completion)
+                        if completion.callee is not registered:
+                            return completion.call()
+                        args_values = completion.args
+                        call_name = completion.name
+
+            arnoldc_method_callable.method = node
+            registered = arnoldc_method_callable
+            if node.memo_size:
+                from .memo import memoize
+                registered = memoize(node, arnoldc_method_callable)
+            ctx.var_def(name, registered)
+
+        return define
+
+    def stmt_CallMethod(self, node: CallMethod) -> Thunk:
+        method_name = node.method_name
+        get_method = load_var(method_name)
+        store = store_var(node.result_var)
+        arguments = tuple(self.expr(arg) for arg in node.arguments)
+        tail = node.tail
+
+        def call(ctx: Ctx) -> None:
+            method_callable = get_method(ctx)
+            args_values = [arg(ctx) for arg in arguments]
+
+            if not callable(method_callable):
+                raise ArnoldCError(f"'{method_name}' não é um método.")
+            try:
+                result = method_callable(*args_values)
+                if result is not None:
+                    store(ctx, result)
+            except TypeError as e:
+                raise ArnoldCError(f"Erro na chamada do método '{method_name}': {e}")
+            except ForceReturn as e:
+                # Funções Python do ambiente ainda podem retornar desta forma.
+                store(ctx, e.value)
+
+        if tail is None:
+            return call
+
+        def tail_call(ctx: Ctx) -> Optional[Completion]:
+            method_callable = get_method(ctx)
+            if getattr(method_callable, "method", None) is not tail:
+                return call(ctx)
+            return TailCall(method_callable, [arg(ctx) for arg in arguments], method_name)
+
+        return tail_call
+
+    def stmt_Return(self, node: Return) -> Thunk:
+        if node.value is None:
+            return lambda ctx: Completion(None)
+
+        get = self.expr(node.value)
+        return lambda ctx: Completion(get(ctx))
+
+
+def compile_closures(program: Program) -> Thunk:
+    """
+    Converte o programa em uma closure que o executa em um `Ctx`.
+
+    O programa é resolvido antes (veja `resolver.py`) apenas para marcar as
+    chamadas recursivas em posição de cauda.
+    """
+    from .resolver import resolve
+
+    resolve(program)
+    return ClosureCompiler().compile_program(program)
+
+
+def run_program(program: Program, ctx: Ctx) -> None:
+    """
+    Compila o programa para closures e o executa no contexto dado.
+    """
+    if compile_closures(program)(ctx) is not None:
+        raise_return_outside_method()
@@ -11,6 +11,23 @@ if TYPE_CHECKING:
 T = TypeVar("T")
 ScopeDict = dict[str, "Value"]
 
+# Endereços especiais de variáveis (veja `resolver.py`). Endereços com
+# profundidade >= 0 apontam para uma posição de um `Frame`.
+GLOBAL = -1  # variável do escopo global: busca direta no `Ctx` global
+DYNAMIC = -2  # endereço desconhecido: busca pelo nome em toda a cadeia
+
+
+class _Unset:
+    """
+    Marca posições de um `Frame` cuja variável ainda não foi declarada.
+    """
+
+    def __repr__(self) -> str:
+        return "<unset>"
+
+
+UNSET: "Value" = _Unset()  # type: ignore[assignment]
+
 
 @dataclass
 class Ctx:
@@ -129,6 +146,136 @@ class Ctx:
         
         raise NameError(f"Variável '{name}' não definida.")
 
+    @property
+    def globals(self) -> "Ctx":
+        """
+        Escopo global dos frames criados a partir deste contexto.
+        """
+        return self
+
+    def load(self, name: str, depth: int, slot: int) -> "Value":
+        """
+        Lê uma variável a partir do endereço calculado pelo resolvedor.
+
+        Em um `Ctx` comum só existem variáveis globais, que são buscadas
+        pelo nome.
+        """
+        return self[name]
+
+    def store(self, name: str, depth: int, slot: int, value: "Value") -> None:
+        """
+        Atribui uma variável a partir do endereço calculado pelo resolvedor.
+        """
+        self.assign(name, value)
+
+
+class Frame(Ctx):
+    """
+    Escopo com as variáveis guardadas em um vetor.
+
+    O resolvedor (`resolver.py`) atribui a cada variável local um endereço
+    (profundidade, posição): a profundidade é o número de escopos entre o uso
+    e a declaração e a posição é o índice no vetor `slots` daquele escopo.
+    Assim, o acesso a variáveis não precisa fazer buscas em dicionários ao
+    longo da cadeia de escopos.
+
+    `index` mapeia nomes para posições e é compartilhado por todos os frames
+    de um mesmo bloco. Ele permite que o frame continue se comportando como
+    um `Ctx` (busca por nome, `pretty()`, `to_dict()`, etc.), o que é usado
+    para depuração e em mensagens de erro.
+    """
+
+    __slots__ = ("index", "slots", "parent", "globals")
+
+    def __init__(self, index: dict[str, int], slots: list["Value"], parent: Ctx):
+        self.index = index
+        self.slots = slots
+        self.parent = parent
+        self.globals = parent.globals
+
+    @property
+    def scope(self) -> ScopeDict:  # type: ignore[override]
+        """
+        Cópia das variáveis já declaradas neste escopo.
+        """
+        slots = self.slots
+        return {name: slots[i] for name, i in self.index.items() if slots[i] is not UNSET}
+
+    def load(self, name: str, depth: int, slot: int) -> "Value":
+        if depth >= 0:
+            frame: Ctx = self
+            while depth:
+                frame = frame.parent  # type: ignore[assignment]
+                depth -= 1
+            return frame.slots[slot]  # type: ignore[attr-defined]
+        if depth == GLOBAL:
+            scope = self.globals.scope
+            if name in scope:
+                return scope[name]
+            return self.globals[name]
+        return self[name]
+
+    def store(self, name: str, depth: int, slot: int, value: "Value") -> None:
+        if depth >= 0:
+            frame: Ctx = self
+            while depth:
+                frame = frame.parent  # type: ignore[assignment]
+                depth -= 1
+            frame.slots[slot] = value  # type: ignore[attr-defined]
+        elif depth == GLOBAL:
+            self.globals.assign(name, value)
+        else:
+            self.assign(name, value)
+
+    def _find(self, name: str) -> tuple[Optional["Frame"], int]:
+        """
+        Procura pelo nome nos frames da cadeia. Retorna (None, -1) se a
+        variável não estiver declarada em nenhum frame.
+        """
+        ctx: Optional[Ctx] = self
+        while isinstance(ctx, Frame):
+            i = ctx.index.get(name)
+            if i is not None and ctx.slots[i] is not UNSET:
+                return ctx, i
+            ctx = ctx.parent
+        return None, -1
+
+    def __getitem__(self, name: str) -> "Value":
+        frame, i = self._find(name)
+        if frame is not None:
+            return frame.slots[i]
+        return self.globals[name]
+
+    def __setitem__(self, name: str, value: "Value") -> None:
+        frame, i = self._find(name)
+        if frame is not None:
+            frame.slots[i] = value
+        else:
+            self.globals[name] = value
+
+    def __contains__(self, name: str) -> bool:
+        frame, _ = self._find(name)
+        return frame is not None or name in self.globals
+
+    def assign(self, name, value):
+        frame, i = self._find(name)
+        if frame is not None:
+            frame.slots[i] = value
+        else:
+            self.globals.assign(name, value)
+
+    def var_def(self, name: str, value: "Value") -> None:
+        i = self.index.get(name)
+        if i is None:
+            # Nome que não foi previsto pelo resolvedor: o índice é copiado
+            # para não alterar o dos outros frames do mesmo bloco.
+            self.index = {**self.index, name: len(self.slots)}
+            self.slots.append(value)
+        elif self.slots[i] is not UNSET:
+            raise NameError(f"Variável '{name}' já foi declarada neste escopo.")
+        else:
+            self.slots[i] = value
+
 
 def pretty_scope(env: ScopeDict, index: int) -> str:
     """
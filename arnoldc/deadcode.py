@@ -0,0 +1,450 @@
+"""
+Eliminação de código morto.
+
+Roda no fim do otimizador (`-O1` e `-O2`) e remove do programa:
+
+* os ramos de 'BECAUSE I'M GOING TO SAY PLEASE' que nunca executam, quando a
+  condição é constante (ex.: `@I LIED`), e os laços 'STICK AROUND' com
+  condição constante falsa;
+* as variáveis declaradas com 'HEY CHRISTMAS TREE' que nunca são lidas;
+* os métodos que nunca são chamados com 'GET YOUR ASS TO MARS' nem usados
+  como valor.
+
+A análise segue as regras de escopo do `resolver.py` e só considera o código
+alcançável: um método vivo é aquele chamado pelo programa principal ou por
+outro método vivo. Um nome buscado dinamicamente (endereço `DYNAMIC`) mantém
+todas as declarações com esse nome.
+
+Os efeitos dos comandos removidos são preservados:
+
+* uma declaração só é removida se o valor inicial for um literal;
+* as atribuições a uma variável removida também são removidas, o que só é
+  feito quando nenhuma delas pode falhar: a variável guarda sempre um
+  inteiro e as atribuições só usam literais e a própria variável, sem
+  divisões por zero. Caso contrário, a variável é mantida;
+* declarações com o mesmo nome de outra no mesmo bloco são mantidas (o erro
+  de redeclaração continua acontecendo).
+
+Variáveis e métodos do escopo global só são removidos no `-O2`: no `-O1` o
+ambiente final do programa (`Ctx`) continua com todos os nomes declarados.
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from .arnoldc_ast import (
+    AssignmentBlock,
+    Bool,
+    CallMethod,
+    DivOp,
+    Expr,
+    If,
+    Increment,
+    Literal,
+    Method,
+    Program,
+    StatementBlock,
+    Stmt,
+    Var,
+    VarDef,
+    While,
+    is_arnoldc_true,
+)
+from .node import Node
+
+
+@dataclass
+class DeadCodeStats:
+    """
+    Quantidade de comandos e nós removidos.
+    """
+
+    variables: int = 0
+    methods: int = 0
+    assignments: int = 0
+    branches: int = 0
+    nodes: int = 0
+
+    def remove(self, node: Stmt) -> None:
+        self.nodes += sum(1 for _ in node.descendants())
+
+
+@dataclass(eq=False)
+class Declaration:
+    """
+    Declarações de uma variável ou método. No escopo global, todas as
+    declarações com o mesmo nome são agrupadas, pois são acessadas pelo nome.
+    `pinned` indica uma declaração que não pode ser removida.
+    """
+
+    name: str
+    nodes: list[VarDef | Method] = field(default_factory=list)
+    is_global: bool = False
+    pinned: bool = False
+    # Atribuições que só usam literais e a própria variável, com o dono
+    # (método ou None) de cada uma.
+    writes: list[tuple[Optional["Declaration"], Stmt]] = field(default_factory=list)
+    live: bool = False
+
+    def int_only(self) -> bool:
+        """
+        Verifica se a variável sempre guarda um inteiro (ou booleano).
+        """
+        return bool(self.nodes) and all(
+            isinstance(node, VarDef) and int_constant(node.value) is not None for node in self.nodes
+        )
+
+
+# Parâmetro de método: nunca é removido.
+PARAM = Declaration("")
+
+
+@dataclass
+class Scope:
+    """
+    Escopo em tempo de compilação, com as mesmas regras do `resolver.Scope`.
+    """
+
+    declared: dict[str, Declaration] = field(default_factory=dict)
+    pending: set[str] = field(default_factory=set)
+    method: bool = False
+
+
+def constant(node: Expr) -> Optional[Literal | Bool]:
+    return node if type(node) in (Literal, Bool) else None
+
+
+def int_constant(node: Expr) -> Optional[int]:
+    """
+    Valor da expressão se ela for um literal inteiro ou booleano.
+    """
+    if type(node) in (Literal, Bool) and isinstance(node.value, int):
+        return node.value
+    return None
+
+
+def has_declarations(block: StatementBlock) -> bool:
+    """
+    Verifica se o bloco é um escopo próprio (declara variáveis ou métodos).
+    """
+    return any(type(stmt) in (VarDef, Method) for stmt in block.stmts)
+
+
+def inner_blocks(stmt: Stmt) -> tuple[StatementBlock, ...]:
+    """
+    Blocos de comandos dentro do comando. As classes são comparadas
+    diretamente, pois `isinstance` com as classes abstratas dos nós é lento.
+    """
+    cls = type(stmt)
+    if cls is If:
+        if stmt.else_branch is None:
+            return (stmt.then_branch,)
+        return (stmt.then_branch, stmt.else_branch)
+    if cls is While or cls is Method:
+        return (stmt.body,)
+    return ()
+
+
+#
+# RAMOS CONSTANTES
+#
+
+
+def prune_branches(stmts: list[Stmt], stats: DeadCodeStats) -> list[Stmt]:
+    """
+    Remove os ramos que nunca executam dos comandos (e dos blocos dentro
+    deles).
+    """
+    result: list[Stmt] = []
+    for stmt in stmts:
+        cls = type(stmt)
+        cond = constant(stmt.cond) if cls is If or cls is While else None
+        if cond is not None and cls is If:
+            taken, skipped = stmt.then_branch, stmt.else_branch
+            if not is_arnoldc_true(cond.value):
+                taken, skipped = skipped, taken
+            stats.branches += 1
+            stats.nodes += 2  # O próprio 'If' e a condição.
+            if skipped is not None:
+                stats.remove(skipped)
+            if taken is None:
+                continue
+            taken.stmts = prune_branches(taken.stmts, stats)
+            if has_declarations(taken):
+                # O bloco continua sendo um escopo próprio.
+                result.append(taken)
+            else:
+                stats.nodes += 1
+                result.extend(taken.stmts)
+            continue
+        if cond is not None and not is_arnoldc_true(cond.value):
+            stats.branches += 1
+            stats.remove(stmt)
+            continue
+        if cls is StatementBlock:
+            stmt.stmts = prune_branches(stmt.stmts, stats)
+        for block in inner_blocks(stmt):
+            block.stmts = prune_branches(block.stmts, stats)
+        result.append(stmt)
+    return result
+
+
+#
+# VARIÁVEIS E MÉTODOS NÃO USADOS
+#
+
+
+class Liveness:
+    """
+    Percorre o programa associando cada uso de um nome à sua declaração e
+    registrando os usos feitos por cada método (ou pelo programa principal,
+    com dono None).
+    """
+
+    def __init__(self):
+        self.scopes: list[Optional[Scope]] = []
+        self.owners: list[Optional[Declaration]] = [None]
+        self.globals: dict[str, Declaration] = {}
+        self.declarations: list[Declaration] = []
+        # Declaração de cada nó removível (declarações e atribuições),
+        # indexada pelo `id` do nó.
+        self.removable: dict[int, Declaration] = {}
+        self.uses: dict[Optional[Declaration], list[Declaration]] = {}
+        self.dynamic: dict[Optional[Declaration], set[str]] = {}
+        self._dispatch: dict[type, Callable[[Node], None]] = {}
+
+    @property
+    def owner(self) -> Optional[Declaration]:
+        return self.owners[-1]
+
+    def visit(self, node: Node) -> None:
+        cls = type(node)
+        try:
+            handler = self._dispatch[cls]
+        except KeyError:
+            handler = getattr(self, f"visit_{cls.__name__}", self.generic_visit)
+            self._dispatch[cls] = handler
+        handler(node)
+
+    def generic_visit(self, node: Node) -> None:
+        for child in node.children():
+            self.visit(child)
+
+    #
+    # Escopos
+    #
+
+    def global_declaration(self, name: str) -> Declaration:
+        if name not in self.globals:
+            self.globals[name] = Declaration(name, is_global=True)
+            self.declarations.append(self.globals[name])
+        return self.globals[name]
+
+    def lookup(self, name: str) -> Optional[Declaration]:
+        """
+        Declaração acessada pelo nome, ou None se ele for buscado
+        dinamicamente.
+        """
+        in_method = False
+        for scope in reversed(self.scopes):
+            if scope is None:
+                break
+            if name in scope.declared:
+                return scope.declared[name]
+            if in_method and name in scope.pending:
+                return None
+            in_method = in_method or scope.method
+        return self.global_declaration(name)
+
+    def declare(self, node: VarDef | Method) -> Declaration:
+        scope = self.scopes[-1]
+        if scope is None:
+            declaration = self.global_declaration(node.name)
+        elif node.name in scope.declared:
+            # Redeclaração no mesmo bloco: o erro deve continuar acontecendo.
+            declaration = scope.declared[node.name]
+            declaration.pinned = True
+        else:
+            declaration = scope.declared[node.name] = Declaration(node.name)
+            self.declarations.append(declaration)
+        declaration.nodes.append(node)
+        self.removable[id(node)] = declaration
+        return declaration
+
+    def use(self, name: str) -> None:
+        declaration = self.lookup(name)
+        if declaration is None:
+            self.dynamic.setdefault(self.owner, set()).add(name)
+        elif declaration is not PARAM:
+            self.uses.setdefault(self.owner, []).append(declaration)
+
+    #
+    # Comandos
+    #
+
+    def visit_Program(self, node: Program) -> None:
+        self.scopes.append(None)
+        for stmt in node.stmts:
+            self.visit(stmt)
+        self.scopes.pop()
+
+    def visit_StatementBlock(self, node: StatementBlock) -> None:
+        pending = {stmt.name for stmt in node.stmts if type(stmt) in (VarDef, Method)}
+        if pending:
+            self.scopes.append(Scope(pending=pending))
+        for stmt in node.stmts:
+            self.visit(stmt)
+        if pending:
+            self.scopes.pop()
+
+    def visit_Var(self, node: Var) -> None:
+        self.use(node.name)
+
+    def visit_VarDef(self, node: VarDef) -> None:
+        # O valor inicial é avaliado antes da declaração.
+        self.visit(node.value)
+        declaration = self.declare(node)
+        if constant(node.value) is None:
+            declaration.pinned = True
+
+    def visit_Method(self, node: Method) -> None:
+        declaration = self.declare(node)
+        self.scopes.append(Scope({param: PARAM for param in node.params}, method=True))
+        self.owners.append(declaration)
+        self.visit(node.body)
+        self.owners.pop()
+        self.scopes.pop()
+
+    def visit_CallMethod(self, node: CallMethod) -> None:
+        self.use(node.method_name)
+        for arg in node.arguments:
+            self.visit(arg)
+        self.use(node.result_var)
+
+    def visit_AssignmentBlock(self, node: AssignmentBlock) -> None:
+        target = self.lookup(node.target_var)
+        if target is not None and target is not PARAM and self.is_simple(node, target):
+            target.writes.append((self.owner, node))
+            self.removable[id(node)] = target
+            return
+        self.generic_visit(node)
+        self.use(node.target_var)
+
+    def visit_Increment(self, node: Increment) -> None:
+        target = self.lookup(node.target_var)
+        if target is not None and target is not PARAM:
+            target.writes.append((self.owner, node))
+            self.removable[id(node)] = target
+            return
+        self.use(node.target_var)
+
+    def is_simple(self, node: AssignmentBlock, target: Declaration) -> bool:
+        """
+        Verifica se o bloco só usa literais inteiros e a própria variável,
+        sem divisões que podem ser por zero.
+        """
+        exprs = [node.initial_value_expr, *(op_node.operand for op_node in node.operations)]
+        for expr in exprs:
+            if isinstance(expr, Var):
+                if self.lookup(expr.name) is not target:
+                    return False
+            elif int_constant(expr) is None:
+                return False
+        return not any(isinstance(op_node, DivOp) and not int_constant(op_node.operand) for op_node in node.operations)
+
+    #
+    # Marcação
+    #
+
+    def mark(self, keep_globals: bool) -> None:
+        """
+        Marca as declarações vivas, a partir do programa principal.
+        """
+        by_name: dict[str, list[Declaration]] = {}
+        for declaration in self.declarations:
+            by_name.setdefault(declaration.name, []).append(declaration)
+            # As atribuições a variáveis que podem não ser inteiras podem
+            # falhar: contam como usos.
+            if not declaration.int_only():
+                for owner, _ in declaration.writes:
+                    self.uses.setdefault(owner, []).append(declaration)
+
+        pending: list[Optional[Declaration]] = [None]
+        for declaration in self.declarations:
+            if declaration.pinned or (keep_globals and declaration.is_global):
+                declaration.live = True
+                pending.append(declaration)
+        while pending:
+            owner = pending.pop()
+            used = list(self.uses.get(owner, ()))
+            for name in self.dynamic.get(owner, ()):
+                used.extend(by_name.get(name, ()))
+            for declaration in used:
+                if not declaration.live:
+                    declaration.live = True
+                    pending.append(declaration)
+
+
+def sweep(stmts: list[Stmt], removable: dict[int, Declaration], stats: DeadCodeStats) -> list[Stmt]:
+    """
+    Remove as declarações mortas e as atribuições a elas.
+    """
+    result: list[Stmt] = []
+    for stmt in stmts:
+        declaration = removable.get(id(stmt))
+        if declaration is not None and not declaration.live:
+            cls = type(stmt)
+            if cls is VarDef:
+                stats.variables += 1
+            elif cls is Method:
+                stats.methods += 1
+            else:
+                stats.assignments += 1
+            stats.remove(stmt)
+            continue
+        if type(stmt) is StatementBlock:
+            stmt.stmts = sweep(stmt.stmts, removable, stats)
+            if not has_declarations(stmt):
+                # Sem declarações, o bloco não é mais um escopo próprio.
+                stats.nodes += 1
+                result.extend(stmt.stmts)
+                continue
+        for block in inner_blocks(stmt):
+            block.stmts = sweep(block.stmts, removable, stats)
+        result.append(stmt)
+    return result
+
+
+def eliminate_dead_code(program: Program, keep_globals: bool = True) -> DeadCodeStats:
+    """
+    Remove o código morto do programa (no lugar) e retorna as estatísticas,
+    que também ficam em `Program.dead_code`. Com `keep_globals`, variáveis
+    e métodos do escopo global são mantidos.
+    """
+    stats = DeadCodeStats()
+    program.stmts = prune_branches(program.stmts, stats)
+    liveness = Liveness()
+    liveness.visit(program)
+    liveness.mark(keep_globals)
+    program.stmts = sweep(program.stmts, liveness.removable, stats)
+    program.dead_code = stats
+    return stats
+
+
+def dead_code_report(program: Program) -> str:
+    """
+    Relatório em texto do código removido.
+    """
+    stats: Optional[DeadCodeStats] = program.dead_code
+    if stats is None:
+        return "A eliminação de código morto não foi executada (use -O1 ou -O2)."
+    lines = [f"{'removidos':<16} {'quantidade':>10}"]
+    for label, count in (
+        ("variáveis", stats.variables),
+        ("métodos", stats.methods),
+        ("atribuições", stats.assignments),
+        ("ramos", stats.branches),
+        ("nós", stats.nodes),
+    ):
+        lines.append(f"{label:<16} {count:>10}")
+    return "\n".join(lines)
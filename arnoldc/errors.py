@@ -2,7 +2,8 @@
 Execeções usadas no compilador ArnoldC.
 """
 
-from typing import TYPE_CHECKING
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Iterator
 
 
 if TYPE_CHECKING:
@@ -19,6 +20,20 @@ class SemanticError(Exception):
         self.token = token
 
 
+class TypeCheckError(SemanticError):
+    """
+    Erro de tipo encontrado antes da execução (veja `typecheck.py`).
+    """
+
+    def __init__(self, msg, token=None, line=None):
+        super().__init__(msg, token)
+        self.line = line
+
+    def __str__(self):
+        msg = super().__str__()
+        return msg if self.line is None else f"linha {self.line}: {msg}"
+
+
 class ForceReturn(Exception):
     """
     Exceção que serve para forçar uma função a retornar durante a avaliação
@@ -37,3 +52,26 @@ class ArnoldCError(Exception):
     def __init__(self, msg, token=None):
         super().__init__(msg)
         self.token = token
+
+
+@contextmanager
+def report_errors(env: Any) -> Iterator[None]:
+    """
+    Mostra a mensagem de erro e as variáveis do ambiente quando a execução
+    de um programa falha. A exceção é propagada.
+    """
+    from .output import flush_output
+
+    try:
+        yield
+    except (SemanticError, ArnoldCError) as e:
+        # A saída do programa deve aparecer antes da mensagem de erro.
+        flush_output()
+        print(f"Programa terminou com um erro: {e}")
+        print("Variáveis:", env)
+        raise
+    except Exception as e:
+        flush_output()
+        print(f"Programa terminou com um erro inesperado: {e}")
+        print("Variáveis:", env)
+        raise
@@ -0,0 +1,633 @@
+"""
+Representação plana da árvore sintática (engine "flat").
+
+Um `FlatProgram` guarda a árvore como uma estrutura de vetores: cada nó é
+um índice e os seus dados ficam em colunas paralelas de inteiros (`array`
+ou `memoryview`), em vez de um objeto Python por nó:
+
+* `kind`: o tipo do nó (`Kind`);
+* `a`, `b`, `c`: operandos, cujo significado depende do tipo (índices de
+  outros nós, índices da tabela de constantes ou flags; -1 quando ausente);
+* `first`, `count`: faixa do vetor `links` com a lista do nó (comandos de
+  um bloco, parâmetros de um método, operações de uma atribuição ou
+  argumentos de uma chamada);
+* `line`: linha do código fonte (0 quando desconhecida).
+
+Nomes de variáveis e métodos e valores literais ficam em uma única tabela
+compartilhada (`table`), sem repetições. Os nós são numerados em pré-ordem,
+com o `Program` no índice 0.
+
+    nó           a              b              c              lista
+    Var          nome           -              -              -
+    Literal      valor          -              -              -
+    Bool         valor          -              -              -
+    Print        alvo           -              -              -
+    Return       valor ou -1    -              -              -
+    VarDef       nome           valor          -              -
+    If           condição       então          senão ou -1    -
+    While        condição       corpo          -              -
+    StatementBlock -            -              -              comandos
+    Method       nome           corpo          retorna valor  parâmetros (nomes)
+    AssignmentBlock destino     valor inicial  -              operações
+    Increment    destino        delta          -              -
+    AddOp...     operando       -              -              -
+    CallMethod   resultado      método         método (cauda) argumentos
+    Program      -              -              -              comandos
+
+Em uma chamada recursiva em posição de cauda (veja `resolver.py`), `c` é
+o índice do método que a contém; nas demais chamadas, -1.
+
+O formato é barato de serializar (`to_bytes` apenas concatena as colunas)
+e de compartilhar entre processos: `from_bytes` aceita qualquer buffer
+(ex.: um `mmap` ou `multiprocessing.shared_memory`) e lê as colunas
+diretamente dele, sem copiá-las. Os inteiros usam a ordem de bytes nativa
+da máquina.
+
+O `FlatInterpreter` executa o programa diretamente sobre as colunas, com a
+mesma semântica (e o mesmo uso do `Ctx`) da engine "closure", inclusive a
+eliminação de chamadas em cauda. A memoização não é suportada.
+"""
+
+import json
+import struct
+from array import array
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any, Optional, Sequence
+
+from .arnoldc_ast import (
+    AddOp,
+    AndOp,
+    AssignmentBlock,
+    Bool,
+    CallMethod,
+    Completion,
+    DivOp,
+    EqOp,
+    GtOp,
+    If,
+    Increment,
+    Literal,
+    Method,
+    MulOp,
+    OrOp,
+    Print,
+    Program,
+    Return,
+    StatementBlock,
+    Stmt,
+    SubOp,
+    TailCall,
+    Value,
+    Var,
+    VarDef,
+    While,
+    is_arnoldc_true,
+    raise_return_outside_method,
+)
+from .ctx import Ctx
+from .errors import ArnoldCError, ForceReturn, SemanticError
+from .node import Node
+from .operations import div, eq, gt, logical_and, logical_or
+from .output import emit
+
+
+class Kind(IntEnum):
+    """
+    Tipos de nó da representação plana.
+    """
+
+    PROGRAM = 0
+    VAR = 1
+    LITERAL = 2
+    BOOL = 3
+    PRINT = 4
+    RETURN = 5
+    VAR_DEF = 6
+    IF = 7
+    WHILE = 8
+    BLOCK = 9
+    METHOD = 10
+    ASSIGN = 11
+    INCREMENT = 12
+    ADD = 13
+    SUB = 14
+    MUL = 15
+    DIV = 16
+    EQ = 17
+    GT = 18
+    OR = 19
+    AND = 20
+    CALL = 21
+
+
+KINDS: dict[type[Node], Kind] = {
+    Program: Kind.PROGRAM,
+    Var: Kind.VAR,
+    Literal: Kind.LITERAL,
+    Bool: Kind.BOOL,
+    Print: Kind.PRINT,
+    Return: Kind.RETURN,
+    VarDef: Kind.VAR_DEF,
+    If: Kind.IF,
+    While: Kind.WHILE,
+    StatementBlock: Kind.BLOCK,
+    Method: Kind.METHOD,
+    AssignmentBlock: Kind.ASSIGN,
+    Increment: Kind.INCREMENT,
+    AddOp: Kind.ADD,
+    SubOp: Kind.SUB,
+    MulOp: Kind.MUL,
+    DivOp: Kind.DIV,
+    EqOp: Kind.EQ,
+    GtOp: Kind.GT,
+    OrOp: Kind.OR,
+    AndOp: Kind.AND,
+    CallMethod: Kind.CALL,
+}
+
+OPERATIONS: dict[Kind, type[Node]] = {
+    kind: cls for cls, kind in KINDS.items() if Kind.ADD <= kind <= Kind.AND
+}
+
+# Cabeçalho de `to_bytes`: assinatura, número de nós, tamanho de `links` e
+# tamanho (em bytes) da tabela de constantes.
+MAGIC = b"AFL1"
+HEADER = struct.Struct("=4sIII")
+
+# Colunas de inteiros, na ordem em que são serializadas.
+INT_COLUMNS = ("a", "b", "c", "first", "count", "line")
+
+
+@dataclass
+class FlatProgram:
+    """
+    Programa ArnoldC na representação plana (veja o início do módulo).
+    """
+
+    kind: Sequence[int]
+    a: Sequence[int]
+    b: Sequence[int]
+    c: Sequence[int]
+    first: Sequence[int]
+    count: Sequence[int]
+    line: Sequence[int]
+    links: Sequence[int]
+    table: list[Value]
+
+    def __len__(self) -> int:
+        return len(self.kind)
+
+    def nbytes(self) -> int:
+        """
+        Tamanho das colunas e da lista de filhos, em bytes.
+        """
+        columns = [self.kind, self.links, *(getattr(self, name) for name in INT_COLUMNS)]
+        return sum(memoryview(column).nbytes for column in columns)  # type: ignore[arg-type]
+
+    def children(self, node: int) -> Sequence[int]:
+        """
+        Lista do nó (veja a tabela no início do módulo).
+        """
+        start = self.first[node]
+        return self.links[start : start + self.count[node]]
+
+    def to_bytes(self) -> bytes:
+        """
+        Serializa o programa: cabeçalho, colunas de inteiros, `links`,
+        `kind` e, por fim, a tabela de constantes em JSON.
+        """
+        table = json.dumps(self.table, ensure_ascii=False).encode("utf-8")
+        parts = [HEADER.pack(MAGIC, len(self), len(self.links), len(table))]
+        for name in INT_COLUMNS:
+            parts.append(memoryview(getattr(self, name)).tobytes())
+        parts.append(memoryview(self.links).tobytes())  # type: ignore[arg-type]
+        parts.append(memoryview(self.kind).tobytes())  # type: ignore[arg-type]
+        parts.append(table)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: Any) -> "FlatProgram":
+        """
+        Lê um programa serializado com `to_bytes`. As colunas são
+        `memoryview`s do próprio buffer (sem cópia); apenas a tabela de
+        constantes é decodificada.
+        """
+        buffer = memoryview(data).cast("B")
+        magic, nodes, nlinks, table_size = HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ValueError("Dados inválidos: não é um programa ArnoldC plano.")
+        offset = HEADER.size
+        itemsize = array("i").itemsize
+        columns = {}
+        for name in INT_COLUMNS:
+            columns[name] = buffer[offset : offset + nodes * itemsize].cast("i")
+            offset += nodes * itemsize
+        links = buffer[offset : offset + nlinks * itemsize].cast("i")
+        offset += nlinks * itemsize
+        kind = buffer[offset : offset + nodes]
+        offset += nodes
+        table = json.loads(bytes(buffer[offset : offset + table_size]).decode("utf-8"))
+        return cls(kind=kind, links=links, table=table, **columns)
+
+    def to_program(self) -> Program:
+        """
+        Reconstrói a árvore sintática.
+        """
+        program = self.node(0)
+        assert isinstance(program, Program)
+        return program
+
+    def node(self, i: int) -> Node:
+        """
+        Reconstrói o nó `i` e os seus descendentes.
+        """
+        kind, a, b, c = self.kind[i], self.a[i], self.b[i], self.c[i]
+        table = self.table
+        match kind:
+            case Kind.PROGRAM:
+                return Program([self.stmt(j) for j in self.children(i)])
+            case Kind.VAR:
+                return Var(table[a])  # type: ignore[arg-type]
+            case Kind.LITERAL:
+                return Literal(table[a])
+            case Kind.BOOL:
+                return Bool(table[a])  # type: ignore[arg-type]
+            case Kind.PRINT:
+                node: Node = Print(self.node(a))  # type: ignore[arg-type]
+            case Kind.RETURN:
+                node = Return(self.node(a) if a >= 0 else None)  # type: ignore[arg-type]
+            case Kind.VAR_DEF:
+                node = VarDef(table[a], self.node(b))  # type: ignore[arg-type]
+            case Kind.IF:
+                else_branch = self.node(c) if c >= 0 else None
+                node = If(self.node(a), self.node(b), else_branch)  # type: ignore[arg-type]
+            case Kind.WHILE:
+                node = While(self.node(a), self.node(b))  # type: ignore[arg-type]
+            case Kind.BLOCK:
+                node = StatementBlock([self.stmt(j) for j in self.children(i)])
+            case Kind.METHOD:
+                params = [table[j] for j in self.children(i)]
+                node = Method(table[a], params, self.node(b), bool(c))  # type: ignore[arg-type]
+            case Kind.ASSIGN:
+                operations = [self.node(j) for j in self.children(i)]
+                node = AssignmentBlock(table[a], self.node(b), operations)  # type: ignore[arg-type]
+            case Kind.INCREMENT:
+                node = Increment(table[a], table[b])  # type: ignore[arg-type]
+            case Kind.CALL:
+                arguments = [self.node(j) for j in self.children(i)]
+                node = CallMethod(table[a], table[b], arguments)  # type: ignore[arg-type]
+            case _ if kind in OPERATIONS:
+                return OPERATIONS[kind](self.node(a))  # type: ignore[call-arg]
+            case _:
+                raise ValueError(f"Tipo de nó desconhecido: {kind}")
+        if self.line[i]:
+            node.line = self.line[i]  # type: ignore[attr-defined]
+        return node
+
+    def stmt(self, i: int) -> Stmt:
+        node = self.node(i)
+        assert isinstance(node, Stmt)
+        return node
+
+
+class Flattener:
+    """
+    Converte a árvore sintática em um `FlatProgram`.
+    """
+
+    def __init__(self):
+        self.kind = array("B")
+        self.a = array("i")
+        self.b = array("i")
+        self.c = array("i")
+        self.first = array("i")
+        self.count = array("i")
+        self.line = array("i")
+        self.links = array("i")
+        self.table: list[Value] = []
+        self.constants: dict[tuple[type, Value], int] = {}
+        # Índice de cada `Method` (por `id`), para as chamadas em cauda.
+        self.methods: dict[int, int] = {}
+
+    def constant(self, value: Value) -> int:
+        """
+        Índice do valor na tabela (True e 1 são entradas diferentes).
+        """
+        key = (type(value), value)
+        if (index := self.constants.get(key)) is None:
+            index = self.constants[key] = len(self.table)
+            self.table.append(value)
+        return index
+
+    def new(self, node: Node) -> int:
+        """
+        Reserva o índice do nó (antes dos filhos, em pré-ordem).
+        """
+        try:
+            kind = KINDS[type(node)]
+        except KeyError:
+            raise NotImplementedError(f"Nó não suportado: {type(node).__name__}") from None
+        index = len(self.kind)
+        self.kind.append(kind)
+        for column in (self.a, self.b, self.c):
+            column.append(-1)
+        self.first.append(0)
+        self.count.append(0)
+        self.line.append(getattr(node, "line", None) or 0)
+        return index
+
+    def set_list(self, index: int, items: list[int]) -> None:
+        self.first[index] = len(self.links)
+        self.count[index] = len(items)
+        self.links.extend(items)
+
+    def add(self, node: Node) -> int:
+        """
+        Adiciona o nó e os seus descendentes e retorna o índice do nó.
+        """
+        index = self.new(node)
+        a = b = c = -1
+        items: Optional[list[int]] = None
+        match node:
+            case Program(stmts) | StatementBlock(stmts):
+                items = [self.add(stmt) for stmt in stmts]
+            case Var(name):
+                a = self.constant(name)
+            case Literal(value) | Bool(value):
+                a = self.constant(value)
+            case Print(target):
+                a = self.add(target)
+            case Return(value):
+                a = self.add(value) if value is not None else -1
+            case VarDef(name, value):
+                a, b = self.constant(name), self.add(value)
+            case If(cond, then_branch, else_branch):
+                a, b = self.add(cond), self.add(then_branch)
+                c = self.add(else_branch) if else_branch is not None else -1
+            case While(cond, body):
+                a, b = self.add(cond), self.add(body)
+            case Method(name, params, body, returns_value):
+                self.methods[id(node)] = index
+                a, b, c = self.constant(name), self.add(body), int(returns_value)
+                items = [self.constant(param) for param in params]
+            case AssignmentBlock(target_var, initial_value_expr, operations):
+                a, b = self.constant(target_var), self.add(initial_value_expr)
+                items = [self.add(op_node) for op_node in operations]
+            case Increment(target_var, delta):
+                a, b = self.constant(target_var), self.constant(delta)
+            case CallMethod(result_var, method_name, arguments):
+                a, b = self.constant(result_var), self.constant(method_name)
+                if node.tail is not None:
+                    c = self.methods[id(node.tail)]
+                items = [self.add(arg) for arg in arguments]
+            case _:
+                a = self.add(node.operand)  # type: ignore[attr-defined]
+        self.a[index], self.b[index], self.c[index] = a, b, c
+        if items is not None:
+            self.set_list(index, items)
+        return index
+
+    def result(self) -> FlatProgram:
+        return FlatProgram(
+            kind=self.kind,
+            a=self.a,
+            b=self.b,
+            c=self.c,
+            first=self.first,
+            count=self.count,
+            line=self.line,
+            links=self.links,
+            table=self.table,
+        )
+
+
+def flatten(program: Program) -> FlatProgram:
+    """
+    Converte o programa para a representação plana.
+
+    O programa é resolvido antes (veja `resolver.py`) apenas para marcar as
+    chamadas recursivas em posição de cauda.
+    """
+    from .resolver import resolve
+
+    resolve(program)
+    flattener = Flattener()
+    flattener.add(program)
+    return flattener.result()
+
+
+# Constantes locais do interpretador (mais rápidas que `Kind.X`).
+VAR = int(Kind.VAR)
+LITERAL = int(Kind.LITERAL)
+BOOL = int(Kind.BOOL)
+PRINT = int(Kind.PRINT)
+RETURN = int(Kind.RETURN)
+VAR_DEF = int(Kind.VAR_DEF)
+IF = int(Kind.IF)
+WHILE = int(Kind.WHILE)
+BLOCK = int(Kind.BLOCK)
+METHOD = int(Kind.METHOD)
+ASSIGN = int(Kind.ASSIGN)
+INCREMENT = int(Kind.INCREMENT)
+ADD = int(Kind.ADD)
+SUB = int(Kind.SUB)
+MUL = int(Kind.MUL)
+DIV = int(Kind.DIV)
+EQ = int(Kind.EQ)
+GT = int(Kind.GT)
+OR = int(Kind.OR)
+AND = int(Kind.AND)
+CALL = int(Kind.CALL)
+
+
+class FlatInterpreter:
+    """
+    Executa um `FlatProgram` percorrendo as colunas.
+
+    Cada bloco empilha um escopo no `Ctx`, variáveis são definidas com
+    `var_def` e métodos são valores guardados no contexto, como na engine
+    "closure".
+    """
+
+    def __init__(self, flat: FlatProgram):
+        self.flat = flat
+        self.kind = flat.kind
+        self.a = flat.a
+        self.b = flat.b
+        self.c = flat.c
+        self.first = flat.first
+        self.count = flat.count
+        self.links = flat.links
+        self.table = flat.table
+
+    def run(self, ctx: Ctx) -> None:
+        if self.stmts(0, ctx) is not None:
+            raise_return_outside_method()
+
+    def stmts(self, node: int, ctx: Ctx) -> Optional[Completion]:
+        """
+        Executa a lista de comandos do nó no contexto dado.
+        """
+        links = self.links
+        start = self.first[node]
+        for j in range(start, start + self.count[node]):
+            if (completion := self.stmt(links[j], ctx)) is not None:
+                return completion
+        return None
+
+    def expr(self, node: int, ctx: Ctx) -> Any:
+        kind = self.kind[node]
+        if kind == VAR:
+            return ctx[self.table[self.a[node]]]  # type: ignore[index]
+        if kind == LITERAL or kind == BOOL:
+            return self.table[self.a[node]]
+        raise NotImplementedError(f"Expressão não suportada: {Kind(kind).name}")
+
+    def stmt(self, node: int, ctx: Ctx) -> Optional[Completion]:
+        kind = self.kind[node]
+        if kind == ASSIGN:
+            self.assign(node, ctx)
+        elif kind == INCREMENT:
+            name = self.table[self.a[node]]
+            delta = self.table[self.b[node]]
+            value = ctx[name]  # type: ignore[index]
+            ctx.assign(name, value + delta if delta >= 0 else value - -delta)  # type: ignore[operator]
+        elif kind == IF:
+            if is_arnoldc_true(self.expr(self.a[node], ctx)):
+                return self.stmt(self.b[node], ctx)
+            if (else_branch := self.c[node]) >= 0:
+                return self.stmt(else_branch, ctx)
+        elif kind == BLOCK:
+            return self.stmts(node, ctx.push({}))
+        elif kind == WHILE:
+            cond, body = self.a[node], self.b[node]
+            while is_arnoldc_true(self.expr(cond, ctx)):
+                if (completion := self.stmt(body, ctx)) is not None:
+                    return completion
+        elif kind == CALL:
+            return self.call(node, ctx)
+        elif kind == RETURN:
+            value = self.a[node]
+            return Completion(self.expr(value, ctx) if value >= 0 else None)
+        elif kind == VAR_DEF:
+            ctx.var_def(self.table[self.a[node]], self.expr(self.b[node], ctx))  # type: ignore[arg-type]
+        elif kind == PRINT:
+            emit(self.expr(self.a[node], ctx))
+        elif kind == METHOD:
+            self.define(node, ctx)
+        else:
+            raise NotImplementedError(f"Comando não suportado: {Kind(kind).name}")
+        return None
+
+    def assign(self, node: int, ctx: Ctx) -> None:
+        kind, a, links = self.kind, self.a, self.links
+        value = self.expr(self.b[node], ctx)
+        start = self.first[node]
+        for j in range(start, start + self.count[node]):
+            op_node = links[j]
+            op_kind = kind[op_node]
+            operand = self.expr(a[op_node], ctx)
+            if op_kind == ADD:
+                value = value + operand
+            elif op_kind == SUB:
+                value = value - operand
+            elif op_kind == MUL:
+                value = value * operand
+            elif op_kind == DIV:
+                value = div(value, operand)
+            elif op_kind == EQ:
+                value = eq(value, operand)
+            elif op_kind == GT:
+                value = gt(value, operand)
+            elif op_kind == OR:
+                value = logical_or(value, operand)
+            elif op_kind == AND:
+                value = logical_and(value, operand)
+            else:
+                raise NotImplementedError(f"Operação ArnoldC não implementada: {Kind(op_kind).name}")
+        ctx.assign(self.table[a[node]], value)
+
+    def define(self, node: int, ctx: Ctx) -> None:
+        table = self.table
+        name = table[self.a[node]]
+        params = [table[j] for j in self.flat.children(node)]
+        nparams = len(params)
+        body = self.b[node]
+        returns_value = bool(self.c[node])
+        interpreter = self
+
+        def arnoldc_method_callable(*args_values):
+            # Chamadas em cauda reexecutam o corpo neste laço (veja
+            # `Method.eval`).
+            call_name = None
+            while True:
+                try:
+                    if len(args_values) != nparams:
+                        raise TypeError(
+                            f"Número incorreto de argumentos para o método '{name}'. "
+                            f"Esperado {nparams}, recebido {len(args_values)}"
+                        )
+
+                    method_ctx = ctx.push({})
+                    for param_name, arg_value in zip(params, args_values):
+                        method_ctx.var_def(param_name, arg_value)  # type: ignore[arg-type]
+
+                    completion = interpreter.stmt(body, method_ctx)
+                except TypeError as e:
+                    if call_name is None:
+                        raise
+                    raise ArnoldCError(f"Erro na chamada do método '{call_name}': {e}")
+                if completion.__class__ is not TailCall:
+                    break
+                if completion.callee is not arnoldc_method_callable:
+                    return completion.call()
+                args_values = completion.args
+                call_name = completion.name
+
+            if completion is None:
+                if returns_value:
+                    raise SemanticError(f"Método '{name}' que retorna valor não tem 'I'LL BE BACK' explícito.")
+                return None
+            if not returns_value and completion.value is not None:
+                raise SemanticError(f"Método void '{name}' não pode retornar um valor.")
+            return completion.value
+
+        # Índice do nó do método, comparado com a coluna `c` das chamadas em
+        # cauda.
+        arnoldc_method_callable.flat_node = node
+        ctx.var_def(name, arnoldc_method_callable)  # type: ignore[arg-type]
+
+    def call(self, node: int, ctx: Ctx) -> Optional[TailCall]:
+        table, links = self.table, self.links
+        method_name = table[self.b[node]]
+        result_var = table[self.a[node]]
+        method_callable = ctx[method_name]  # type: ignore[index]
+        start = self.first[node]
+        args_values = [self.expr(links[j], ctx) for j in range(start, start + self.count[node])]
+
+        tail = self.c[node]
+        if tail >= 0 and getattr(method_callable, "flat_node", None) == tail:
+            return TailCall(method_callable, args_values, method_name)  # type: ignore[arg-type]
+
+        if not callable(method_callable):
+            raise ArnoldCError(f"'{method_name}' não é um método.")
+        try:
+            result = method_callable(*args_values)
+            if result is not None:
+                ctx.assign(result_var, result)
+        except TypeError as e:
+            raise ArnoldCError(f"Erro na chamada do método '{method_name}': {e}")
+        except ForceReturn as e:
+            # Funções Python do ambiente ainda podem retornar desta forma.
+            ctx.assign(result_var, e.value)
+        return None
+
+
+def run_program(program: Program | FlatProgram, ctx: Ctx) -> None:
+    """
+    Converte o programa para a representação plana (se necessário) e o
+    executa no contexto dado.
+    """
+    flat = program if isinstance(program, FlatProgram) else flatten(program)
+    FlatInterpreter(flat).run(ctx)
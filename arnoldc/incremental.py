@@ -0,0 +1,280 @@
+"""
+Parsing incremental, para editores e para a opção `--watch`.
+
+O corpo do programa é dividido em regiões, uma por comando de nível mais
+externo (um método inteiro, de 'LISTEN TO ME VERY CAREFULLY' até 'HASTA LA
+VISTA, BABY', é uma única região). A cada atualização do código fonte, só as
+regiões cujo texto mudou passam pelo parser, pelo `ArnoldCTransformer` e
+pela validação; as demais reaproveitam os nós já construídos, e os novos nós
+são colocados no `Program` existente com `Node.replace_child`.
+
+A divisão usa uma expressão regular com as palavras-chave da gramática, bem
+mais barata que o lexer do Lark. Cada região é analisada como um programa
+separado, com linhas em branco na frente para que os números de linha (nos
+nós e nas mensagens de erro) sejam os do arquivo completo. Isso é possível
+porque a validação de um comando de nível mais externo não depende dos
+outros.
+
+Se o texto não puder ser dividido (ex.: falta o 'YOU HAVE BEEN TERMINATED'
+ou um bloco não foi fechado), o programa inteiro é analisado de uma vez,
+para que o erro seja o mesmo de `parse`.
+"""
+
+import re
+from dataclasses import dataclass, field
+from functools import cache
+from typing import Optional
+
+from lark.exceptions import LarkError
+
+from .arnoldc_ast import Program, Stmt
+from .parser import get_parser, grammar_source, parse
+from .transformer import ArnoldCTransformer
+
+START = "IT'S SHOWTIME"
+END = "YOU HAVE BEEN TERMINATED"
+
+# Palavras-chave que iniciam um comando.
+STATEMENT_KEYWORDS = {
+    "HEY CHRISTMAS TREE",
+    "GET TO THE CHOPPER",
+    "TALK TO THE HAND",
+    "GET YOUR ASS TO MARS",
+    "LISTEN TO ME VERY CAREFULLY",
+    "BECAUSE I'M GOING TO SAY PLEASE",
+    "STICK AROUND",
+    "I'LL BE BACK",
+}
+
+# Palavras-chave que abrem e fecham blocos.
+OPENERS = {
+    "GET TO THE CHOPPER",
+    "LISTEN TO ME VERY CAREFULLY",
+    "BECAUSE I'M GOING TO SAY PLEASE",
+    "STICK AROUND",
+}
+CLOSERS = {
+    "ENOUGH TALK",
+    "HASTA LA VISTA, BABY",
+    "YOU HAVE NO RESPECT FOR LOGIC",
+    "CHILL",
+}
+
+
+@cache
+def keywords() -> list[str]:
+    """
+    Palavras-chave da gramática, das mais longas para as mais curtas (a
+    ordem em que o lexer as testa).
+    """
+    found = re.findall(r'^\w+\.2\s*:\s*"([^"]*)"', grammar_source(), re.MULTILINE)
+    return sorted(found, key=len, reverse=True)
+
+
+@cache
+def keyword_pattern() -> re.Pattern:
+    """
+    Expressão regular que encontra as palavras-chave da gramática, ignorando
+    strings, comentários e nomes de variáveis (como o lexer, que consome um
+    nome inteiro mesmo que ele contenha uma palavra-chave).
+    """
+    alternatives = "|".join(re.escape(keyword) for keyword in keywords())
+    return re.compile(rf'"[^"]*"|//[^\n]*|(?P<keyword>{alternatives})|[a-zA-Z_]\w*')
+
+
+def blank(text: str) -> bool:
+    """
+    Verifica se o trecho só tem espaços e comentários.
+    """
+    return not re.sub(r"//[^\n]*", "", text).strip()
+
+
+@dataclass
+class Region:
+    """
+    Trecho do código com um comando de nível mais externo.
+
+    `stmts` guarda os nós construídos a partir do trecho e `error` o erro
+    encontrado no parsing ou na validação.
+    """
+
+    text: str
+    line: int
+    stmts: list[Stmt] = field(default_factory=list)
+    error: Optional[Exception] = None
+
+
+def split_regions(source: str) -> Optional[list[tuple[str, int]]]:
+    """
+    Divide o corpo do programa em regiões (texto, linha inicial). Retorna
+    None se o texto não tiver a estrutura esperada.
+    """
+    starts: list[int] = []
+    begin = end = None
+    depth = 0
+    for match in keyword_pattern().finditer(source):
+        keyword = match.group("keyword")
+        if keyword is None:
+            continue
+        if end is not None:
+            return None
+        if begin is None:
+            if keyword != START or not blank(source[: match.start()]):
+                return None
+            begin = match.end()
+            continue
+        if depth == 0:
+            if keyword == END:
+                end = match.start()
+                if not blank(source[match.end() :]):
+                    return None
+                continue
+            if keyword in STATEMENT_KEYWORDS:
+                starts.append(match.start())
+        if keyword in OPENERS:
+            depth += 1
+        elif keyword in CLOSERS:
+            depth -= 1
+            if depth < 0:
+                return None
+    if begin is None or end is None or depth != 0:
+        return None
+    if not blank(source[begin : starts[0] if starts else end]):
+        return None
+
+    regions = []
+    line = source.count("\n", 0, starts[0]) + 1 if starts else 1
+    for i, start in enumerate(starts):
+        stop = starts[i + 1] if i + 1 < len(starts) else end
+        text = source[start:stop]
+        regions.append((text, line))
+        line += text.count("\n")
+    return regions
+
+
+def parse_region(text: str, line: int) -> Region:
+    """
+    Analisa e valida uma região, mantendo os números de linha do arquivo.
+
+    A região é analisada a partir da linha 1 e os nós são deslocados depois.
+    Só em caso de erro ela é analisada de novo com linhas em branco na
+    frente, para que a mensagem do Lark tenha a linha do arquivo.
+    """
+    region = Region(text, 1)
+    try:
+        region.stmts = parse_stmts(f"{START} {text}\n{END}")
+    except Exception:
+        region.line = line
+        padding = "\n" * (line - 1) if line > 1 else " "
+        try:
+            parse_stmts(f"{START}{padding}{text}\n{END}")
+        except Exception as e:
+            region.error = e
+        return region
+    if line != 1:
+        shift_lines(region, line - 1)
+    return region
+
+
+def parse_stmts(source: str) -> list[Stmt]:
+    tree = get_parser().parse(source, start="start")
+    program = ArnoldCTransformer().transform(tree)
+    program.validate_tree()
+    return program.stmts
+
+
+def shift_lines(region: Region, delta: int) -> None:
+    """
+    Atualiza os números de linha dos nós de uma região que mudou de lugar.
+    """
+    region.line += delta
+    for stmt in region.stmts:
+        for node in stmt.descendants():
+            if isinstance(node, Stmt) and node.line is not None:
+                node.line += delta
+
+
+class IncrementalParser:
+    """
+    Mantém o `Program` de um arquivo que é editado continuamente.
+
+    Uso:
+
+        document = IncrementalParser()
+        program = document.update(source)
+        # ... o arquivo muda ...
+        program = document.update(new_source)  # mesmo objeto, atualizado
+
+    Depois de cada atualização, `reparsed` e `reused` contam as regiões
+    analisadas novamente e as reaproveitadas. Os nós são compartilhados entre
+    atualizações: quem precisar alterar a árvore (ex.: `optimize`) deve
+    trabalhar em uma cópia.
+    """
+
+    def __init__(self):
+        self.regions: list[Region] = []
+        self.program: Optional[Program] = None
+        self.reparsed = 0
+        self.reused = 0
+
+    def update(self, source: str) -> Program:
+        """
+        Atualiza o programa a partir do novo código fonte e o retorna. Se
+        houver erros, lança o primeiro (erros de sintaxe primeiro, como em
+        `parse`) e mantém o programa anterior.
+        """
+        split = split_regions(source)
+        if split is None:
+            program = parse(source)
+            self.regions = []
+            self.reparsed, self.reused = 1, 0
+            self.program = program
+            return program
+
+        available: dict[str, list[Region]] = {}
+        for region in self.regions:
+            if region.error is None:
+                available.setdefault(region.text, []).append(region)
+        self.reparsed = self.reused = 0
+        regions = []
+        for text, line in split:
+            if candidates := available.get(text):
+                region = candidates.pop(0)
+                if region.line != line:
+                    shift_lines(region, line - region.line)
+                self.reused += 1
+            else:
+                region = parse_region(text, line)
+                self.reparsed += 1
+            regions.append(region)
+        self.regions = regions
+
+        if errors := self.diagnostics():
+            syntax_errors = [e for e in errors if isinstance(e, LarkError)]
+            raise (syntax_errors or errors)[0]
+
+        stmts = [stmt for region in regions for stmt in region.stmts]
+        if self.program is None:
+            self.program = Program(stmts)
+        else:
+            splice(self.program, stmts)
+        return self.program
+
+    def diagnostics(self) -> list[Exception]:
+        """
+        Erros de todas as regiões, na ordem do arquivo.
+        """
+        return [region.error for region in self.regions if region.error is not None]
+
+
+def splice(program: Program, stmts: list[Stmt]) -> None:
+    """
+    Coloca os novos comandos no programa. Quando o número de comandos não
+    muda, apenas os nós diferentes são substituídos.
+    """
+    if len(stmts) != len(program.stmts):
+        program.stmts[:] = stmts
+        return
+    for old, new in zip(list(program.stmts), stmts):
+        if old is not new:
+            program.replace_child(old, new)
@@ -0,0 +1,407 @@
+"""
+Expansão (inlining) de métodos pequenos.
+
+Cada 'GET YOUR ASS TO MARS' busca o método no `Ctx`, monta a lista de
+argumentos, cria o frame dos parâmetros e o do corpo e retorna pelo
+`Completion` do 'I'LL BE BACK'. Para métodos pequenos, esse custo é bem
+maior que o trabalho do próprio método. O inliner roda no otimizador
+(`-O1` e `-O2`) e substitui as chamadas desses métodos por uma cópia do
+corpo, em um bloco próprio:
+
+    GET YOUR ASS TO MARS r            HEY CHRISTMAS TREE _soma_a
+    DO IT NOW soma x 1                YOU SET US UP x
+                              =>      HEY CHRISTMAS TREE _soma_b
+                                      YOU SET US UP 1
+                                      ... corpo de soma, com os nomes trocados ...
+                                      GET TO THE CHOPPER r
+                                      HERE IS MY INVITATION <valor do I'LL BE BACK>
+                                      ENOUGH TALK
+
+Todos os nomes do corpo (parâmetros e variáveis locais) são trocados por
+nomes que não aparecem em nenhum outro lugar do programa: os argumentos não
+são capturados pelas variáveis do método, e as declarações da cópia não
+colidem com as do bloco que faz a chamada nem com outras cópias no mesmo
+bloco (um 'HEY CHRISTMAS TREE' não pode ser repetido no mesmo escopo).
+
+Uma chamada só é expandida se:
+
+* o corpo do método tem no máximo `INLINE_SIZE[nível]` nós e só usa os
+  próprios parâmetros e variáveis (sem nomes livres, o que exclui métodos
+  recursivos e chamadas a outros métodos);
+* o único 'I'LL BE BACK' é o último comando do corpo, e ele existe se e só
+  se o método retorna valor;
+* o nome na chamada certamente se refere ao método: a declaração é
+  encontrada pelas regras de escopo do `resolver.py`, já foi executada no
+  ponto da chamada e o nome nunca é reatribuído;
+* o número de argumentos está correto;
+* nenhum comando do corpo pode lançar um erro de tipo (veja
+  `typecheck.py`), pois a mensagem do erro cita a chamada do método.
+
+O `-O2` expande métodos maiores que o `-O1`.
+"""
+
+import copy
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from .arnoldc_ast import (
+    AssignmentBlock,
+    CallMethod,
+    Increment,
+    Method,
+    Program,
+    Return,
+    StatementBlock,
+    Stmt,
+    Var,
+    VarDef,
+)
+from .node import Node
+
+# Número máximo de nós do corpo de um método expandido, por nível.
+INLINE_SIZE = {1: 16, 2: 32}
+
+
+@dataclass(eq=False)
+class Declaration:
+    """
+    Declarações de um nome em um escopo (no escopo global, agrupadas pelo
+    nome). `position` é a ordem textual do primeiro método declarado.
+    """
+
+    name: str
+    nodes: list[VarDef | Method] = field(default_factory=list)
+    is_global: bool = False
+    assigned: bool = False
+    position: int = 0
+
+
+@dataclass
+class Scope:
+    """
+    Escopo em tempo de compilação, com as mesmas regras do `resolver.Scope`.
+    """
+
+    declared: dict[str, Declaration] = field(default_factory=dict)
+    pending: set[str] = field(default_factory=set)
+    method: bool = False
+
+
+@dataclass(eq=False)
+class MethodInfo:
+    """
+    Método e se o corpo usa algum nome que não é um parâmetro nem uma
+    variável do próprio método.
+    """
+
+    node: Method
+    free: bool = False
+
+
+class CallSites:
+    """
+    Percorre o programa associando cada chamada à declaração do método
+    chamado e registrando as atribuições a cada nome.
+    """
+
+    def __init__(self):
+        self.scopes: list[Optional[Scope]] = []
+        self.globals: dict[str, Declaration] = {}
+        # Métodos sendo visitados e a posição do escopo de parâmetros de
+        # cada um em `scopes`.
+        self.methods: list[tuple[MethodInfo, int]] = []
+        self.infos: dict[int, MethodInfo] = {}
+        self.calls: list[tuple[CallMethod, Optional[Declaration], int]] = []
+        self.dynamic_writes: set[str] = set()
+        self.names: set[str] = set()
+        self.position = 0
+        self._dispatch: dict[type, Callable[[Node], None]] = {}
+
+    def visit(self, node: Node) -> None:
+        cls = type(node)
+        try:
+            handler = self._dispatch[cls]
+        except KeyError:
+            handler = getattr(self, f"visit_{cls.__name__}", self.generic_visit)
+            self._dispatch[cls] = handler
+        handler(node)
+
+    def generic_visit(self, node: Node) -> None:
+        for child in node.children():
+            self.visit(child)
+
+    #
+    # Escopos
+    #
+
+    def lookup(self, name: str) -> tuple[Optional[Declaration], int]:
+        """
+        Declaração acessada pelo nome (None se ele for buscado
+        dinamicamente) e a posição do seu escopo (-1 no escopo global).
+        """
+        in_method = False
+        for index in range(len(self.scopes) - 1, -1, -1):
+            scope = self.scopes[index]
+            if scope is None:
+                break
+            if name in scope.declared:
+                return scope.declared[name], index
+            if in_method and name in scope.pending:
+                return None, -1
+            in_method = in_method or scope.method
+        if name not in self.globals:
+            self.globals[name] = Declaration(name, is_global=True)
+        return self.globals[name], -1
+
+    def reference(self, name: str) -> Optional[Declaration]:
+        """
+        Busca o nome, marcando como livre nos métodos em que ele não é um
+        parâmetro nem uma variável local.
+        """
+        self.names.add(name)
+        declaration, index = self.lookup(name)
+        for info, method_index in reversed(self.methods):
+            if index >= method_index:
+                break
+            info.free = True
+        return declaration
+
+    def write(self, name: str) -> None:
+        declaration = self.reference(name)
+        if declaration is None:
+            self.dynamic_writes.add(name)
+        else:
+            declaration.assigned = True
+
+    def declare(self, node: VarDef | Method) -> Declaration:
+        self.names.add(node.name)
+        scope = self.scopes[-1]
+        if scope is None:
+            declaration = self.globals.setdefault(node.name, Declaration(node.name, is_global=True))
+        else:
+            declaration = scope.declared.setdefault(node.name, Declaration(node.name))
+        if isinstance(node, Method) and not any(isinstance(n, Method) for n in declaration.nodes):
+            declaration.position = self.position
+        declaration.nodes.append(node)
+        return declaration
+
+    #
+    # Comandos
+    #
+
+    def visit_Program(self, node: Program) -> None:
+        self.scopes.append(None)
+        for stmt in node.stmts:
+            self.visit(stmt)
+        self.scopes.pop()
+
+    def visit_StatementBlock(self, node: StatementBlock) -> None:
+        pending = {stmt.name for stmt in node.stmts if type(stmt) in (VarDef, Method)}
+        if pending:
+            self.scopes.append(Scope(pending=pending))
+        for stmt in node.stmts:
+            self.visit(stmt)
+        if pending:
+            self.scopes.pop()
+
+    def visit_Var(self, node: Var) -> None:
+        self.reference(node.name)
+
+    def visit_VarDef(self, node: VarDef) -> None:
+        # O valor inicial é avaliado antes da declaração.
+        self.visit(node.value)
+        self.declare(node)
+
+    def visit_AssignmentBlock(self, node: AssignmentBlock) -> None:
+        self.generic_visit(node)
+        self.write(node.target_var)
+
+    def visit_Increment(self, node: Increment) -> None:
+        self.write(node.target_var)
+
+    def visit_CallMethod(self, node: CallMethod) -> None:
+        self.position += 1
+        callee = self.reference(node.method_name)
+        for arg in node.arguments:
+            self.visit(arg)
+        self.write(node.result_var)
+        self.calls.append((node, callee, self.position))
+
+    def visit_Method(self, node: Method) -> None:
+        self.position += 1
+        self.declare(node)
+        self.names.update(node.params)
+        info = self.infos[id(node)] = MethodInfo(node)
+        scope = Scope({param: Declaration(param) for param in node.params}, method=True)
+        self.scopes.append(scope)
+        self.methods.append((info, len(self.scopes) - 1))
+        self.visit(node.body)
+        self.methods.pop()
+        self.scopes.pop()
+
+
+class Inliner:
+    """
+    Expande as chamadas de métodos pequenos (no lugar).
+    """
+
+    def __init__(self, level: int = 1):
+        self.level = level
+        self.inlined = 0
+
+    def run(self, program: Program) -> None:
+        sites = CallSites()
+        sites.visit(program)
+        self.names = sites.names
+
+        self.targets: dict[int, Method] = {}
+        candidates: dict[int, bool] = {}
+        for call, callee, position in sites.calls:
+            method = self.callee(call, callee, position, sites)
+            if method is None:
+                continue
+            if id(method) not in candidates:
+                candidates[id(method)] = not sites.infos[id(method)].free and self.small(method)
+            if candidates[id(method)]:
+                self.targets[id(call)] = method
+        if not self.targets:
+            return
+
+        from .typecheck import infer_types
+
+        # Nomes que o programa não declara no escopo global podem vir do
+        # ambiente, com qualquer tipo.
+        declared = {stmt.name for stmt in program.stmts if type(stmt) in (VarDef, Method)}
+        fallible = infer_types(program, sites.names - declared).fallible
+        methods = {id(method): method for method in self.targets.values()}
+        unsafe = {
+            key for key, method in methods.items() if any(id(node) in fallible for node in method.body.descendants())
+        }
+        self.targets = {key: method for key, method in self.targets.items() if id(method) not in unsafe}
+        program.stmts = self.expand(program.stmts)
+
+    def callee(
+        self, call: CallMethod, callee: Optional[Declaration], position: int, sites: CallSites
+    ) -> Optional[Method]:
+        """
+        Método que certamente é chamado, ou None.
+        """
+        if callee is None or callee.assigned or callee.name in sites.dynamic_writes:
+            return None
+        if len(callee.nodes) != 1 or not isinstance(method := callee.nodes[0], Method):
+            return None
+        # No escopo global, o método precisa ter sido declarado antes.
+        if callee.is_global and position <= callee.position:
+            return None
+        if len(call.arguments) != len(method.params):
+            return None
+        return method
+
+    def small(self, method: Method) -> bool:
+        """
+        Verifica se o corpo do método pode ser expandido.
+        """
+        stmts = method.body.stmts
+        last = stmts[-1] if stmts else None
+        if isinstance(last, Return):
+            if method.returns_value != (last.value is not None):
+                return False
+            stmts = stmts[:-1]
+        elif method.returns_value:
+            return False
+
+        size = 1
+        for stmt in stmts:
+            if type(stmt) is VarDef and stmt.name in method.params:
+                return False
+            for node in stmt.descendants():
+                size += 1
+                if type(node) in (Return, Method, CallMethod):
+                    return False
+        if isinstance(last, Return):
+            size += sum(1 for _ in last.descendants())
+        return size <= INLINE_SIZE[self.level]
+
+    #
+    # Expansão
+    #
+
+    def expand(self, stmts: list[Stmt]) -> list[Stmt]:
+        result: list[Stmt] = []
+        for stmt in stmts:
+            method = self.targets.get(id(stmt))
+            if method is not None:
+                block = self.inline(stmt, method)
+                if any(type(s) in (VarDef, Method) for s in block.stmts):
+                    result.append(block)
+                else:
+                    result.extend(block.stmts)
+                continue
+            if type(stmt) is StatementBlock:
+                stmt.stmts = self.expand(stmt.stmts)
+            else:
+                for block in stmt.children():
+                    if type(block) is StatementBlock:
+                        block.stmts = self.expand(block.stmts)
+            result.append(stmt)
+        return result
+
+    def fresh(self, method: Method, name: str) -> str:
+        base = candidate = f"_{method.name}_{name}"
+        counter = 1
+        while candidate in self.names:
+            counter += 1
+            candidate = f"{base}_{counter}"
+        self.names.add(candidate)
+        return candidate
+
+    def inline(self, call: CallMethod, method: Method) -> StatementBlock:
+        """
+        Bloco que substitui a chamada.
+        """
+        renames = {param: self.fresh(method, param) for param in method.params}
+        for node in method.body.descendants():
+            if type(node) is VarDef and node.name not in renames:
+                renames[node.name] = self.fresh(method, node.name)
+
+        # Os argumentos são avaliados no escopo da chamada, sem trocar nomes.
+        stmts: list[Stmt] = []
+        for param, arg in zip(method.params, call.arguments):
+            stmts.append(at_call(VarDef(renames[param], copy.deepcopy(arg)), call))
+        body = copy.deepcopy(method.body.stmts)
+        for stmt in body:
+            rename(stmt, renames)
+        returned = body.pop() if body and isinstance(body[-1], Return) else None
+        stmts.extend(body)
+        if returned is not None and returned.value is not None:
+            stmts.append(at_call(AssignmentBlock(call.result_var, returned.value, []), call))
+
+        self.inlined += 1
+        return at_call(StatementBlock(stmts), call)
+
+
+def at_call(node: Stmt, call: CallMethod) -> Stmt:
+    node.line = call.line
+    return node
+
+
+def rename(stmt: Stmt, renames: dict[str, str]) -> None:
+    """
+    Troca os nomes do corpo copiado.
+    """
+    for node in stmt.descendants():
+        match node:
+            case Var() | VarDef():
+                node.name = renames.get(node.name, node.name)
+            case AssignmentBlock() | Increment():
+                node.target_var = renames.get(node.target_var, node.target_var)
+
+
+def inline_methods(program: Program, level: int = 1) -> int:
+    """
+    Expande as chamadas de métodos pequenos do programa (no lugar) e retorna
+    o número de chamadas expandidas.
+    """
+    inliner = Inliner(level)
+    inliner.run(program)
+    return inliner.inlined
@@ -0,0 +1,255 @@
+"""
+Reconhecimento de laços contados.
+
+O formato de laço mais comum em ArnoldC é um 'STICK AROUND' sobre um
+contador que o próprio corpo decrementa (ou incrementa) de 1 em 1:
+
+    STICK AROUND i
+        ...
+        GET TO THE CHOPPER i
+        HERE IS MY INVITATION i
+        GET DOWN 1
+        ENOUGH TALK
+        ...
+    CHILL
+
+Se o contador é a variável de indução do laço, isto é, se nenhum outro
+comando do corpo pode alterá-lo, o número de iterações é conhecido na
+entrada do laço: são `abs(i)` iterações quando o valor inicial é um inteiro
+com o sinal oposto ao do passo (caso contrário o laço não termina, ou não
+executa, e o caminho comum é usado). `CountedLoop.run` executa essas
+iterações com um `range` do Python, sem avaliar a condição nem o bloco de
+atribuição do contador a cada volta: o contador só é gravado com o valor
+que o bloco teria produzido.
+
+Quando o corpo só acumula somas e subtrações de constantes e do próprio
+contador em variáveis inteiras (`x = x + 2`, `x = x - i`), o laço inteiro
+é substituído pela forma fechada (somas de progressões aritméticas).
+
+A análise é feita pelo `resolver.py`, que anota `While.counted`, e vale
+apenas para o interpretador de árvore. O resultado é sempre o mesmo do
+laço comum: valores que não são inteiros (ou que não estão definidos)
+fazem o laço seguir pelo caminho comum, que produz os mesmos erros.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+from .arnoldc_ast import (
+    AddOp,
+    AssignmentBlock,
+    CallMethod,
+    Completion,
+    Increment,
+    Literal,
+    Method,
+    StatementBlock,
+    Stmt,
+    SubOp,
+    Var,
+    VarDef,
+    While,
+)
+from .ctx import UNSET, Ctx, Frame
+
+# Sinal de cada operação aceita nos acumuladores.
+SIGNS = {AddOp: 1, SubOp: -1}
+
+
+@dataclass
+class Accumulator:
+    """
+    Variável atualizada por `x = x + constant + before * i` (com o valor do
+    contador antes da sua atualização) `+ after * i` (depois) a cada volta.
+    """
+
+    name: str
+    depth: int
+    slot: int
+    constant: int = 0
+    before: int = 0
+    after: int = 0
+
+
+@dataclass
+class CountedLoop:
+    """
+    Laço contado: `counter` é a condição do laço, `step` (1 ou -1) a
+    atualização do contador, e `before` e `after` os comandos do corpo
+    antes e depois dela. `accumulators` é preenchido quando o laço tem
+    forma fechada.
+    """
+
+    counter: Var
+    step: int
+    before: tuple[Stmt, ...]
+    after: tuple[Stmt, ...]
+    accumulators: Optional[tuple[Accumulator, ...]] = None
+
+    def start(self, ctx: Ctx) -> int:
+        """
+        Valor inicial do contador, ou 0 se o laço não puder ser executado
+        como um laço contado.
+        """
+        value = self.counter.eval(ctx)
+        if value.__class__ is int and (value > 0) == (self.step < 0):
+            return value
+        return 0
+
+    def run(self, body: StatementBlock, ctx: Ctx, start: int) -> Optional[Completion]:
+        """
+        Executa as `abs(start)` iterações do laço.
+        """
+        if self.accumulators is not None and self.close(ctx, start):
+            return None
+
+        counter, step = self.counter, self.step
+        name, depth, slot = counter.name, counter.depth, counter.slot
+        before, after = self.before, self.after
+        new_scope = body.new_scope
+        pooled = new_scope and body.pool is not None
+        frame = body.acquire(ctx) if pooled else ctx
+        try:
+            for value in range(start, 0, step):
+                if pooled:
+                    frame.slots[:] = body.blank  # type: ignore[attr-defined]
+                elif new_scope:
+                    frame = Frame(body.slot_index or {}, [UNSET] * body.nslots, ctx)
+                for stmt in before:
+                    if (completion := stmt.eval(frame)) is not None:
+                        return completion
+                ctx.store(name, depth, slot, value + step)
+                for stmt in after:
+                    if (completion := stmt.eval(frame)) is not None:
+                        return completion
+        finally:
+            if pooled:
+                body.release(frame)  # type: ignore[arg-type]
+        return None
+
+    def close(self, ctx: Ctx, start: int) -> bool:
+        """
+        Aplica a forma fechada. Retorna False (sem alterar nada) se algum
+        acumulador não guardar um inteiro.
+        """
+        accumulators = self.accumulators or ()
+        values = []
+        for acc in accumulators:
+            try:
+                value = ctx.load(acc.name, acc.depth, acc.slot)
+            except (KeyError, NameError):
+                return False
+            if value.__class__ is not int:
+                return False
+            values.append(value)
+
+        # Soma dos valores do contador antes e depois da atualização.
+        n = abs(start)
+        before_sum = n * (start - self.step) // 2
+        after_sum = before_sum + n * self.step
+        for acc, value in zip(accumulators, values):
+            value += n * acc.constant + acc.before * before_sum + acc.after * after_sum
+            ctx.store(acc.name, acc.depth, acc.slot, value)
+        counter = self.counter
+        ctx.store(counter.name, counter.depth, counter.slot, 0)
+        return True
+
+
+def counted_loop(node: While) -> Optional[CountedLoop]:
+    """
+    Analisa um laço já resolvido e retorna o `CountedLoop` correspondente,
+    ou None se o laço não tiver o formato esperado.
+    """
+    if not isinstance(node.cond, Var):
+        return None
+    name = node.cond.name
+    stmts = node.body.stmts
+    updates = [i for i, stmt in enumerate(stmts) if counter_step(stmt, name)]
+    if len(updates) != 1:
+        return None
+    index = updates[0]
+    update = stmts[index]
+    for stmt in stmts:
+        if stmt is not update and not keeps_counter(stmt, name):
+            return None
+
+    loop = CountedLoop(node.cond, counter_step(update, name), tuple(stmts[:index]), tuple(stmts[index + 1 :]))
+    if not node.body.new_scope:
+        loop.accumulators = accumulators(loop, name)
+    return loop
+
+
+def counter_step(stmt: Stmt, name: str) -> int:
+    """
+    Passo (1 ou -1) se o comando for `name = name + 1` ou `name = name - 1`,
+    e 0 caso contrário.
+    """
+    if isinstance(stmt, Increment):
+        return stmt.delta if stmt.target_var == name and stmt.delta in (1, -1) else 0
+    if not isinstance(stmt, AssignmentBlock) or stmt.target_var != name:
+        return 0
+    initial = stmt.initial_value_expr
+    if not isinstance(initial, Var) or initial.name != name or len(stmt.operations) != 1:
+        return 0
+    op_node = stmt.operations[0]
+    operand = op_node.operand
+    if not isinstance(operand, Literal) or operand.value.__class__ is not int or operand.value != 1:
+        return 0
+    if type(op_node) is AddOp:
+        return 1
+    if type(op_node) is SubOp:
+        return -1
+    return 0
+
+
+def keeps_counter(stmt: Stmt, name: str) -> bool:
+    """
+    Verifica se o comando (e tudo dentro dele) não pode alterar nem
+    esconder o contador. Chamadas de métodos são recusadas, pois o método
+    chamado pode atribuir a variável.
+    """
+    for node in stmt.descendants():
+        match node:
+            case CallMethod() | Method():
+                return False
+            case AssignmentBlock(target_var=target) | Increment(target_var=target) if target == name:
+                return False
+            case VarDef(name=declared) if declared == name:
+                return False
+    return True
+
+
+def accumulators(loop: CountedLoop, name: str) -> Optional[tuple[Accumulator, ...]]:
+    """
+    Acumuladores do laço, se todos os comandos do corpo (fora a atualização
+    do contador) forem somas e subtrações de constantes inteiras e do
+    contador em variáveis diferentes do contador.
+    """
+    found: dict[str, Accumulator] = {}
+    for position, stmts in (("before", loop.before), ("after", loop.after)):
+        for stmt in stmts:
+            match stmt:
+                case Increment(target_var=target, delta=delta) if target != name:
+                    acc = found.setdefault(target, Accumulator(target, stmt.target_depth, stmt.target_slot))
+                    acc.constant += delta
+                case AssignmentBlock(target_var=target, initial_value_expr=Var(name=initial)) if (
+                    target != name and initial == target
+                ):
+                    acc = found.setdefault(target, Accumulator(target, stmt.target_depth, stmt.target_slot))
+                    for op_node in stmt.operations:
+                        sign = SIGNS.get(type(op_node))
+                        operand = op_node.operand
+                        if sign is None:
+                            return None
+                        if isinstance(operand, Literal) and operand.value.__class__ is int:
+                            acc.constant += sign * operand.value
+                        elif isinstance(operand, Var) and operand.name == name:
+                            if position == "before":
+                                acc.before += sign
+                            else:
+                                acc.after += sign
+                        else:
+                            return None
+                case _:
+                    return None
+    return tuple(found.values())
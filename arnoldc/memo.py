@@ -0,0 +1,157 @@
+"""
+Memoização de métodos puros.
+
+Métodos marcados por `enable_memo` (ou pelo otimizador, em `-O2`) recebem
+um cache LRU de tamanho limitado: o callable registrado por `Method.eval`
+passa a consultar o cache antes de executar o corpo. Apenas métodos puros
+(veja `purity.py`) que retornam valor são marcados, e apenas chamadas cujos
+argumentos são inteiros ou strings usam o cache; chamadas com erro não são
+guardadas.
+
+O cache pertence ao nó `Method`: como o resultado de um método puro só
+depende dos argumentos, todas as instâncias do método (ex.: métodos
+definidos dentro de outros métodos) compartilham as mesmas entradas. As
+estatísticas (acertos, falhas e remoções) podem ser consultadas com
+`memo_stats` ou pela opção `--memo-stats` da linha de comando.
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Sequence
+
+from .arnoldc_ast import Method, Program
+from .purity import pure_methods
+
+# Número padrão de entradas do cache de cada método.
+DEFAULT_MEMO_SIZE = 1024
+
+# Tipos de argumento aceitos na chave do cache. Booleanos ficam de fora:
+# `True == 1`, mas o valor impresso é diferente.
+KEY_TYPES = (int, str)
+
+# Marca chaves que não estão no cache.
+MISSING = object()
+
+
+class MemoCache:
+    """
+    Cache LRU com estatísticas de uso.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MEMO_SIZE):
+        if maxsize < 1:
+            raise ValueError("O cache de memoização precisa de pelo menos uma entrada.")
+        self.maxsize = maxsize
+        self.entries: OrderedDict[tuple, Any] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def store(self, key: tuple, value: Any) -> None:
+        entries = self.entries
+        entries[key] = value
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def lookup(self, key: tuple) -> Any:
+        """
+        Valor guardado para a chave (ou `MISSING`), contando o acerto ou a
+        falha.
+        """
+        entries = self.entries
+        value = entries.get(key, MISSING)
+        if value is MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+            entries.move_to_end(key)
+        return value
+
+    def hit_rate(self) -> float:
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.0
+
+
+def method_cache(method: Method) -> MemoCache:
+    """
+    Cache do nó, criado na primeira vez que é pedido.
+    """
+    if method.memo is None:
+        method.memo = MemoCache(method.memo_size)
+    return method.memo
+
+
+def cache_key(args_values: Sequence[Any]) -> Optional[tuple]:
+    """
+    Chave do cache para os argumentos, ou None se algum deles não puder
+    fazer parte da chave.
+    """
+    for arg in args_values:
+        if type(arg) not in KEY_TYPES:
+            return None
+    return tuple(args_values)
+
+
+def memoize(method: Method, function: Callable) -> Callable:
+    """
+    Envolve o callable de um método com o cache do nó.
+    """
+    cache = method_cache(method)
+    lookup = cache.lookup
+
+    def memoized(*args_values):
+        for arg in args_values:
+            if type(arg) not in KEY_TYPES:
+                return function(*args_values)
+        # O método é executado fora de um `except`: erros dele não devem vir
+        # encadeados com o KeyError da busca no cache.
+        value = lookup(args_values)
+        if value is MISSING:
+            value = function(*args_values)
+            cache.store(args_values, value)
+        return value
+
+    memoized.method = method
+    return memoized
+
+
+def enable_memo(program: Program, size: int = DEFAULT_MEMO_SIZE) -> list[Method]:
+    """
+    Marca para memoização os métodos puros que retornam valor e retorna a
+    lista desses métodos.
+    """
+    if size < 1:
+        raise ValueError("O cache de memoização precisa de pelo menos uma entrada.")
+    methods = [method for method in pure_methods(program) if method.returns_value]
+    for method in methods:
+        method.memo_size = size
+    return methods
+
+
+def memo_stats(program: Program) -> list[tuple[str, MemoCache]]:
+    """
+    Estatísticas dos caches criados durante a execução, por método.
+    """
+    return [
+        (node.name, node.memo)
+        for node in program.descendants()
+        if isinstance(node, Method) and node.memo is not None
+    ]
+
+
+def memo_report(program: Program) -> str:
+    """
+    Relatório em texto das estatísticas de memoização.
+    """
+    lines = [f"{'método':<16} {'acertos':>10} {'falhas':>10} {'remoções':>10} {'entradas':>10} {'taxa':>6}"]
+    for name, cache in memo_stats(program):
+        lines.append(
+            f"{name:<16} {cache.hits:>10} {cache.misses:>10} {cache.evictions:>10} "
+            f"{len(cache):>10} {cache.hit_rate() * 100:>5.1f}%"
+        )
+    if len(lines) == 1:
+        lines.append("Nenhum método memoizado foi chamado.")
+    return "\n".join(lines)
@@ -3,8 +3,8 @@ Define estrutura de dados básicas para as árvores sintáticas.
 """
 
 from abc import ABC
-from dataclasses import dataclass, field
-from functools import singledispatch
+from dataclasses import dataclass, field, fields, is_dataclass
+from functools import cache, singledispatch
 from types import BuiltinFunctionType, FunctionType, MethodDescriptorType, MethodType
 from typing import (
     TYPE_CHECKING,
@@ -16,6 +16,8 @@ from typing import (
     Optional,
     TypeVar,
     cast,
+    get_args,
+    get_type_hints,
 )
 
 from lark import Token, Tree
@@ -30,8 +32,15 @@ class Node(ABC):
     O módulo `abc` é usado para criar uma classe abstrata. Isso significa que
     não podemos instanciar essa classe diretamente. Em vez disso, devemos
     criar subclasses que implementem os métodos abstratos definidos aqui.
+
+    Os nós usam `__slots__` (as subclasses são dataclasses com `slots=True`)
+    e os métodos de travessia consultam as tabelas `node_fields` e
+    `child_fields` de cada classe, em vez de examinar as anotações a cada
+    chamada.
     """
 
+    __slots__ = ()
+
     def eval(self, ctx):
         name = type(self).__name__
         raise NotImplementedError(f"Método eval não implementado para {name}!")
@@ -55,7 +64,7 @@ class Node(ABC):
 
         Um nó é considerado uma folha se não tem filhos do tipo `Node`.
         """
-        for name in self.__annotations__:
+        for name in node_fields(type(self)):
             value = getattr(self, name)
             if isinstance(value, (Node, list, tuple, dict)):
                 return False
@@ -73,8 +82,7 @@ class Node(ABC):
 
         yield indent_level, str(self.__class__.__name__) + "("
 
-    
-        for attr in self.__annotations__:
+        for attr in node_fields(type(self)):
             value = getattr(self, attr)
 
             if isinstance(value, Node):
@@ -132,7 +140,7 @@ class Node(ABC):
         Executa a função correspondente ao tipo para cada nó na árvore sintática.
         """
 
-        for name in self.__annotations__:
+        for name in node_fields(type(self)):
             value = getattr(self, name)
             if isinstance(value, Node):
                 value.visit(visitors)
@@ -155,7 +163,7 @@ class Node(ABC):
         do nó atual. Isso é útil para percorrer a árvore sintática de forma
         recursiva.
         """
-        for name in self.__annotations__:
+        for name in child_fields(type(self)):
             value = getattr(self, name)
             if isinstance(value, Node):
                 yield value
@@ -175,7 +183,7 @@ class Node(ABC):
         método ajuda a encontrar nós não-tranformados que podem ter escapado seu
         Transformer.
         """
-        for name in self.__annotations__:
+        for name in node_fields(type(self)):
             value = getattr(self, name)
             if isinstance(value, (Tree, Token)):
                 yield value
@@ -234,7 +242,7 @@ class Node(ABC):
         O método `replace_child` substitui um filho do nó atual por um novo
         nó. Isso é útil para modificar a árvore sintática de forma recursiva.
         """
-        for name in self.__annotations__:
+        for name in child_fields(type(self)):
             value = getattr(self, name)
             if isinstance(value, Node):
                 if value is old:
@@ -286,6 +294,48 @@ class Node(ABC):
             cursor.node.validate_self(cursor)
 
 
+@cache
+def node_fields(cls: type[Node]) -> tuple[str, ...]:
+    """
+    Campos de dados de uma classe de nó (os argumentos do construtor), na
+    ordem da declaração.
+
+    Atributos preenchidos depois da construção (ex.: a linha do código e os
+    endereços calculados por `resolver.py`) são declarados com `init=False`
+    e ficam de fora.
+    """
+    if not is_dataclass(cls):
+        return ()
+    return tuple(f.name for f in fields(cls) if f.init)
+
+
+@cache
+def child_fields(cls: type[Node]) -> tuple[str, ...]:
+    """
+    Campos de `node_fields` que podem guardar nós filhos (um nó, uma lista
+    de nós ou None), de acordo com as anotações de tipo. Campos com tipos
+    simples (nomes, valores literais, listas de parâmetros) são ignorados
+    por `children` e `replace_child`.
+    """
+    try:
+        hints = get_type_hints(cls)
+    except NameError:
+        return node_fields(cls)
+    return tuple(name for name in node_fields(cls) if may_hold_node(hints.get(name, Any)))
+
+
+def may_hold_node(annotation: Any) -> bool:
+    """
+    Verifica se um valor com o tipo anotado pode conter nós.
+    """
+    if isinstance(annotation, type) and not get_args(annotation):
+        return issubclass(annotation, Node)
+    if args := get_args(annotation):
+        return any(may_hold_node(arg) for arg in args)
+    # Any, TypeVar, etc.: na dúvida, o campo é percorrido.
+    return True
+
+
 @dataclass
 class Cursor(Generic[N]):
     """
@@ -453,7 +503,7 @@ def can_print_as_leaf(node: Node) -> bool:
     """
     while node:
         args = []
-        for attr in node.__annotations__:
+        for attr in node_fields(type(node)):
             obj = getattr(node, attr)
             if isinstance(obj, (list, tuple)) and obj:
                 return False
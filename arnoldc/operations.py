@@ -0,0 +1,66 @@
+"""
+Operações dos blocos de atribuição ('GET UP', 'HE HAD TO SPLIT', 'KNOCK
+KNOCK' etc.), com a semântica do interpretador de árvore.
+
+As engines que não aplicam as operações diretamente no laço de execução
+(closures, código Python gerado, representação plana e os blocos
+especializados por `typecheck.py`) usam estas funções, de modo que a
+divisão por zero e o valor de verdade de booleanos e strings são os mesmos
+em todas elas.
+"""
+
+import operator
+from typing import Any, Callable
+
+from .arnoldc_ast import AddOp, AndOp, DivOp, EqOp, GtOp, MulOp, OrOp, SubOp, is_arnoldc_true
+from .errors import ArnoldCError
+
+
+def div(lhs: Any, rhs: Any) -> Any:
+    if rhs == 0:
+        raise ArnoldCError("Divisão por zero!")
+    return lhs // rhs
+
+
+def eq(lhs: Any, rhs: Any) -> int:
+    return 1 if lhs == rhs else 0
+
+
+def gt(lhs: Any, rhs: Any) -> int:
+    return 1 if lhs > rhs else 0
+
+
+def logical_or(lhs: Any, rhs: Any) -> int:
+    return 1 if (is_arnoldc_true(lhs) or is_arnoldc_true(rhs)) else 0
+
+
+def logical_and(lhs: Any, rhs: Any) -> int:
+    return 1 if (is_arnoldc_true(lhs) and is_arnoldc_true(rhs)) else 0
+
+
+def int_or(lhs: int, rhs: int) -> int:
+    return 1 if (lhs or rhs) else 0
+
+
+def int_and(lhs: int, rhs: int) -> int:
+    return 1 if (lhs and rhs) else 0
+
+
+# Operação de cada nó, para valores de qualquer tipo.
+OPERATIONS: dict[type, Callable[[Any, Any], Any]] = {
+    AddOp: operator.add,
+    SubOp: operator.sub,
+    MulOp: operator.mul,
+    DivOp: div,
+    EqOp: eq,
+    GtOp: gt,
+    OrOp: logical_or,
+    AndOp: logical_and,
+}
+
+# Operações entre inteiros (ou booleanos): o valor de verdade é o do Python.
+INT_OPERATIONS: dict[type, Callable[[int, int], int]] = {
+    **OPERATIONS,
+    OrOp: int_or,
+    AndOp: int_and,
+}
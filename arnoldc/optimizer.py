@@ -0,0 +1,310 @@
+"""
+Otimizações da árvore sintática.
+
+O otimizador roda depois do `ArnoldCTransformer` (e da validação) e antes da
+execução, reescrevendo os blocos de atribuição do programa. Todas as engines
+executam a árvore otimizada.
+
+Nível 1 (`-O1`), que mantém o resultado do programa:
+
+* blocos de atribuição com valor inicial e operandos literais são calculados
+  em tempo de compilação. Se uma operação falharia (ex.: divisão por zero),
+  ela e as seguintes ficam para a execução, que reporta o erro normalmente;
+* somas (ou subtrações) consecutivas de literais inteiros viram uma única
+  operação;
+* identidades (`GET UP 0`, `GET DOWN 0`, `YOU'RE FIRED 1`, `HE HAD TO SPLIT 1`)
+  são removidas quando o valor atual certamente é um inteiro (um literal ou
+  o resultado de uma operação com um literal inteiro);
+* `x = x + c` e `x = x - c` viram um `Increment`;
+* chamadas de métodos pequenos são substituídas pelo corpo do método, se
+  ele não puder lançar um erro de tipo (veja `inliner.py`);
+* variáveis que nunca são lidas, métodos que nunca são chamados e ramos que
+  nunca executam são removidos (veja `deadcode.py`).
+
+Nível 2 (`-O2`) usa os tipos inferidos por `typecheck.py`: identidades são
+removidas sempre que o valor atual não pode ser uma string nem um booleano
+(ex.: uma variável que só recebe números), e somas e subtrações de literais
+são agrupadas mesmo quando intercaladas. Valores que a análise não acompanha
+(nomes que o programa não define, vindos do ambiente) são tratados como
+números: se guardarem booleanos ou strings, o valor impresso (`True` em vez
+de `1`) pode mudar e um erro de tipo pode deixar de acontecer. Com strings,
+a mensagem de um erro de tipo também pode mudar (ex.: `GET DOWN 1` seguido
+de `GET UP 1` vira `GET UP 0`). Além disso, os métodos puros que
+retornam valor são memoizados (veja `memo.py`), métodos maiores são
+expandidos nas chamadas, mesmo que possam lançar erros de tipo, e as
+variáveis e métodos globais que não são usados também são removidos.
+"""
+
+from typing import Any, Callable, Optional
+
+from .arnoldc_ast import (
+    AddOp,
+    AssignmentBlock,
+    Bool,
+    DivOp,
+    Expr,
+    If,
+    Increment,
+    Literal,
+    Method,
+    MulOp,
+    OperationExpr,
+    Program,
+    StatementBlock,
+    Stmt,
+    SubOp,
+    Var,
+    While,
+)
+from .ctx import Ctx
+from .node import Node
+from .typecheck import BOOL, INT, STR, Type, TypeInfo, infer_types, operation_type, value_type
+
+LEVELS = (0, 1, 2)
+
+# Strings maiores que isso não são calculadas em tempo de compilação.
+MAX_FOLDED_STRING = 4096
+
+# Operações que não alteram um inteiro, com o operando neutro.
+IDENTITIES: dict[type, int] = {
+    AddOp: 0,
+    SubOp: 0,
+    MulOp: 1,
+    DivOp: 1,
+}
+
+# Tipos de um valor que certamente é um inteiro, de um valor qualquer de
+# ArnoldC e de valores com os quais uma identidade não pode ser removida nem
+# no nível 2.
+INT_ONLY: Type = frozenset({INT})
+VALUES: Type = frozenset({INT, BOOL, STR})
+NOT_NUMBERS: Type = frozenset({STR, BOOL})
+
+
+def int_literal(node: Expr) -> Optional[int]:
+    """
+    Retorna o valor da expressão se ela for um literal inteiro (mas não
+    booleano).
+    """
+    if isinstance(node, Literal) and type(node.value) is int:
+        return node.value
+    return None
+
+
+def constant_node(value: Any) -> Expr:
+    if type(value) is bool:
+        return Bool(value)
+    return Literal(value)
+
+
+def too_long(lhs: Any, rhs: Any) -> bool:
+    """
+    Verifica se a multiplicação produziria uma string grande demais para ser
+    guardada na árvore.
+    """
+    if isinstance(lhs, str) and isinstance(rhs, int):
+        return len(lhs) * rhs > MAX_FOLDED_STRING
+    if isinstance(rhs, str) and isinstance(lhs, int):
+        return len(rhs) * lhs > MAX_FOLDED_STRING
+    return False
+
+
+def apply_operation(op_type: type, lhs: Any, rhs: Any) -> Any:
+    """
+    Calcula uma operação de um bloco de atribuição com a mesma semântica do
+    interpretador: o próprio `AssignmentBlock.eval` é usado sobre literais.
+    """
+    ctx = Ctx.from_dict({"_": None})
+    AssignmentBlock("_", Literal(lhs), [op_type(Literal(rhs))]).eval(ctx)
+    return ctx["_"]
+
+
+class Optimizer:
+    """
+    Reescreve a árvore no lugar. Os métodos `visit_<Classe>` retornam o nó
+    que substitui o nó visitado.
+    """
+
+    def __init__(self, level: int = 1):
+        self.level = level
+        # Tipos inferidos do programa (só no nível 2).
+        self.types: Optional[TypeInfo] = None
+        self._dispatch: dict[type, Callable[[Node], Node]] = {}
+
+    def optimize(self, node: Node) -> Node:
+        cls = type(node)
+        try:
+            handler = self._dispatch[cls]
+        except KeyError:
+            handler = getattr(self, f"visit_{cls.__name__}", self.generic_visit)
+            self._dispatch[cls] = handler
+        return handler(node)
+
+    def generic_visit(self, node: Node) -> Node:
+        return node
+
+    def visit_Program(self, node: Program) -> Program:
+        if self.level >= 2:
+            self.types = infer_types(node)
+        node.stmts = [self.optimize(stmt) for stmt in node.stmts]
+        return node
+
+    def visit_StatementBlock(self, node: StatementBlock) -> StatementBlock:
+        node.stmts = [self.optimize(stmt) for stmt in node.stmts]
+        return node
+
+    def visit_If(self, node: If) -> If:
+        node.then_branch = self.optimize(node.then_branch)
+        if node.else_branch is not None:
+            node.else_branch = self.optimize(node.else_branch)
+        return node
+
+    def visit_While(self, node: While) -> While:
+        node.body = self.optimize(node.body)
+        return node
+
+    def visit_Method(self, node: Method) -> Method:
+        node.body = self.optimize(node.body)
+        return node
+
+    def visit_AssignmentBlock(self, node: AssignmentBlock) -> Stmt:
+        initial, operations = self.fold(node.initial_value_expr, node.operations)
+        operations = self.simplify(initial, operations)
+        node.initial_value_expr = initial
+        node.operations = operations
+
+        if (
+            isinstance(initial, Var)
+            and initial.name == node.target_var
+            and len(operations) == 1
+            and type(operations[0]) in (AddOp, SubOp)
+            and (delta := int_literal(operations[0].operand)) is not None
+        ):
+            if type(operations[0]) is AddOp:
+                return self.increment(node, delta)
+            if delta > 0:
+                # 'GET DOWN 0' continua sendo uma subtração.
+                return self.increment(node, -delta)
+        return node
+
+    def increment(self, node: AssignmentBlock, delta: int) -> Increment:
+        increment = Increment(node.target_var, delta)
+        increment.line = node.line
+        return increment
+
+    def fold(self, initial: Expr, operations: list[OperationExpr]) -> tuple[Expr, list[OperationExpr]]:
+        """
+        Calcula o maior prefixo constante da cadeia de operações.
+        """
+        if not isinstance(initial, (Literal, Bool)):
+            return initial, operations
+
+        value = initial.value
+        folded = 0
+        for op_node in operations:
+            if not isinstance(op_node.operand, (Literal, Bool)):
+                break
+            if isinstance(op_node, MulOp) and too_long(value, op_node.operand.value):
+                break
+            try:
+                value = apply_operation(type(op_node), value, op_node.operand.value)
+            except Exception:
+                break
+            folded += 1
+
+        if folded == 0:
+            return initial, operations
+        return constant_node(value), operations[folded:]
+
+    def simplify(self, initial: Expr, operations: list[OperationExpr]) -> list[OperationExpr]:
+        """
+        Agrupa somas e subtrações de literais e remove identidades.
+        """
+        result: list[OperationExpr] = []
+        # known[i] são os tipos possíveis do valor antes de result[i].
+        known: list[Type] = []
+        t = self.type_of(initial)
+
+        for op_node in operations:
+            operand = int_literal(op_node.operand)
+            if operand is not None and self.is_identity(type(op_node), operand, t):
+                continue
+
+            if operand is not None and result and self.can_merge(result[-1], op_node):
+                merged = self.merge(result[-1], op_node)
+                t = known.pop()
+                result.pop()
+                if self.is_identity(type(merged), int_literal(merged.operand), t):
+                    t = self.result_type(merged, t)
+                    continue
+                op_node = merged
+
+            result.append(op_node)
+            known.append(t)
+            t = self.result_type(op_node, t)
+        return result
+
+    def type_of(self, node: Expr) -> Type:
+        """
+        Tipos possíveis da expressão. Sem a inferência (nível 1), uma
+        variável pode ter qualquer tipo de valor de ArnoldC.
+        """
+        if isinstance(node, Literal):
+            return frozenset({value_type(node.value)})
+        if isinstance(node, Bool):
+            return frozenset({BOOL})
+        if self.types is None:
+            return VALUES
+        return self.types.type_of(node)
+
+    def is_identity(self, op_type: type, operand: int, t: Type) -> bool:
+        if IDENTITIES.get(op_type) != operand:
+            return False
+        return t == INT_ONLY or (self.level >= 2 and not t & NOT_NUMBERS)
+
+    def can_merge(self, previous: OperationExpr, op_node: OperationExpr) -> bool:
+        if int_literal(previous.operand) is None:
+            return False
+        kinds = (type(previous), type(op_node))
+        if self.level >= 2:
+            return all(kind in (AddOp, SubOp) for kind in kinds)
+        return kinds in ((AddOp, AddOp), (SubOp, SubOp))
+
+    def merge(self, previous: OperationExpr, op_node: OperationExpr) -> OperationExpr:
+        if type(previous) is type(op_node):
+            return type(op_node)(Literal(previous.operand.value + op_node.operand.value))
+        total = previous.operand.value - op_node.operand.value
+        if type(previous) is SubOp:
+            total = -total
+        if total < 0:
+            return SubOp(Literal(-total))
+        return AddOp(Literal(total))
+
+    def result_type(self, op_node: OperationExpr, t: Type) -> Type:
+        """
+        Tipos possíveis do resultado da operação (quando não há erro).
+        """
+        return operation_type(type(op_node), t, self.type_of(op_node.operand))[0]
+
+
+def optimize(program: Program, level: int = 1, dead_code: bool = True) -> Program:
+    """
+    Otimiza o programa (no lugar) e o retorna. O nível 0 não altera nada.
+    `dead_code` deve ser falso quando o programa é só um trecho de outro
+    (ex.: um comando executado em fluxo), pois os usos das variáveis podem
+    estar em outros trechos.
+    """
+    if level not in LEVELS:
+        raise ValueError(f"Nível de otimização inválido: {level}")
+    if level == 0:
+        return program
+    program = Optimizer(level).optimize(program)
+    from .inliner import inline_methods
+    inline_methods(program, level)
+    if dead_code:
+        from .deadcode import eliminate_dead_code
+        eliminate_dead_code(program, keep_globals=level < 2)
+    if level >= 2:
+        from .memo import enable_memo
+        enable_memo(program)
+    return program
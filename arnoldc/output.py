@@ -0,0 +1,146 @@
+"""
+Saída dos programas ArnoldC ('TALK TO THE HAND').
+
+Todas as engines escrevem por meio de `emit`, que repassa cada linha para o
+destino (sink) atual. O destino padrão (`StdoutSink`) se comporta como o
+`print` do Python. Outros destinos podem ser instalados com `use_sink`:
+
+* `BufferedSink` acumula as linhas e as escreve em blocos no stream, de
+  acordo com a política de flush: a cada linha ("line"), quando o buffer
+  atinge um tamanho ("size") ou apenas ao final da execução ("exit");
+* `CaptureSink` guarda a saída em memória, para quem usa o interpretador
+  como biblioteca.
+
+`use_sink` sempre esvazia o buffer ao sair, inclusive quando a execução
+termina com um erro.
+"""
+
+import sys
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional, TextIO
+
+FLUSH_POLICIES = ("line", "size", "exit")
+
+# Tamanho padrão do buffer (em caracteres) da política "size".
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+
+class Sink:
+    """
+    Destino da saída dos programas. Subclasses implementam `write` e, se
+    guardarem dados, `flush`.
+    """
+
+    def write(self, text: str) -> None:
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        pass
+
+
+class StdoutSink(Sink):
+    """
+    Escreve cada linha diretamente no `sys.stdout` atual (inclusive quando
+    ele é redirecionado com `contextlib.redirect_stdout`).
+    """
+
+    def write(self, text: str) -> None:
+        sys.stdout.write(text)
+
+
+class BufferedSink(Sink):
+    """
+    Acumula as linhas em memória e as escreve no stream de uma só vez,
+    segundo a política de flush.
+    """
+
+    def __init__(
+        self,
+        stream: Optional[TextIO] = None,
+        policy: str = "size",
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+    ):
+        if policy not in FLUSH_POLICIES:
+            raise ValueError(f"Política de flush desconhecida: {policy!r}. Opções: {', '.join(FLUSH_POLICIES)}")
+        self.stream = stream
+        self.policy = policy
+        self.parts: list[str] = []
+        self.pending = 0
+        match policy:
+            case "line":
+                self.limit = 0
+            case "size":
+                self.limit = buffer_size
+            case "exit":
+                self.limit = float("inf")
+
+    def write(self, text: str) -> None:
+        self.parts.append(text)
+        self.pending += len(text)
+        if self.pending >= self.limit:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.parts:
+            return
+        stream = self.stream if self.stream is not None else sys.stdout
+        stream.write("".join(self.parts))
+        stream.flush()
+        self.parts.clear()
+        self.pending = 0
+
+
+class CaptureSink(Sink):
+    """
+    Guarda toda a saída em memória.
+    """
+
+    def __init__(self):
+        self.parts: list[str] = []
+
+    def write(self, text: str) -> None:
+        self.parts.append(text)
+
+    def getvalue(self) -> str:
+        return "".join(self.parts)
+
+    def lines(self) -> list[str]:
+        return self.getvalue().splitlines()
+
+
+_sink: Sink = StdoutSink()
+
+
+def emit(value: Any) -> None:
+    """
+    Escreve um valor, seguido de uma quebra de linha, no destino atual.
+    """
+    _sink.write(f"{value}\n")
+
+
+def current_sink() -> Sink:
+    return _sink
+
+
+def flush_output() -> None:
+    """
+    Esvazia o buffer do destino atual (ex.: antes de mostrar um erro).
+    """
+    _sink.flush()
+
+
+@contextmanager
+def use_sink(sink: Sink) -> Iterator[Sink]:
+    """
+    Instala `sink` como destino da saída durante o bloco `with`.
+    """
+    global _sink
+    previous = _sink
+    _sink = sink
+    try:
+        yield sink
+    finally:
+        try:
+            sink.flush()
+        finally:
+            _sink = previous
@@ -1,11 +1,22 @@
 """
 Define a gramática da Linguagem e funções para realizar a análise sintática,
 análise léxica, etc.
+
+O parser LALR é construído apenas uma vez por processo (sob demanda) e suas
+tabelas são salvas em disco. Nas execuções seguintes as tabelas são carregadas
+diretamente do cache, evitando recompilar a gramática a cada programa.
 """
 
+import hashlib
+import os
+import re
+import sys
+import tempfile
+from functools import cache
 from pathlib import Path
-from typing import Iterator
+from typing import Any, BinaryIO, Callable, Iterator
 
+import lark
 from lark import Lark, Token, Tree
 
 from .arnoldc_ast import Expr, Program
@@ -14,36 +25,135 @@ from .transformer import ArnoldCTransformer
 DIR = Path(__file__).parent
 GRAMMAR_PATH = DIR / "grammar.lark"
 
+# Incrementar sempre que o formato do cache mudar de forma incompatível.
+CACHE_VERSION = 1
 
-ast_parser = Lark(
-    GRAMMAR_PATH.open(),
-    transformer=ArnoldCTransformer(),
-    parser="lalr",
-    start=["start", "expr"],
-)
-cst_parser = Lark(
-    GRAMMAR_PATH.open(),
-    parser="lalr",
-    start=["start", "expr"],
-)
-
-
-def parse(src: str):
-    with open("arnoldc/grammar.lark", "r") as f:
-        grammar = f.read()
-    
-    ast_parser = Lark(grammar, start="start", parser="lalr", propagate_positions=True)
-    
-    
-    tree = ast_parser.parse(src)
-    # --- Mostrando a árvore sintática bruta (Lark Tree) ---
-    # print("--- RAW PARSE TREE (Lark Tree) ---")
-    # print(tree.pretty()) # This will print a formatted version of the parse tree
-    # print("---------------------------------")
-   
-    tree = ArnoldCTransformer().transform(tree)
-    tree.validate_tree()
-    return tree
+PROGRAM_START = re.compile(r"(?:\s|//[^\n]*)*IT'S SHOWTIME")
+
+PARSER_OPTIONS = {
+    "parser": "lalr",
+    "propagate_positions": True,
+    "start": ["start", "expr"],
+}
+
+
+def cache_dir() -> Path:
+    """
+    Diretório onde o compilador guarda os arquivos de cache.
+
+    Pode ser configurado pela variável de ambiente `ARNOLDC_CACHE_DIR`. Caso
+    contrário, usa `$XDG_CACHE_HOME/arnoldc` (ou `~/.cache/arnoldc`).
+    """
+    if path := os.environ.get("ARNOLDC_CACHE_DIR"):
+        return Path(path)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "arnoldc"
+
+
+@cache
+def grammar_source() -> str:
+    """
+    Retorna o texto da gramática, lido relativo ao pacote (e não ao diretório
+    de trabalho atual).
+    """
+    return GRAMMAR_PATH.read_text(encoding="utf-8")
+
+
+@cache
+def grammar_hash() -> str:
+    """
+    Hash que identifica a gramática e as opções usadas para construir o parser.
+
+    Inclui também as versões do formato de cache, do Lark e do Python, de modo
+    que qualquer mudança invalida automaticamente os arquivos antigos.
+    """
+    key = "\n".join(
+        [
+            grammar_source(),
+            repr(sorted(PARSER_OPTIONS.items())),
+            str(CACHE_VERSION),
+            lark.__version__,
+            "%d.%d" % sys.version_info[:2],
+        ]
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def parser_cache_path() -> Path:
+    """
+    Caminho do arquivo com as tabelas serializadas do parser.
+    """
+    return cache_dir() / f"grammar-{grammar_hash()[:16]}.lark"
+
+
+@cache
+def get_parser() -> Lark:
+    """
+    Retorna o parser LALR da linguagem, compartilhado por todo o processo.
+
+    Tenta carregar as tabelas a partir do cache em disco; se não existirem
+    (ou estiverem corrompidas), constrói o parser e salva o resultado.
+    """
+    path = parser_cache_path()
+    try:
+        with path.open("rb") as f:
+            return Lark.load(f)
+    except Exception:
+        pass
+
+    parser = Lark(grammar_source(), **PARSER_OPTIONS)
+    save_parser(parser, path)
+    return parser
+
+
+def save_parser(parser: Lark, path: Path) -> None:
+    """
+    Salva o parser em disco (veja `atomic_write`).
+    """
+    atomic_write(path, parser.save)
+
+
+def atomic_write(path: Path, write: Callable[[BinaryIO], Any]) -> None:
+    """
+    Escreve um arquivo de cache de forma atômica.
+
+    O arquivo é escrito em um temporário no mesmo diretório e depois movido
+    para o destino, assim processos concorrentes nunca leem um cache pela
+    metade. Falhas de escrita são ignoradas: o cache é só uma otimização.
+    """
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+def parse(src: str) -> Program:
+    """
+    Função que recebe um código fonte e retorna a árvore sintática
+    (já validada) representando o programa.
+    """
+    tree = get_parser().parse(src, start="start")
+    program = ArnoldCTransformer().transform(tree)
+    program.validate_tree()
+    return program
+
+
+def is_program_source(src: str) -> bool:
+    """
+    Verifica se o código começa com 'IT'S SHOWTIME' (após espaços e
+    comentários), isto é, se só pode ser um programa.
+    """
+    return PROGRAM_START.match(src) is not None
 
 
 def parse_expr(src: str) -> Expr:
@@ -52,7 +162,7 @@ def parse_expr(src: str) -> Expr:
     representando uma expressão.
 
     """
-    tree = ast_parser.parse(src, start="expr")
+    tree = ArnoldCTransformer().transform(get_parser().parse(src, start="expr"))
     assert isinstance(tree, Expr), f"Esperava um Expr, mas recebi {type(tree)}"
     tree.validate_tree()
     tree.desugar_tree()
@@ -74,11 +184,11 @@ def parse_cst(src: str, expr: bool = False) -> Tree:
             Se True, analisa o código como se fosse apenas uma expressão.
     """
     start = "expr" if expr else "start"
-    return cst_parser.parse(src, start=start)
+    return get_parser().parse(src, start=start)
 
 
 def lex(src: str) -> Iterator[Token]:
     """
     Retorna um iterador sobre os tokens do código fonte.
     """
-    return ast_parser.lex(src)
\ No newline at end of file
+    return get_parser().lex(src)
@@ -0,0 +1,186 @@
+"""
+Profiler de execução por comando (opções `--profile` e `--flamegraph`).
+
+Durante a execução com profiler, o método `eval` de cada classe de comando
+é substituído por uma versão instrumentada, que conta as execuções de cada
+nó e mede o tempo total (cumulativo) e o tempo próprio (sem os comandos
+internos). Os métodos originais são restaurados ao final, de modo que sem o
+profiler o interpretador não tem custo algum.
+
+A pilha de chamadas segue os comandos ativos e os métodos ArnoldC: o corpo de
+um método aparece como um frame com o nome do método logo abaixo do
+`CallMethod` que o chamou. Além do relatório em texto, o profiler exporta o
+tempo próprio de cada pilha no formato "collapsed" (uma linha
+`frame;frame;frame microssegundos`), lido por ferramentas como o
+`flamegraph.pl` e o speedscope.
+
+O profiler usa o interpretador de árvore, pois as outras engines não
+executam os nós da árvore.
+"""
+
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Optional
+
+from .arnoldc_ast import (
+    AssignmentBlock,
+    CallMethod,
+    If,
+    Increment,
+    Method,
+    Print,
+    Program,
+    Return,
+    StatementBlock,
+    Stmt,
+    VarDef,
+    While,
+)
+from .ctx import Ctx
+
+PROFILED: tuple[type[Stmt], ...] = (
+    AssignmentBlock,
+    CallMethod,
+    If,
+    Increment,
+    Method,
+    Print,
+    Return,
+    StatementBlock,
+    VarDef,
+    While,
+)
+
+
+@dataclass
+class NodeStats:
+    """
+    Estatísticas de um nó (ou do corpo de um método). Tempos em ns.
+    """
+
+    label: str
+    line: Optional[int]
+    frame: str
+    count: int = 0
+    total: int = 0
+    own: int = 0
+
+
+class Profiler:
+    """
+    Coleta as estatísticas da execução de um programa.
+
+    Uso:
+
+        profiler = Profiler(program)
+        with profiler.instrument():
+            evaluate(program, ctx, "tree")
+        print(profiler.report())
+    """
+
+    def __init__(self, program: Program):
+        self.stats: dict[int, NodeStats] = {}
+        self.collapsed: dict[str, int] = {}
+        self.path: list[str] = ["programa"]
+        self.children: list[list[int]] = []
+        self.active: dict[int, int] = {}
+        # O corpo de cada método vira um frame com o nome do método.
+        self.method_bodies: dict[int, Method] = {
+            id(node.body): node for node in program.descendants() if isinstance(node, Method)
+        }
+
+    @contextmanager
+    def instrument(self) -> Iterator["Profiler"]:
+        """
+        Instala a versão instrumentada de `eval` nas classes de comandos
+        durante o bloco `with`.
+        """
+        originals = {cls: cls.__dict__["eval"] for cls in PROFILED}
+        for cls, original in originals.items():
+            cls.eval = self.wrap(original)  # type: ignore[method-assign]
+        try:
+            yield self
+        finally:
+            for cls, original in originals.items():
+                cls.eval = original  # type: ignore[method-assign]
+
+    def wrap(self, original: Callable[[Stmt, Ctx], Any]) -> Callable[[Stmt, Ctx], Any]:
+        profiler = self
+
+        def eval(node: Stmt, ctx: Ctx) -> Any:
+            if type(node) is StatementBlock and id(node) not in profiler.method_bodies:
+                return original(node, ctx)
+            return profiler.call(node, original, ctx)
+
+        return eval
+
+    def node_stats(self, node: Stmt) -> NodeStats:
+        key = id(node)
+        if (stats := self.stats.get(key)) is None:
+            if (method := self.method_bodies.get(key)) is not None:
+                stats = NodeStats(f"{method.name} (método)", method.line, method.name)
+            else:
+                name = type(node).__name__
+                frame = name if node.line is None else f"{name}:{node.line}"
+                stats = NodeStats(name, node.line, frame)
+            self.stats[key] = stats
+        return stats
+
+    def call(self, node: Stmt, original: Callable[[Stmt, Ctx], Any], ctx: Ctx) -> Any:
+        key = id(node)
+        stats = self.node_stats(node)
+        active = self.active
+        active[key] = active.get(key, 0) + 1
+        self.path.append(stats.frame)
+        child_time = [0]
+        self.children.append(child_time)
+        start = time.perf_counter_ns()
+        try:
+            return original(node, ctx)
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            self.children.pop()
+            if self.children:
+                self.children[-1][0] += elapsed
+            own = elapsed - child_time[0]
+            stats.count += 1
+            stats.own += own
+            # Em chamadas recursivas, o tempo total só é contado no nível
+            # mais externo.
+            active[key] -= 1
+            if active[key] == 0:
+                stats.total += elapsed
+            stack = ";".join(self.path)
+            self.collapsed[stack] = self.collapsed.get(stack, 0) + own
+            self.path.pop()
+
+    def report(self, limit: Optional[int] = None) -> str:
+        """
+        Relatório em texto, ordenado pelo tempo próprio.
+        """
+        rows = sorted(self.stats.values(), key=lambda stats: stats.own, reverse=True)
+        if limit is not None:
+            rows = rows[:limit]
+        elapsed = sum(self.collapsed.values())
+        lines = [
+            f"Perfil de execução: {elapsed / 1e6:.2f} ms em comandos",
+            f"{'linha':>6}  {'comando':<24} {'execuções':>10} {'total (ms)':>11} {'próprio (ms)':>13} {'%':>6}",
+        ]
+        for stats in rows:
+            line = "" if stats.line is None else stats.line
+            percent = stats.own / elapsed * 100 if elapsed else 0.0
+            lines.append(
+                f"{line:>6}  {stats.label:<24} {stats.count:>10} "
+                f"{stats.total / 1e6:>11.3f} {stats.own / 1e6:>13.3f} {percent:>5.1f}%"
+            )
+        return "\n".join(lines)
+
+    def write_collapsed(self, path: str) -> None:
+        """
+        Escreve as pilhas no formato "collapsed" (tempo próprio em µs).
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, own in sorted(self.collapsed.items()):
+                if (micros := own // 1000) > 0:
+                    f.write(f"{stack} {micros}\n")
@@ -0,0 +1,185 @@
+"""
+Análise de pureza dos métodos.
+
+Um método é puro quando o seu resultado depende apenas dos argumentos e a
+chamada não tem efeitos visíveis fora dela:
+
+* não usa 'TALK TO THE HAND';
+* só lê e escreve variáveis locais (parâmetros e variáveis declaradas no
+  próprio método);
+* só chama métodos puros, e sempre por um nome que não é reatribuído nem
+  declarado de novo no mesmo escopo em nenhum ponto do programa.
+
+A análise segue a ordem textual do programa, como o `resolver.py`: um nome
+que ainda não foi declarado no ponto da chamada (ex.: função Python do
+ambiente ou método definido mais adiante) torna o método impuro. Métodos
+puros podem ser memoizados com segurança (veja `memo.py`).
+"""
+
+from typing import Callable, Optional
+
+from .arnoldc_ast import (
+    AssignmentBlock,
+    CallMethod,
+    Increment,
+    Method,
+    Print,
+    Program,
+    StatementBlock,
+    Var,
+    VarDef,
+)
+from .node import Node
+
+
+class PurityAnalysis:
+    """
+    Percorre o programa registrando, para cada método, se ele tem algum
+    efeito impuro e quais métodos ele chama.
+
+    Os escopos mapeiam cada nome para o `Method` declarado (ou None para
+    variáveis). Métodos são identificados por `id`, pois os nós não são
+    hasheáveis.
+    """
+
+    def __init__(self):
+        self.scopes: list[dict[str, Optional[Method]]] = []
+        # Método atual e posição do seu escopo de parâmetros em `scopes`.
+        self.stack: list[tuple[Method, int]] = []
+        self.methods: dict[int, Method] = {}
+        self.impure: set[int] = set()
+        self.calls: dict[int, list[Method]] = {}
+        self.assigned: set[str] = set()
+        self._dispatch: dict[type, Callable[[Node], None]] = {}
+
+    def visit(self, node: Node) -> None:
+        cls = type(node)
+        try:
+            handler = self._dispatch[cls]
+        except KeyError:
+            handler = getattr(self, f"visit_{cls.__name__}", self.generic_visit)
+            self._dispatch[cls] = handler
+        handler(node)
+
+    def generic_visit(self, node: Node) -> None:
+        for child in node.children():
+            self.visit(child)
+
+    def lookup(self, name: str) -> tuple[bool, bool, Optional[Method]]:
+        """
+        Retorna (declarado, local ao método atual, método declarado).
+        """
+        base = self.stack[-1][1] if self.stack else 0
+        for i in range(len(self.scopes) - 1, -1, -1):
+            scope = self.scopes[i]
+            if name in scope:
+                return True, i >= base, scope[name]
+        return False, False, None
+
+    def mark_impure(self) -> None:
+        if self.stack:
+            self.impure.add(id(self.stack[-1][0]))
+
+    def use_local(self, name: str) -> None:
+        if not self.stack:
+            return
+        _, local, _ = self.lookup(name)
+        if not local:
+            self.mark_impure()
+
+    def visit_Program(self, node: Program) -> None:
+        self.scopes.append({})
+        try:
+            for stmt in node.stmts:
+                self.visit(stmt)
+        finally:
+            self.scopes.pop()
+
+    def visit_StatementBlock(self, node: StatementBlock) -> None:
+        self.scopes.append({})
+        try:
+            for stmt in node.stmts:
+                self.visit(stmt)
+        finally:
+            self.scopes.pop()
+
+    def declare(self, name: str, method: Optional[Method]) -> None:
+        # Uma nova declaração no mesmo escopo (ex.: um método definido duas
+        # vezes no nível mais externo) troca o valor do nome, como uma
+        # atribuição.
+        scope = self.scopes[-1]
+        if name in scope:
+            self.assigned.add(name)
+        scope[name] = method
+
+    def visit_VarDef(self, node: VarDef) -> None:
+        self.visit(node.value)
+        self.declare(node.name, None)
+
+    def visit_Method(self, node: Method) -> None:
+        self.declare(node.name, node)
+        self.methods[id(node)] = node
+        self.calls[id(node)] = []
+        self.stack.append((node, len(self.scopes)))
+        self.scopes.append({param: None for param in node.params})
+        try:
+            self.visit(node.body)
+        finally:
+            self.scopes.pop()
+            self.stack.pop()
+
+    def visit_Var(self, node: Var) -> None:
+        self.use_local(node.name)
+
+    def visit_Print(self, node: Print) -> None:
+        self.mark_impure()
+        self.generic_visit(node)
+
+    def visit_AssignmentBlock(self, node: AssignmentBlock) -> None:
+        self.generic_visit(node)
+        self.assigned.add(node.target_var)
+        self.use_local(node.target_var)
+
+    def visit_Increment(self, node: Increment) -> None:
+        self.assigned.add(node.target_var)
+        self.use_local(node.target_var)
+
+    def visit_CallMethod(self, node: CallMethod) -> None:
+        self.generic_visit(node)
+        self.assigned.add(node.result_var)
+        self.use_local(node.result_var)
+        if not self.stack:
+            return
+        _, _, method = self.lookup(node.method_name)
+        if method is None:
+            self.mark_impure()
+        else:
+            self.calls[id(self.stack[-1][0])].append(method)
+
+    def pure_methods(self) -> list[Method]:
+        """
+        Métodos puros, calculados a partir das informações coletadas: um
+        método que chama um método impuro também é impuro.
+        """
+        pure = {
+            key
+            for key, method in self.methods.items()
+            if key not in self.impure and method.name not in self.assigned
+        }
+        changed = True
+        while changed:
+            changed = False
+            for key in list(pure):
+                if any(id(callee) not in pure for callee in self.calls[key]):
+                    pure.discard(key)
+                    changed = True
+        return [method for key, method in self.methods.items() if key in pure]
+
+
+def pure_methods(program: Program) -> list[Method]:
+    """
+    Lista os métodos puros do programa, na ordem em que aparecem.
+    """
+    analysis = PurityAnalysis()
+    analysis.visit(program)
+    return analysis.pure_methods()
@@ -0,0 +1,259 @@
+"""
+Resolução estática de escopos.
+
+O resolvedor percorre a árvore uma vez e anota cada acesso a variável (`Var`,
+alvos de `AssignmentBlock` e `Increment`, método e variável de resultado de
+`CallMethod`) com um endereço (profundidade, posição). Cada `StatementBlock`
+e cada chamada de método recebem um `Frame` com o número de posições
+calculado aqui, de modo que o interpretador de árvore não precisa buscar
+nomes em dicionários ao longo da cadeia de escopos. Blocos que não declaram
+variáveis não criam escopo algum e, por isso, não contam na profundidade.
+
+As variáveis do nível mais externo do programa continuam no `Ctx` global
+(endereço `GLOBAL`), assim como nomes que não foram declarados no programa
+(ex.: funções Python passadas no ambiente inicial).
+
+A resolução segue a ordem textual do programa, que é a mesma ordem em que o
+interpretador executa as declarações. A única exceção são métodos: o corpo
+roda depois da definição, então um nome usado dentro do método que só é
+declarado mais adiante em um bloco externo recebe o endereço `DYNAMIC` e é
+buscado pelo nome em tempo de execução.
+
+O resolvedor também marca as chamadas recursivas em posição de cauda: um
+`CallMethod` do próprio método seguido imediatamente por 'I'LL BE BACK' da
+variável de resultado (local ao método). As engines executam essas
+chamadas em um laço, sem aumentar a pilha (veja `Method.eval`). Os laços
+contados (veja `loops.py`) são marcados em `While.counted`.
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from .arnoldc_ast import (
+    AssignmentBlock,
+    CallMethod,
+    Increment,
+    Method,
+    Program,
+    Return,
+    StatementBlock,
+    Stmt,
+    Var,
+    VarDef,
+    While,
+)
+from .ctx import DYNAMIC, GLOBAL, UNSET
+from .loops import counted_loop
+from .node import Node
+
+
+@dataclass
+class Scope:
+    """
+    Escopo em tempo de compilação: corresponde a um `Frame` em tempo de
+    execução.
+
+    `index` guarda as variáveis já declaradas (na ordem textual) e `pending`
+    todos os nomes declarados diretamente no bloco, inclusive os que ainda
+    não apareceram. `method` indica o escopo de parâmetros de um método.
+    """
+
+    index: dict[str, int] = field(default_factory=dict)
+    pending: set[str] = field(default_factory=set)
+    method: bool = False
+
+    def declare(self, name: str) -> int:
+        if name not in self.index:
+            self.index[name] = len(self.index)
+        return self.index[name]
+
+
+class Resolver:
+    """
+    Anota a árvore com os endereços das variáveis.
+
+    O escopo global é representado por `None` na pilha de escopos. O
+    atributo `dynamic` indica se algum nome recebeu o endereço `DYNAMIC`.
+    """
+
+    def __init__(self):
+        self.scopes: list[Optional[Scope]] = []
+        self.dynamic = False
+        self.methods = 0
+        self.method_stack: list[Method] = []
+        self._dispatch: dict[type, Callable[[Node], None]] = {}
+
+    def resolve(self, node: Node) -> None:
+        cls = type(node)
+        try:
+            handler = self._dispatch[cls]
+        except KeyError:
+            handler = getattr(self, f"visit_{cls.__name__}", self.generic_visit)
+            self._dispatch[cls] = handler
+        handler(node)
+
+    def generic_visit(self, node: Node) -> None:
+        for child in node.children():
+            self.resolve(child)
+
+    def lookup(self, name: str) -> tuple[int, int]:
+        """
+        Retorna o endereço (profundidade, posição) de um nome no ponto atual
+        do programa.
+        """
+        depth = 0
+        in_method = False
+        for scope in reversed(self.scopes):
+            if scope is None:
+                break
+            if name in scope.index:
+                return depth, scope.index[name]
+            if in_method and name in scope.pending:
+                self.dynamic = True
+                return DYNAMIC, 0
+            in_method = in_method or scope.method
+            depth += 1
+        return GLOBAL, 0
+
+    def is_local(self, name: str) -> bool:
+        """
+        Verifica se o nome é um parâmetro ou variável do método atual.
+        """
+        for scope in reversed(self.scopes):
+            if scope is None:
+                return False
+            if name in scope.index:
+                return True
+            if scope.method:
+                return False
+        return False
+
+    def declare(self, name: str) -> Optional[int]:
+        """
+        Declara o nome no escopo atual e retorna a sua posição (ou None no
+        escopo global).
+        """
+        scope = self.scopes[-1] if self.scopes else None
+        if scope is None:
+            return None
+        return scope.declare(name)
+
+    def visit_Program(self, node: Program) -> None:
+        self.scopes.append(None)
+        try:
+            for stmt in node.stmts:
+                self.resolve(stmt)
+        finally:
+            self.scopes.pop()
+
+    def visit_StatementBlock(self, node: StatementBlock) -> None:
+        pending = {stmt.name for stmt in node.stmts if isinstance(stmt, (VarDef, Method))}
+        if not pending:
+            # Sem declarações, o bloco executa no escopo de quem o contém.
+            node.new_scope = False
+            self.resolve_stmts(node.stmts)
+            return
+
+        scope = Scope(pending=pending)
+        methods = self.methods
+        self.scopes.append(scope)
+        try:
+            self.resolve_stmts(node.stmts)
+        finally:
+            self.scopes.pop()
+        node.new_scope = True
+        node.slot_index = scope.index
+        node.nslots = len(scope.index)
+        node.blank = [UNSET] * node.nslots
+        # Frames de blocos que definem métodos (em qualquer nível) podem ser
+        # capturados e continuar vivos depois do bloco; os demais são
+        # reaproveitados.
+        node.pool = [] if self.methods == methods else None
+
+    def resolve_stmts(self, stmts: list[Stmt]) -> None:
+        for i, stmt in enumerate(stmts):
+            self.resolve(stmt)
+            if isinstance(stmt, CallMethod) and i + 1 < len(stmts):
+                stmt.tail = self.tail_method(stmt, stmts[i + 1])
+
+    def tail_method(self, call: CallMethod, following: Stmt) -> Optional[Method]:
+        """
+        Retorna o método atual se `call` for uma chamada recursiva em
+        posição de cauda (seguida de 'I'LL BE BACK' do resultado).
+
+        A variável de resultado precisa ser local: o valor só é visível pelo
+        'I'LL BE BACK' e pode deixar de ser escrito. Se o nome do método
+        apontar para outro valor em tempo de execução, `CallMethod.eval`
+        faz uma chamada comum.
+        """
+        if not self.method_stack:
+            return None
+        method = self.method_stack[-1]
+        if not method.returns_value or call.method_name != method.name:
+            return None
+        if not isinstance(following, Return) or not isinstance(following.value, Var):
+            return None
+        if following.value.name != call.result_var or not self.is_local(call.result_var):
+            return None
+        return method
+
+    def visit_While(self, node: While) -> None:
+        self.generic_visit(node)
+        node.counted = counted_loop(node)
+
+    def visit_Var(self, node: Var) -> None:
+        node.depth, node.slot = self.lookup(node.name)
+
+    def visit_VarDef(self, node: VarDef) -> None:
+        # O valor inicial é avaliado antes da declaração.
+        self.resolve(node.value)
+        node.slot = self.declare(node.name)
+
+    def visit_AssignmentBlock(self, node: AssignmentBlock) -> None:
+        self.generic_visit(node)
+        node.target_depth, node.target_slot = self.lookup(node.target_var)
+
+    def visit_Increment(self, node: Increment) -> None:
+        node.target_depth, node.target_slot = self.lookup(node.target_var)
+
+    def visit_CallMethod(self, node: CallMethod) -> None:
+        node.method_depth, node.method_slot = self.lookup(node.method_name)
+        self.generic_visit(node)
+        node.result_depth, node.result_slot = self.lookup(node.result_var)
+
+    def visit_Method(self, node: Method) -> None:
+        # O nome é declarado antes do corpo para permitir recursão.
+        self.methods += 1
+        node.slot = self.declare(node.name)
+        scope = Scope(method=True)
+        for param in node.params:
+            scope.declare(param)
+        node.param_index = scope.index
+        self.scopes.append(scope)
+        self.method_stack.append(node)
+        try:
+            self.resolve(node.body)
+        finally:
+            self.method_stack.pop()
+            self.scopes.pop()
+
+
+def resolve(node: Node) -> None:
+    """
+    Calcula os endereços das variáveis do nó e de todos os seus descendentes.
+    """
+    Resolver().resolve(node)
+
+
+def needs_dynamic_lookup(node: Node) -> bool:
+    """
+    Verifica se algum método do programa usa um nome que só é declarado
+    depois da definição do método em um bloco externo.
+
+    A VM e a engine "py" resolvem todos os nomes em tempo de compilação e não
+    suportam esse caso; programas assim são executados pelo interpretador de
+    árvore.
+    """
+    resolver = Resolver()
+    resolver.resolve(node)
+    return resolver.dynamic
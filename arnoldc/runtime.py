@@ -1,14 +1,13 @@
-import builtins
 from dataclasses import dataclass
 from typing import TYPE_CHECKING, Optional
 
 from arnoldc.arnoldc_ast import Program
 
 from .ctx import Ctx
+from .output import emit
 
 if TYPE_CHECKING:
     from .arnoldc_ast import Stmt, Value
-    from .errors import ForceReturn
 
 __all__ = [
     "print_arnoldc", 
@@ -38,15 +37,15 @@ class ArnoldCMethod:
         for param_name, arg_value in zip(self.params, args):
             exec_ctx.var_def(param_name, arg_value)
 
-        try:
-            for stmt in self.body:
-                stmt.eval(exec_ctx)
-        except ForceReturn as ex:
-            if self.returns_value and ex.value is None:
+        for stmt in self.body:
+            completion = stmt.eval(exec_ctx)
+            if completion is None:
+                continue
+            if self.returns_value and completion.value is None:
                 raise ArnoldCError(f"Método '{self.name}' deve retornar um valor explícito.")
-            if not self.returns_value and ex.value is not None:
+            if not self.returns_value and completion.value is not None:
                 raise ArnoldCError(f"Método void '{self.name}' não pode retornar um valor.")
-            return ex.value 
+            return completion.value
 
         if self.returns_value:
             raise ArnoldCError(f"Método '{self.name}' que retorna valor não possui 'I'LL BE BACK' explícito.")
@@ -68,9 +67,61 @@ class ArnoldCError(Exception):
 # --- FUNÇÕES AUXILIARES ---
 
 def print_arnoldc(value: "Value") -> None:
-    builtins.print(value)
-
-
-def evaluate(program: "Program", ctx: Ctx) -> None:
-    for stmt in program.stmts:
-        stmt.eval(ctx)
\ No newline at end of file
+    emit(value)
+
+
+ENGINES = ("tree", "closure", "vm", "py", "flat", "tiered")
+
+
+def evaluate(program: "Program", ctx: Ctx, engine: str = "tree") -> None:
+    """
+    Executa o programa usando a engine escolhida:
+
+    * "tree": interpretador que percorre a árvore sintática (referência).
+      Condições e blocos de atribuição que só lidam com inteiros são
+      especializados antes da execução (veja `typecheck.py`).
+    * "closure": converte cada nó em uma closure especializada, que executa
+      sobre o mesmo `Ctx` do interpretador de árvore.
+    * "vm": compila o programa para bytecode e o executa na máquina virtual.
+    * "py": traduz o programa para Python e executa o código compilado.
+    * "flat": converte o programa para a representação plana (`flat.py`)
+      e o executa sobre os vetores.
+    * "tiered": interpretador de árvore que compila para funções Python os
+      métodos e laços mais executados (veja `tiers.py`).
+
+    Programas com nomes que precisam ser buscados dinamicamente (veja
+    `resolver.needs_dynamic_lookup`) são executados pelo interpretador de
+    árvore nas engines "vm" e "py".
+    """
+    from .resolver import needs_dynamic_lookup, resolve
+    from .typecheck import specialize
+
+    match engine:
+        case "tree":
+            resolve(program)
+            specialize(program, ctx)
+            program.eval(ctx)
+        case "vm" | "py" if needs_dynamic_lookup(program):
+            evaluate(program, ctx, "tree")
+        case "closure":
+            from .closures import run_program
+
+            run_program(program, ctx)
+        case "vm":
+            from .vm import run_program
+
+            run_program(program, ctx)
+        case "py":
+            from .transpiler import run_program
+
+            run_program(program, ctx)
+        case "flat":
+            from .flat import run_program
+
+            run_program(program, ctx)
+        case "tiered":
+            from .tiers import run_program
+
+            run_program(program, ctx)
+        case _:
+            raise ValueError(f"Engine desconhecida: {engine!r}. Opções: {', '.join(ENGINES)}")
\ No newline at end of file
@@ -0,0 +1,165 @@
+"""
+Execução em fluxo de programas muito grandes (opção `--stream`).
+
+O arquivo é mapeado na memória com `mmap`, sem ser lido inteiro para uma
+string. As palavras-chave são encontradas com a mesma expressão regular do
+parsing incremental (veja `incremental.py`), aplicada diretamente sobre os
+bytes, e cada comando do nível mais externo é decodificado, analisado,
+validado e entregue ao interpretador assim que termina (comandos pequenos
+são agrupados em trechos de até `CHUNK_SIZE` bytes). A linha de cada trecho
+só é calculada quando ele é entregue.
+
+Assim, a execução dos primeiros comandos começa antes do parsing dos
+seguintes e a memória usada fica limitada ao maior trecho do programa (e
+aos métodos já definidos), em vez de guardar ao mesmo tempo o código, a
+árvore do Lark e a árvore sintática do programa inteiro.
+
+Diferente da execução normal, um erro de sintaxe no meio do arquivo só é
+reportado depois que os comandos anteriores executaram. Apenas o
+interpretador de árvore suporta a execução em fluxo.
+"""
+
+import mmap
+import re
+from contextlib import closing, contextmanager, nullcontext
+from functools import cache
+from typing import Iterator, Optional
+
+from .arnoldc_ast import Program, Stmt, raise_return_outside_method
+from .ctx import Ctx
+from .errors import ArnoldCError, report_errors
+from .incremental import CLOSERS, END, OPENERS, START, STATEMENT_KEYWORDS, keywords, parse_region
+from .optimizer import optimize
+from .output import Sink, use_sink
+from .resolver import Resolver
+
+Buffer = bytes | mmap.mmap
+
+# Comandos pequenos e consecutivos são analisados juntos, em trechos de
+# aproximadamente este tamanho (em bytes), para diluir o custo fixo de cada
+# chamada ao parser.
+CHUNK_SIZE = 64 * 1024
+
+
+@cache
+def byte_keyword_pattern() -> re.Pattern:
+    """
+    Versão em bytes de `incremental.keyword_pattern`. Bytes não ASCII contam
+    como letras, como no `\\w` do lexer.
+    """
+    alternatives = b"|".join(re.escape(keyword.encode("utf-8")) for keyword in keywords())
+    return re.compile(rb'"[^"]*"|//[^\n]*|(?P<keyword>' + alternatives + rb")|[a-zA-Z_](?:\w|[\x80-\xff])*")
+
+
+@contextmanager
+def open_source(path: str) -> Iterator[Buffer]:
+    """
+    Mapeia o arquivo na memória (somente leitura).
+    """
+    with open(path, "rb") as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Arquivos vazios não podem ser mapeados.
+            yield b""
+            return
+        with buffer:
+            yield buffer
+
+
+def blank(chunk: bytes) -> bool:
+    return not re.sub(rb"//[^\n]*", b"", chunk).strip()
+
+
+def iter_regions(buffer: Buffer, chunk_size: int = CHUNK_SIZE) -> Iterator[tuple[str, int]]:
+    """
+    Produz os trechos (texto, linha inicial) do programa, à medida que são
+    encontrados. Cada trecho tem um ou mais comandos do nível mais externo
+    completos: comandos consecutivos são agrupados até `chunk_size` bytes.
+    """
+    begin = start = None
+    line = 1
+    depth = 0
+    for match in byte_keyword_pattern().finditer(buffer):
+        keyword = match.group("keyword")
+        if keyword is None:
+            continue
+        keyword = keyword.decode("utf-8")
+        if begin is None:
+            if keyword != START or not blank(buffer[: match.start()]):
+                raise ArnoldCError(f"O programa deve começar com '{START}'.")
+            begin = match.end()
+            continue
+        if depth == 0 and (keyword == END or keyword in STATEMENT_KEYWORDS):
+            if start is None:
+                if not blank(buffer[begin : match.start()]):
+                    raise ArnoldCError(f"Código inválido logo após '{START}'.")
+                line += buffer[: match.start()].count(b"\n")
+                start = match.start()
+            elif keyword == END or match.start() - start >= chunk_size:
+                text = buffer[start : match.start()].decode("utf-8")
+                yield text, line
+                line += text.count("\n")
+                start = match.start()
+            if keyword == END:
+                if not blank(buffer[match.end() :]):
+                    raise ArnoldCError(f"Código inválido depois de '{END}'.")
+                return
+        if keyword in OPENERS:
+            depth += 1
+        elif keyword in CLOSERS:
+            # Um fechamento sobrando é reportado pelo parser do trecho.
+            depth = max(depth - 1, 0)
+
+    if begin is None:
+        raise ArnoldCError(f"O programa deve começar com '{START}'.")
+    if start is not None:
+        # Sem o fim do programa (ou com um bloco aberto): o parser do último
+        # trecho reporta o erro.
+        text = buffer[start:].decode("utf-8")
+        yield text, line
+    raise ArnoldCError(f"O programa deve terminar com '{END}'.")
+
+
+def iter_statements(buffer: Buffer) -> Iterator[Stmt]:
+    """
+    Produz os comandos do nível mais externo, já validados.
+    """
+    for text, line in iter_regions(buffer):
+        region = parse_region(text, line)
+        if region.error is not None:
+            raise region.error
+        yield from region.stmts
+
+
+def run_statements(statements: Iterator[Stmt], ctx: Ctx, opt_level: int = 0) -> None:
+    """
+    Executa os comandos com o interpretador de árvore, um de cada vez. O
+    resolvedor mantém o escopo global entre os comandos.
+    """
+    resolver = Resolver()
+    resolver.scopes.append(None)
+    for stmt in statements:
+        if opt_level:
+            stmt = optimize(Program([stmt]), opt_level, dead_code=False).stmts[0]
+        resolver.resolve(stmt)
+        if stmt.eval(ctx) is not None:
+            raise_return_outside_method()
+
+
+def eval_stream(
+    path: str,
+    env: Optional[Ctx] = None,
+    opt_level: int = 0,
+    output: Optional[Sink] = None,
+) -> None:
+    """
+    Executa o arquivo em fluxo. Os erros são reportados como em
+    `arnoldc_eval`.
+    """
+    if env is None:
+        env = Ctx.from_dict({})
+    with open_source(path) as buffer, use_sink(output) if output is not None else nullcontext():
+        # O gerador precisa ser fechado antes do `mmap`.
+        with closing(iter_statements(buffer)) as statements, report_errors(env):
+            run_statements(statements, env, opt_level)
@@ -0,0 +1,705 @@
+"""
+Execução em camadas (engine "tiered").
+
+Compilar todos os métodos antes da execução desperdiça tempo em programas
+curtos, e apenas interpretar desperdiça tempo em programas longos. Nesta
+engine, o programa começa no interpretador de árvore e cada método e cada
+laço ganha um contador: de chamadas (anotado em `Method.tier` e consultado
+pelo callable criado em `Method.eval`) ou de iterações (`While.tier`,
+consultado em `While.eval`). Quando o contador atinge o limite da sua
+camada, o corpo do método ou o laço inteiro é compilado para uma função
+Python em uma thread separada e, assim que a compilação termina, as
+próximas chamadas (ou iterações, no caso de um laço em andamento) passam a
+usar o código compilado.
+
+O código é gerado por `FrameCodeGenerator` a partir da árvore já resolvida
+e usa os mesmos `Frame`s do interpretador de árvore, com as variáveis
+acessadas diretamente pelos endereços calculados por `resolver.py`. Assim,
+o estado de um laço ou de um método não precisa ser convertido na troca de
+camada, e o código compilado e o interpretado podem se chamar livremente.
+Se a compilação falhar (ex.: blocos aninhados demais para o CPython), o
+método ou laço continua interpretado.
+
+Os limites e os eventos de promoção ficam no `TierManager` usado na
+execução:
+
+    manager = TierManager(method_threshold=50)
+    with use_tiers(manager):
+        arnoldc_eval(program, engine="tiered")
+    print(manager.report())      # ou manager.stats(), em um dicionário
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Iterator, Optional
+
+from .arnoldc_ast import (
+    AddOp,
+    AndOp,
+    AssignmentBlock,
+    Bool,
+    CallMethod,
+    Completion,
+    DivOp,
+    EqOp,
+    Expr,
+    GtOp,
+    If,
+    Increment,
+    Literal,
+    Method,
+    MulOp,
+    OrOp,
+    Print,
+    Program,
+    Return,
+    StatementBlock,
+    Stmt,
+    SubOp,
+    TailCall,
+    Var,
+    VarDef,
+    While,
+    is_arnoldc_true,
+)
+from .closures import Thunk
+from .ctx import UNSET, Ctx, Frame
+from .errors import ForceReturn
+from .transpiler import INDENT, helpers
+
+# Limites padrão: número de chamadas de um método e de iterações de um laço
+# antes da compilação.
+METHOD_THRESHOLD = 100
+LOOP_THRESHOLD = 1000
+
+
+#
+# GERAÇÃO DE CÓDIGO SOBRE FRAMES
+#
+
+
+def _redeclared(name: str) -> None:
+    raise NameError(f"Variável '{name}' já foi declarada neste escopo.")
+
+
+class FrameCodeGenerator:
+    """
+    Gera uma função Python que executa um trecho de uma árvore já resolvida
+    sobre os frames do interpretador de árvore.
+
+    A função recebe o contexto do trecho em `_f0`. Cada bloco que cria um
+    escopo aumenta o nível atual: o frame do nível L fica em `_fL` e o seu
+    vetor de variáveis em `_sL`, de modo que uma variável com endereço
+    (profundidade, posição) vira apenas `_s<L - profundidade>[posição]`.
+    Os nós, índices e demais objetos usados pelo código ficam em constantes
+    `_K0`, `_K1`, ...
+    """
+
+    def __init__(self):
+        self.lines: list[str] = []
+        self.indent = 1
+        self.level = 0
+        self.loops = 0
+        self.constants: dict[str, Any] = {}
+
+    def compile_function(self, node: Stmt, name: str) -> Thunk:
+        self.stmt(node)
+        source = "\n".join(
+            [
+                "def __arnoldc_tier__(_f0):",
+                f"{INDENT}_s0 = _f0.slots if _f0.__class__ is _Frame else None",
+                *self.lines,
+                f"{INDENT}return None",
+                "",
+            ]
+        )
+        namespace = {
+            **helpers(),
+            "_Frame": Frame,
+            "_UNSET": UNSET,
+            "_Completion": Completion,
+            "_TailCall": TailCall,
+            "_ForceReturn": ForceReturn,
+            "_redeclared": _redeclared,
+            **self.constants,
+        }
+        exec(compile(source, f"<arnoldc:{name}>", "exec"), namespace)
+        return namespace["__arnoldc_tier__"]
+
+    def line(self, text: str) -> None:
+        self.lines.append(INDENT * self.indent + text)
+
+    def constant(self, value: Any) -> str:
+        name = f"_K{len(self.constants)}"
+        self.constants[name] = value
+        return name
+
+    #
+    # Variáveis
+    #
+
+    def load(self, name: str, depth: int, slot: int) -> str:
+        level = self.level
+        if 0 <= depth <= level:
+            return f"_s{level - depth}[{slot}]"
+        if depth > level:
+            return f"_f0.load({name!r}, {depth - level}, {slot})"
+        return f"_f{level}.load({name!r}, {depth}, {slot})"
+
+    def store(self, name: str, depth: int, slot: int, value: str) -> None:
+        level = self.level
+        if 0 <= depth <= level:
+            self.line(f"_s{level - depth}[{slot}] = {value}")
+        elif depth > level:
+            self.line(f"_f0.store({name!r}, {depth - level}, {slot}, {value})")
+        else:
+            self.line(f"_f{level}.store({name!r}, {depth}, {slot}, {value})")
+
+    #
+    # Expressões
+    #
+
+    def expr(self, node: Expr) -> str:
+        if isinstance(node, Var):
+            return self.load(node.name, node.depth, node.slot)
+        elif isinstance(node, (Literal, Bool)):
+            return repr(node.value)
+        raise NotImplementedError(f"Expressão não suportada: {type(node).__name__}")
+
+    def truth(self, node: Expr) -> str:
+        if isinstance(node, (Literal, Bool)):
+            return repr(is_arnoldc_true(node.value))
+        return f"(_t if (_t := {self.expr(node)}).__class__ is int else _truth(_t))"
+
+    #
+    # Comandos
+    #
+
+    def stmt(self, node: Stmt) -> None:
+        method = getattr(self, f"stmt_{type(node).__name__}", None)
+        if method is None:
+            raise NotImplementedError(f"Comando não suportado: {type(node).__name__}")
+        method(node)
+
+    def stmts(self, stmts: list[Stmt]) -> None:
+        start = len(self.lines)
+        for stmt in stmts:
+            self.stmt(stmt)
+        if len(self.lines) == start:
+            self.line("pass")
+
+    def indented(self, stmts: list[Stmt]) -> None:
+        self.indent += 1
+        self.stmts(stmts)
+        self.indent -= 1
+
+    def enter_frame(self, node: StatementBlock) -> int:
+        """
+        Cria o frame de um bloco sem pool e retorna o novo nível.
+        """
+        self.level += 1
+        level = self.level
+        index = self.constant(node.slot_index or {})
+        self.line(f"_f{level} = _Frame({index}, [_UNSET] * {node.nslots}, _f{level - 1})")
+        self.line(f"_s{level} = _f{level}.slots")
+        return level
+
+    def stmt_StatementBlock(self, node: StatementBlock) -> None:
+        if not node.new_scope:
+            self.stmts(node.stmts)
+            return
+        if node.pool is None:
+            self.enter_frame(node)
+            self.stmts(node.stmts)
+            self.level -= 1
+            return
+
+        block = self.constant(node)
+        self.level += 1
+        level = self.level
+        self.line(f"_f{level} = {block}.acquire(_f{level - 1})")
+        self.line(f"_s{level} = _f{level}.slots")
+        self.line("try:")
+        self.indented(node.stmts)
+        self.line("finally:")
+        self.line(f"{INDENT}{block}.release(_f{level})")
+        self.level -= 1
+
+    def stmt_Print(self, node: Print) -> None:
+        self.line(f"_print({self.expr(node.target)})")
+
+    def stmt_Return(self, node: Return) -> None:
+        value = self.expr(node.value) if node.value is not None else "None"
+        self.line(f"return _Completion({value})")
+
+    def stmt_VarDef(self, node: VarDef) -> None:
+        value = self.expr(node.value)
+        if node.slot is None:
+            self.line(f"_f{self.level}.var_def({node.name!r}, {value})")
+            return
+        slots = f"_s{self.level}[{node.slot}]"
+        self.line(f"_v = {value}")
+        self.line(f"if {slots} is not _UNSET:")
+        self.line(f"{INDENT}_redeclared({node.name!r})")
+        self.line(f"{slots} = _v")
+
+    def stmt_AssignmentBlock(self, node: AssignmentBlock) -> None:
+        value = self.expr(node.initial_value_expr)
+        for op_node in node.operations:
+            operand = self.expr(op_node.operand)
+            match op_node:
+                case AddOp():
+                    value = f"({value} + {operand})"
+                case SubOp():
+                    value = f"({value} - {operand})"
+                case MulOp():
+                    value = f"({value} * {operand})"
+                case DivOp() if isinstance(op_node.operand, Literal) and op_node.operand.value != 0:
+                    value = f"({value} // {operand})"
+                case DivOp():
+                    value = f"_div({value}, {operand})"
+                case EqOp():
+                    value = f"(1 if {value} == {operand} else 0)"
+                case GtOp():
+                    value = f"(1 if {value} > {operand} else 0)"
+                case OrOp():
+                    value = f"_or({value}, {operand})"
+                case AndOp():
+                    value = f"_and({value}, {operand})"
+                case _:
+                    msg = f"Operação ArnoldC não implementada: {type(op_node).__name__}"
+                    raise NotImplementedError(msg)
+        self.store(node.target_var, node.target_depth, node.target_slot, value)
+
+    def stmt_Increment(self, node: Increment) -> None:
+        value = self.load(node.target_var, node.target_depth, node.target_slot)
+        if node.delta < 0:
+            value = f"({value} - {-node.delta!r})"
+        else:
+            value = f"({value} + {node.delta!r})"
+        self.store(node.target_var, node.target_depth, node.target_slot, value)
+
+    def stmt_If(self, node: If) -> None:
+        self.line(f"if {self.truth(node.cond)}:")
+        self.indent += 1
+        self.stmt_StatementBlock(node.then_branch)
+        self.indent -= 1
+        if node.else_branch is not None and node.else_branch.stmts:
+            self.line("else:")
+            self.indent += 1
+            self.stmt_StatementBlock(node.else_branch)
+            self.indent -= 1
+
+    def stmt_While(self, node: While) -> None:
+        if node.counted is None:
+            self.loop(node)
+            return
+
+        # Laço contado (veja `loops.py`): o caminho comum só é usado quando
+        # o valor inicial do contador não é adequado.
+        counted = node.counted
+        self.loops += 1
+        start, value = f"_c{self.loops}", f"_i{self.loops}"
+        loop = self.constant(counted)
+        self.line(f"{start} = {loop}.start(_f{self.level})")
+        self.line(f"if {start}:")
+        self.indent += 1
+        if counted.accumulators is not None:
+            self.line(f"if not {loop}.close(_f{self.level}, {start}):")
+            self.indent += 1
+            self.counted_loop(node, start, value)
+            self.indent -= 1
+        else:
+            self.counted_loop(node, start, value)
+        self.indent -= 1
+        self.line("else:")
+        self.indent += 1
+        self.loop(node)
+        self.indent -= 1
+
+    def counted_loop(self, node: While, start: str, value: str) -> None:
+        counted, body = node.counted, node.body
+        counter, step = counted.counter, counted.step
+        outer = self.level
+        pooled = body.new_scope and body.pool is not None
+        if pooled:
+            block, blank = self.constant(body), self.constant(body.blank)
+            self.level += 1
+            level = self.level
+            self.line(f"_f{level} = {block}.acquire(_f{outer})")
+            self.line(f"_s{level} = _f{level}.slots")
+            self.line("try:")
+            self.indent += 1
+        self.line(f"for {value} in range({start}, 0, {step}):")
+        self.indent += 1
+        if pooled:
+            self.line(f"_s{level}[:] = {blank}")
+        elif body.new_scope:
+            self.enter_frame(body)
+        self.stmts(list(counted.before))
+        # O contador pertence ao escopo do laço, não ao frame do corpo.
+        inner = self.level
+        self.level = outer
+        self.store(counter.name, counter.depth, counter.slot, f"{value} + {step}")
+        self.level = inner
+        self.stmts(list(counted.after))
+        self.indent -= 1
+        if pooled:
+            self.indent -= 1
+            self.line("finally:")
+            self.line(f"{INDENT}{block}.release(_f{level})")
+        self.level = outer
+
+    def loop(self, node: While) -> None:
+        body = node.body
+        cond = self.truth(node.cond)
+        if body.pool is None:
+            self.line(f"while {cond}:")
+            self.indent += 1
+            self.stmt_StatementBlock(body)
+            self.indent -= 1
+            return
+
+        # Como em `While.eval`, um único frame do pool é limpo no início de
+        # cada iteração.
+        block, blank = self.constant(body), self.constant(body.blank)
+        self.level += 1
+        level = self.level
+        self.line(f"_f{level} = {block}.acquire(_f{level - 1})")
+        self.line(f"_s{level} = _f{level}.slots")
+        self.line("try:")
+        self.line(f"{INDENT}while {cond}:")
+        self.indent += 2
+        self.line(f"_s{level}[:] = {blank}")
+        self.stmts(body.stmts)
+        self.indent -= 2
+        self.line("finally:")
+        self.line(f"{INDENT}{block}.release(_f{level})")
+        self.level -= 1
+
+    def stmt_Method(self, node: Method) -> None:
+        # O corpo do método tem a sua própria camada.
+        self.line(f"{self.constant(node)}.eval(_f{self.level})")
+
+    def stmt_CallMethod(self, node: CallMethod) -> None:
+        name = node.method_name
+        self.line(f"_m = {self.load(name, node.method_depth, node.method_slot)}")
+        self.line(f"_a = [{', '.join(self.expr(arg) for arg in node.arguments)}]")
+        if node.tail is not None:
+            self.line(f"if getattr(_m, 'method', None) is {self.constant(node.tail)}:")
+            self.line(f"{INDENT}return _TailCall(_m, _a, {name!r})")
+        not_callable = f"'{name}' não é um método."
+        call_error = f"Erro na chamada do método '{name}': "
+        self.line("if not callable(_m):")
+        self.line(f"{INDENT}raise _ArnoldCError({not_callable!r})")
+        self.line("try:")
+        self.line(f"{INDENT}_r = _m(*_a)")
+        self.line("except TypeError as _e:")
+        self.line(f"{INDENT}raise _ArnoldCError({call_error!r} + str(_e))")
+        self.line("except _ForceReturn as _e:")
+        self.indent += 1
+        # Funções Python do ambiente ainda podem retornar desta forma.
+        self.store(node.result_var, node.result_depth, node.result_slot, "_e.value")
+        self.indent -= 1
+        self.line("else:")
+        self.line(f"{INDENT}if _r is not None:")
+        self.indent += 2
+        self.store(node.result_var, node.result_depth, node.result_slot, "_r")
+        self.indent -= 2
+
+
+#
+# CAMADAS
+#
+
+
+@dataclass
+class Promotion:
+    """
+    Evento de promoção de um método ou laço para o código compilado.
+
+    `count` é o valor do contador quando o limite foi atingido e `switched`
+    o valor quando o código compilado começou a ser usado (None se isso não
+    chegou a acontecer). `compile_ms` fica None enquanto a compilação não
+    termina, e `error` guarda o motivo de uma compilação que falhou: nesse
+    caso o método ou laço continua interpretado.
+    """
+
+    kind: str
+    name: str
+    line: Optional[int]
+    count: int
+    compile_ms: Optional[float] = None
+    switched: Optional[int] = None
+    error: Optional[str] = None
+
+
+class Tier:
+    """
+    Contador e código compilado de um método ou laço.
+    """
+
+    kind = ""
+
+    def __init__(self, manager: "TierManager", node: Method | While, threshold: int):
+        self.manager = manager
+        self.node = node
+        self.threshold = threshold
+        # Execuções (chamadas ou iterações) feitas pelo interpretador.
+        self.count = 0
+        # Preenchido pela compilação (possivelmente em outra thread) e
+        # copiado para `code` pela thread do programa na primeira vez que é
+        # usado.
+        self.compiled: Optional[Thunk] = None
+        self.code: Optional[Thunk] = None
+        self.event: Optional[Promotion] = None
+
+    @property
+    def name(self) -> str:
+        raise NotImplementedError
+
+    def compile(self) -> Thunk:
+        raise NotImplementedError
+
+    def switch(self) -> Optional[Thunk]:
+        """
+        Passa a usar o código compilado, se ele já estiver pronto.
+        """
+        if (code := self.compiled) is not None:
+            self.code = code
+            self.event.switched = self.count  # type: ignore[union-attr]
+        return code
+
+    def tick(self, count: int, wait: bool = False) -> Optional[Thunk]:
+        """
+        Soma `count` ao contador, pede a compilação quando o limite é
+        atingido e retorna o código compilado, se ele estiver pronto. Com
+        `wait`, a compilação é feita na hora.
+        """
+        previous = self.count
+        self.count = previous + count
+        if self.event is None:
+            if self.count >= self.threshold > previous:
+                self.manager.promote(self, wait)
+            else:
+                return None
+        return self.switch()
+
+
+class MethodTier(Tier):
+    """
+    Camada do corpo de um método. O callable criado por `Method.eval`
+    executa o corpo chamando a camada com o frame dos parâmetros.
+    """
+
+    kind = "método"
+
+    @property
+    def name(self) -> str:
+        return self.node.name
+
+    def compile(self) -> Thunk:
+        return FrameCodeGenerator().compile_function(self.node.body, self.name)
+
+    def __call__(self, frame: Frame) -> Optional[Completion]:
+        if (code := self.code) is not None:
+            return code(frame)
+        if (code := self.tick(1)) is not None:
+            return code(frame)
+        return self.node.body.eval(frame)
+
+
+class LoopTier(Tier):
+    """
+    Camada de um laço. O contador é de iterações e a troca para o código
+    compilado pode acontecer no meio de uma execução do laço: o laço
+    compilado continua a partir do estado atual das variáveis.
+    """
+
+    kind = "laço"
+
+    @property
+    def name(self) -> str:
+        cond = self.node.cond
+        return f"STICK AROUND {cond.name}" if isinstance(cond, Var) else "STICK AROUND"
+
+    def compile(self) -> Thunk:
+        return FrameCodeGenerator().compile_function(self.node, self.name)
+
+    def run(self, ctx: Ctx) -> Optional[Completion]:
+        if (code := self.code) is not None or (code := self.tick(0)) is not None:
+            return code(ctx)
+
+        loop = self.node
+        if (counted := loop.counted) is not None and (start := counted.start(ctx)):
+            # Laços com forma fechada não têm iterações a acelerar. Nos
+            # demais, o número de iterações é conhecido: se ele já atinge o
+            # limite, vale a pena compilar antes de executar o laço.
+            if counted.accumulators is not None and counted.close(ctx, start):
+                return None
+            if (code := self.tick(abs(start), wait=True)) is not None:
+                return code(ctx)
+            return counted.run(loop.body, ctx, start)
+
+        cond, body = loop.cond, loop.body
+        while is_arnoldc_true(cond.eval(ctx)):
+            if (completion := body.eval(ctx)) is not None:
+                return completion
+            if (code := self.tick(1)) is not None:
+                return code(ctx)
+        return None
+
+
+class TierManager:
+    """
+    Limites das camadas, compilação em segundo plano e estatísticas.
+
+    Com `background=False` a compilação é feita na hora, na thread do
+    programa (útil para medições e testes reprodutíveis).
+    """
+
+    def __init__(
+        self,
+        method_threshold: int = METHOD_THRESHOLD,
+        loop_threshold: int = LOOP_THRESHOLD,
+        background: bool = True,
+    ):
+        if method_threshold < 1 or loop_threshold < 1:
+            raise ValueError("Os limites das camadas precisam ser positivos.")
+        self.method_threshold = method_threshold
+        self.loop_threshold = loop_threshold
+        self.background = background
+        self.tiers: list[Tier] = []
+        self.events: list[Promotion] = []
+        self.executor: Optional[ThreadPoolExecutor] = None
+
+    @contextmanager
+    def installed(self, program: Program) -> Iterator[None]:
+        """
+        Anota os métodos e laços do programa com as suas camadas durante o
+        bloco `with`. As anotações são removidas no final, para que a árvore
+        volte a ser executada sem contadores pelas outras engines.
+        """
+        nodes = [node for node in program.descendants() if isinstance(node, (Method, While))]
+        for node in nodes:
+            if isinstance(node, Method):
+                node.tier = MethodTier(self, node, self.method_threshold)
+            else:
+                node.tier = LoopTier(self, node, self.loop_threshold)
+            self.tiers.append(node.tier)
+        try:
+            yield
+        finally:
+            for node in nodes:
+                node.tier = None
+            if self.executor is not None:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
+
+    def promote(self, tier: Tier, wait: bool = False) -> None:
+        """
+        Registra a promoção e compila o código da camada, em segundo plano
+        (se `background` for verdadeiro e `wait` for falso).
+        """
+        tier.event = Promotion(tier.kind, tier.name, tier.node.line, tier.count)
+        self.events.append(tier.event)
+        if wait or not self.background:
+            self.compile(tier)
+            return
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="arnoldc-tiers")
+        self.executor.submit(self.compile, tier)
+
+    def compile(self, tier: Tier) -> None:
+        event = tier.event
+        start = time.perf_counter()
+        try:
+            code = tier.compile()
+        except Exception as e:
+            event.error = f"{type(e).__name__}: {e}"  # type: ignore[union-attr]
+            return
+        finally:
+            event.compile_ms = (time.perf_counter() - start) * 1000  # type: ignore[union-attr]
+        tier.compiled = code
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Limites, contadores de cada método e laço e eventos de promoção.
+        """
+        return {
+            "method_threshold": self.method_threshold,
+            "loop_threshold": self.loop_threshold,
+            "background": self.background,
+            "counters": [
+                {
+                    "kind": tier.kind,
+                    "name": tier.name,
+                    "line": tier.node.line,
+                    "count": tier.count,
+                    "compiled": tier.code is not None,
+                }
+                for tier in self.tiers
+            ],
+            "promotions": [asdict(event) for event in self.events],
+        }
+
+    def report(self) -> str:
+        """
+        Relatório em texto das promoções.
+        """
+        lines = [
+            f"limites: {self.method_threshold} chamadas (métodos), {self.loop_threshold} iterações (laços)",
+            f"{'tipo':<7} {'nome':<24} {'linha':>6} {'interpretado':>12} {'promovido':>10} {'trocou':>10} {'compilação':>11}",
+        ]
+        for tier in self.tiers:
+            event = tier.event
+            if event is None:
+                continue
+            switched = "-" if event.switched is None else event.switched
+            if event.error is not None:
+                compiled = "falhou"
+            elif event.compile_ms is None:
+                compiled = "pendente"
+            else:
+                compiled = f"{event.compile_ms:.2f} ms"
+            line = "-" if event.line is None else event.line
+            lines.append(
+                f"{tier.kind:<7} {tier.name:<24} {line:>6} {tier.count:>12} {event.count:>10} {switched:>10} {compiled:>11}"
+            )
+        if len(lines) == 2:
+            lines.append("Nenhum método ou laço atingiu o limite.")
+        return "\n".join(lines)
+
+
+_manager: Optional[TierManager] = None
+
+
+@contextmanager
+def use_tiers(manager: TierManager) -> Iterator[TierManager]:
+    """
+    Usa `manager` nas execuções da engine "tiered" durante o bloco `with`.
+    """
+    global _manager
+    previous = _manager
+    _manager = manager
+    try:
+        yield manager
+    finally:
+        _manager = previous
+
+
+def run_program(program: Program, ctx: Ctx, manager: Optional[TierManager] = None) -> None:
+    """
+    Executa o programa com o interpretador de árvore e as camadas.
+    """
+    from .resolver import resolve
+    from .typecheck import specialize
+
+    if manager is None:
+        manager = _manager if _manager is not None else TierManager()
+    resolve(program)
+    specialize(program, ctx)
+    with manager.installed(program):
+        program.eval(ctx)
@@ -33,6 +33,14 @@ from .arnoldc_ast import (
 )
 
 
+def at(node: Any, token: Token) -> Any:
+    """
+    Registra no nó a linha do token que inicia o comando.
+    """
+    node.line = token.line
+    return node
+
+
 @v_args(inline=True)
 class ArnoldCTransformer(Transformer):
     # Programa
@@ -57,17 +65,17 @@ class ArnoldCTransformer(Transformer):
 
     # Comandos
     def print_cmd(self, _talk_to_the_hand_token: Token, value_to_print_expr: Expr) -> Print:
-        return Print(value_to_print_expr)
+        return at(Print(value_to_print_expr), _talk_to_the_hand_token)
 
 
     def var_def(self, _hey_christmas_tree_token: Token, var_name_node: Var, _you_set_us_up_token: Token, initial_value_expr: Expr) -> VarDef:
-        return VarDef(var_name_node.name, initial_value_expr)
+        return at(VarDef(var_name_node.name, initial_value_expr), _hey_christmas_tree_token)
 
     def operation_list(self, *operations: OperationExpr) -> list[OperationExpr]:
         return list(operations)
 
     def assignment_stmt(self, _get_to_the_chopper_token: Token, target_var_node: Var, _here_is_my_invitation_token: Token, initial_value: Expr, operations_list_node: list[OperationExpr], _enough_talk_token: Token) -> AssignmentBlock:
-        return AssignmentBlock(target_var_node.name, initial_value, operations_list_node)
+        return at(AssignmentBlock(target_var_node.name, initial_value, operations_list_node), _get_to_the_chopper_token)
     
     
     # Operações dentro do AssignmentBlock
@@ -97,11 +105,11 @@ class ArnoldCTransformer(Transformer):
 
     # If
     def if_cmd(self, _because_token: Token, condition: Expr, true_block: StatementBlock, _bullshit_token: Token, else_block: StatementBlock, _you_have_no_respect_token: Token) -> If:
-        return If(condition, true_block, else_block)
+        return at(If(condition, true_block, else_block), _because_token)
 
     # While
     def while_cmd(self, _stick_around_token: Token, condition: Expr, body: StatementBlock, _chill_token: Token) -> While:
-        return While(condition, body)
+        return at(While(condition, body), _stick_around_token)
 
     # Bloco
     def statement_block(self, *stmts: Union[VarDef, AssignmentBlock, Print, If, While, Method, CallMethod, Return]) -> StatementBlock:
@@ -131,7 +139,8 @@ class ArnoldCTransformer(Transformer):
 
         returns_value_flag = has_return_type_flag 
 
-        return Method(name=method_name_str, params=parameters_vars, body=body, returns_value=returns_value_flag)
+        method = Method(name=method_name_str, params=parameters_vars, body=body, returns_value=returns_value_flag)
+        return at(method, _listen_token)
 
 
     def method_parameters(self, _i_need_your_clothes_token: Token, param_var: Var) -> Var:
@@ -147,8 +156,9 @@ class ArnoldCTransformer(Transformer):
 
         method_arguments = params_list if params_list is not None else []
 
-        return CallMethod(result_var=result_var_name, method_name=method_name_str, arguments=method_arguments)
+        call = CallMethod(result_var=result_var_name, method_name=method_name_str, arguments=method_arguments)
+        return at(call, _get_mars_token)
         
     def return_stmt(self, _ill_be_back_token: Token, value_expr: Expr) -> Return:
-        return Return(value=value_expr)
+        return at(Return(value=value_expr), _ill_be_back_token)
 
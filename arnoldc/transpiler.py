@@ -0,0 +1,540 @@
+"""
+Tradução da árvore sintática de ArnoldC para código fonte Python.
+
+Cada programa vira uma função `__arnoldc_main__(_ctx)` e cada método vira
+uma função Python aninhada. Variáveis viram variáveis locais (ou variáveis
+de closure, quando acessadas por métodos), de modo que o próprio bytecode do
+CPython faz o trabalho que o interpretador de árvore faz com buscas no `Ctx`.
+
+A semântica de ArnoldC é preservada com a ajuda de algumas funções auxiliares
+(veja `helpers()` e `operations.py`): divisão inteira com erro para divisão
+por zero, valor de verdade de `is_arnoldc_true`, erros de tipo reportados
+como erro na chamada do método e as mensagens de erro de métodos sem
+retorno.
+
+As variáveis declaradas no nível mais externo do programa são sincronizadas
+com o `Ctx` global ao final da execução (inclusive em caso de erro), como
+acontece no interpretador de árvore. Antes da declaração elas valem `UNSET`,
+e os acessos que podem acontecer antes dela (ex.: em um método definido
+antes da variável) recorrem ao `Ctx`, que lança o mesmo erro do
+interpretador de árvore.
+
+Chamadas recursivas em posição de cauda (veja `resolver.py`) para a própria
+instância do método retornam um `_Tail` com os novos argumentos, e o método
+é envolvido por `_trampoline`, que reexecuta o corpo em um laço. Métodos
+memoizados (veja `memo.py`) são envolvidos pelo cache do nó, que o código
+gerado recebe como constante.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from .arnoldc_ast import (
+    AddOp,
+    AndOp,
+    AssignmentBlock,
+    Bool,
+    CallMethod,
+    DivOp,
+    EqOp,
+    Expr,
+    GtOp,
+    If,
+    Increment,
+    Literal,
+    Method,
+    MulOp,
+    OrOp,
+    Print,
+    Program,
+    Return,
+    StatementBlock,
+    Stmt,
+    SubOp,
+    Var,
+    VarDef,
+    While,
+    is_arnoldc_true,
+)
+from .ctx import UNSET, Ctx
+from .errors import ArnoldCError, ForceReturn, SemanticError
+from .memo import memoize
+from .operations import div, logical_and, logical_or
+from .output import emit
+
+MAIN_NAME = "__arnoldc_main__"
+INDENT = "    "
+
+
+#
+# FUNÇÕES AUXILIARES USADAS PELO CÓDIGO GERADO
+#
+
+
+def _call(method, name, *args):
+    """
+    Chamada genérica, com a mesma semântica de `CallMethod.eval`.
+    """
+    if not callable(method):
+        raise ArnoldCError(f"'{name}' não é um método.")
+    arity = getattr(method, "arity", None)
+    if arity is not None and arity[1] != len(args):
+        _arity_error(name, *arity, *args)
+    try:
+        return method(*args)
+    except TypeError as e:
+        raise ArnoldCError(f"Erro na chamada do método '{name}': {e}")
+    except ForceReturn as e:
+        return e.value
+
+
+def _arity_error(call_name, method_name, expected, *args):
+    raise ArnoldCError(
+        f"Erro na chamada do método '{call_name}': Número incorreto de argumentos "
+        f"para o método '{method_name}'. Esperado {expected}, recebido {len(args)}"
+    )
+
+
+class _Tail:
+    """
+    Argumentos da próxima execução do corpo de um método com recursão em
+    cauda (retornado no lugar da chamada).
+    """
+
+    __slots__ = ("args",)
+
+    def __init__(self, *args):
+        self.args = args
+
+
+def _trampoline(body, name):
+    """
+    Envolve a função de um método com chamadas em cauda: enquanto o corpo
+    retornar um `_Tail`, ele é executado de novo com os novos argumentos.
+    Erros de tipo nessas execuções são reportados como erro na chamada,
+    como em `Method.eval`.
+    """
+
+    def method(*args):
+        result = body(*args)
+        while result.__class__ is _Tail:
+            try:
+                result = body(*result.args)
+            except TypeError as e:
+                raise ArnoldCError(f"Erro na chamada do método '{name}': {e}")
+        return result
+
+    return method
+
+
+def _method(function, name, nparams, tail, memo=None):
+    """
+    Prepara a função de um método para ser guardada na variável: com
+    chamadas em cauda, ela é envolvida por `_trampoline` e, se o método for
+    memoizado, pelo cache do nó `memo`. O nome e o número de parâmetros são
+    usados por `_call` para reportar chamadas com o número errado de
+    argumentos.
+    """
+    if tail:
+        function = _trampoline(function, name)
+    if memo is not None:
+        function = memoize(memo, function)
+    function.arity = (name, nparams)
+    return function
+
+
+def _sync(ctx: Ctx, values: dict[str, Any], names: tuple[tuple[str, str], ...]) -> None:
+    """
+    Copia as variáveis globais do programa para o `Ctx`.
+    """
+    for name, py_name in names:
+        if values.get(py_name, UNSET) is not UNSET:
+            ctx.scope[name] = values[py_name]
+
+
+def helpers() -> dict[str, Any]:
+    """
+    Namespace onde o código gerado é executado.
+    """
+    return {
+        "_truth": is_arnoldc_true,
+        "_div": div,
+        "_or": logical_or,
+        "_and": logical_and,
+        "_call": _call,
+        "_arity_error": _arity_error,
+        "_sync": _sync,
+        "_Tail": _Tail,
+        "_method": _method,
+        "_UNSET": UNSET,
+        "_print": emit,
+        "_ArnoldCError": ArnoldCError,
+        "_SemanticError": SemanticError,
+    }
+
+
+#
+# GERAÇÃO DE CÓDIGO
+#
+
+
+@dataclass
+class _Function:
+    """
+    Estado da tradução de uma função Python (o programa principal ou um
+    método). `scopes` mapeia nomes ArnoldC para nomes Python em cada bloco.
+    """
+
+    parent: Optional["_Function"]
+    scopes: list[dict[str, str]]
+    method: Optional[Method] = None
+    nonlocals: set[str] = field(default_factory=set)
+    lines: list[str] = field(default_factory=list)
+    depth: int = 1
+    # Variável com a instância do método, comparada com o método chamado nas
+    # chamadas em cauda (None se não houver nenhuma).
+    tail: Optional[str] = None
+
+    def line(self, text: str) -> None:
+        self.lines.append(INDENT * self.depth + text)
+
+
+class PythonTranspiler:
+    """
+    Gera o código Python correspondente a um `Program`.
+    """
+
+    def __init__(self):
+        self.fn: _Function
+        self.used_names: set[str] = set()
+        self.globals: list[tuple[str, str]] = []
+        # Posição (no nível mais externo do programa) do comando sendo
+        # traduzido e da primeira declaração de cada variável global.
+        self.position = 0
+        self.current: Optional[Stmt] = None
+        self.declared_at: dict[str, int] = {}
+        self.methods: dict[str, Method] = {}
+        self.reassigned: set[str] = set()
+        # Valores usados pelo código gerado (ex.: nós de métodos memoizados),
+        # acrescentados ao namespace em que ele é executado.
+        self.constants: dict[str, Any] = {}
+
+    def transpile(self, program: Program) -> str:
+        # Nomes de métodos que também são alvo de atribuições ou declarações
+        # de variáveis (ou de outro método) não podem ser chamados
+        # diretamente: a variável pode não conter mais o método.
+        method_names: set[str] = set()
+        for node in program.descendants():
+            if isinstance(node, Method):
+                if node.name in method_names:
+                    self.reassigned.add(node.name)
+                method_names.add(node.name)
+            if isinstance(node, (AssignmentBlock, Increment)):
+                self.reassigned.add(node.target_var)
+            elif isinstance(node, CallMethod):
+                self.reassigned.add(node.result_var)
+            elif isinstance(node, VarDef):
+                self.reassigned.add(node.name)
+
+        self.fn = main = _Function(None, [{}], depth=2)
+
+        # As variáveis globais são declaradas de antemão, pois métodos podem
+        # usar variáveis (ou chamar métodos) definidos depois deles.
+        for position, stmt in enumerate(program.stmts):
+            if isinstance(stmt, (VarDef, Method)):
+                self.declared_at.setdefault(self.declare(stmt.name), position)
+
+        for self.position, stmt in enumerate(program.stmts):
+            self.current = stmt
+            self.stmt(stmt)
+        if not main.lines:
+            main.line("pass")
+
+        header = [
+            f"def {MAIN_NAME}(_ctx):",
+            f"{INDENT}_G = _ctx.scope",
+        ]
+        for name, py_name in self.globals:
+            header.append(f"{INDENT}{py_name} = _G[{name!r}] if {name!r} in _G else _UNSET")
+        header.append(f"{INDENT}try:")
+        footer = [
+            f"{INDENT}finally:",
+            f"{INDENT * 2}_sync(_ctx, locals(), _GLOBALS)",
+        ]
+        globals_line = f"_GLOBALS = {tuple(self.globals)!r}"
+        return "\n".join([globals_line, "", "", *header, *main.lines, *footer, ""])
+
+    def constant(self, value: Any) -> str:
+        name = f"_K{len(self.constants)}"
+        self.constants[name] = value
+        return name
+
+    #
+    # Nomes
+    #
+
+    def fresh(self, name: str) -> str:
+        py_name = f"v_{name}"
+        counter = 1
+        while py_name in self.used_names:
+            py_name = f"v_{name}_{counter}"
+            counter += 1
+        self.used_names.add(py_name)
+        return py_name
+
+    def declare(self, name: str) -> str:
+        scope = self.fn.scopes[-1]
+        if name not in scope:
+            scope[name] = self.fresh(name)
+            if self.fn.parent is None and len(self.fn.scopes) == 1:
+                self.globals.append((name, scope[name]))
+        return scope[name]
+
+    def lookup(self, name: str) -> tuple[Optional[str], Optional[_Function]]:
+        fn: Optional[_Function] = self.fn
+        while fn is not None:
+            for scope in reversed(fn.scopes):
+                if name in scope:
+                    return scope[name], fn
+            fn = fn.parent
+        return None, None
+
+    def unset(self, py_name: str) -> bool:
+        """
+        Verifica se a variável global pode ser acessada antes de ser
+        declarada.
+        """
+        position = self.declared_at.get(py_name)
+        if position is None or self.position > position:
+            return False
+        # O corpo de um método pode usar o próprio nome.
+        return self.position < position or not isinstance(self.current, Method)
+
+    def load(self, name: str) -> str:
+        py_name, _ = self.lookup(name)
+        if py_name is None:
+            return f"_ctx[{name!r}]"
+        if self.unset(py_name):
+            return f"({py_name} if {py_name} is not _UNSET else _ctx[{name!r}])"
+        return py_name
+
+    def store(self, name: str, value: str) -> None:
+        py_name, owner = self.lookup(name)
+        if py_name is None:
+            self.fn.line(f"_ctx.assign({name!r}, {value})")
+            return
+        if self.unset(py_name):
+            self.fn.line(f"if {py_name} is _UNSET:")
+            self.fn.line(f"{INDENT}_ctx.assign({name!r}, {value})")
+        if owner is not self.fn:
+            self.fn.nonlocals.add(py_name)
+        self.fn.line(f"{py_name} = {value}")
+
+    #
+    # Expressões
+    #
+
+    def expr(self, node: Expr) -> str:
+        if isinstance(node, Var):
+            return self.load(node.name)
+        elif isinstance(node, (Literal, Bool)):
+            return repr(node.value)
+        raise NotImplementedError(f"Expressão não suportada: {type(node).__name__}")
+
+    def truth(self, node: Expr) -> str:
+        if isinstance(node, (Literal, Bool)):
+            return repr(is_arnoldc_true(node.value))
+        value = self.expr(node)
+        return f"({value} if {value}.__class__ is int else _truth({value}))"
+
+    #
+    # Comandos
+    #
+
+    def stmt(self, node: Stmt) -> None:
+        method = getattr(self, f"stmt_{type(node).__name__}", None)
+        if method is None:
+            raise NotImplementedError(f"Comando não suportado: {type(node).__name__}")
+        method(node)
+
+    def block(self, node: StatementBlock) -> None:
+        self.fn.depth += 1
+        self.fn.scopes.append({})
+        start = len(self.fn.lines)
+        for stmt in node.stmts:
+            self.stmt(stmt)
+        if len(self.fn.lines) == start:
+            self.fn.line("pass")
+        self.fn.scopes.pop()
+        self.fn.depth -= 1
+
+    def stmt_StatementBlock(self, node: StatementBlock) -> None:
+        self.fn.line("if True:")
+        self.block(node)
+
+    def stmt_Print(self, node: Print) -> None:
+        self.fn.line(f"_print({self.expr(node.target)})")
+
+    def stmt_VarDef(self, node: VarDef) -> None:
+        value = self.expr(node.value)
+        self.fn.line(f"{self.declare(node.name)} = {value}")
+
+    def stmt_AssignmentBlock(self, node: AssignmentBlock) -> None:
+        value = self.expr(node.initial_value_expr)
+        for op_node in node.operations:
+            operand = self.expr(op_node.operand)
+            match op_node:
+                case AddOp():
+                    value = f"({value} + {operand})"
+                case SubOp():
+                    value = f"({value} - {operand})"
+                case MulOp():
+                    value = f"({value} * {operand})"
+                case DivOp() if isinstance(op_node.operand, Literal) and op_node.operand.value != 0:
+                    value = f"({value} // {operand})"
+                case DivOp():
+                    value = f"_div({value}, {operand})"
+                case EqOp():
+                    value = f"(1 if {value} == {operand} else 0)"
+                case GtOp():
+                    value = f"(1 if {value} > {operand} else 0)"
+                case OrOp():
+                    value = f"_or({value}, {operand})"
+                case AndOp():
+                    value = f"_and({value}, {operand})"
+                case _:
+                    msg = f"Operação ArnoldC não implementada: {type(op_node).__name__}"
+                    raise NotImplementedError(msg)
+        self.store(node.target_var, value)
+
+    def stmt_Increment(self, node: Increment) -> None:
+        value = self.load(node.target_var)
+        if node.delta < 0:
+            self.store(node.target_var, f"({value} - {-node.delta!r})")
+        else:
+            self.store(node.target_var, f"({value} + {node.delta!r})")
+
+    def stmt_If(self, node: If) -> None:
+        self.fn.line(f"if {self.truth(node.cond)}:")
+        self.block(node.then_branch)
+        if node.else_branch is not None and node.else_branch.stmts:
+            self.fn.line("else:")
+            self.block(node.else_branch)
+
+    def stmt_While(self, node: While) -> None:
+        self.fn.line(f"while {self.truth(node.cond)}:")
+        self.block(node.body)
+
+    def stmt_Method(self, node: Method) -> None:
+        py_name = self.declare(node.name)
+        self.methods[py_name] = node
+        outer = self.fn
+        self.fn = _Function(outer, [{}], node, depth=outer.depth)
+        params = [self.declare(param) for param in node.params]
+        self.block(node.body)
+        if node.returns_value:
+            msg = f"Método '{node.name}' que retorna valor não tem 'I'LL BE BACK' explícito."
+            self.fn.line(f"{INDENT}raise _SemanticError({msg!r})")
+        method, self.fn = self.fn, outer
+
+        self.fn.line(f"def {py_name}({', '.join(params)}):")
+        if method.nonlocals:
+            self.fn.line(f"{INDENT}nonlocal {', '.join(sorted(method.nonlocals))}")
+        self.fn.lines.extend(method.lines)
+        prepared = f"{py_name}, {node.name!r}, {len(params)}, {method.tail is not None}"
+        if node.memo_size:
+            prepared += f", {self.constant(node)}"
+        prepared = f"_method({prepared})"
+        if method.tail is not None:
+            self.fn.line(f"{method.tail} = {py_name} = {prepared}")
+        else:
+            self.fn.line(f"{py_name} = {prepared}")
+
+    def stmt_CallMethod(self, node: CallMethod) -> None:
+        args = [self.expr(arg) for arg in node.arguments]
+        callee = self.load(node.method_name)
+        target = self.static_method(node.method_name)
+
+        # Chamada em cauda: se o método chamado for a própria instância do
+        # método atual, o corpo é reexecutado por `_trampoline`.
+        method = self.fn.method
+        if method is not None and node.tail is method and len(method.params) == len(args):
+            if self.fn.tail is None:
+                self.fn.tail = self.fresh(f"{method.name}_self")
+            if target is method:
+                self.fn.line(f"return _Tail({', '.join(args)})")
+                return
+            self.fn.line(f"if {callee} is {self.fn.tail}:")
+            self.fn.line(f"{INDENT}return _Tail({', '.join(args)})")
+
+        if target is None:
+            call = f"_call({', '.join([callee, repr(node.method_name), *args])})"
+            self.fn.line(f"_r = {call}")
+        elif len(target.params) != len(args):
+            call_args = [repr(node.method_name), repr(target.name), str(len(target.params)), *args]
+            self.fn.line(f"_r = _arity_error({', '.join(call_args)})")
+        else:
+            msg = f"Erro na chamada do método '{node.method_name}': "
+            self.fn.line("try:")
+            self.fn.line(f"{INDENT}_r = {callee}({', '.join(args)})")
+            self.fn.line("except TypeError as _e:")
+            self.fn.line(f"{INDENT}raise _ArnoldCError({msg!r} + str(_e)) from _e")
+
+        self.fn.line("if _r is not None:")
+        self.fn.depth += 1
+        self.store(node.result_var, "_r")
+        self.fn.depth -= 1
+
+    def static_method(self, name: str) -> Optional[Method]:
+        """
+        Retorna o método chamado, se puder ser determinado estaticamente.
+        """
+        if name in self.reassigned:
+            return None
+        py_name, _ = self.lookup(name)
+        return self.methods.get(py_name) if py_name else None
+
+    def stmt_Return(self, node: Return) -> None:
+        value = self.expr(node.value) if node.value is not None else "None"
+        method = self.fn.method
+        if method is not None and not method.returns_value:
+            msg = f"Método void '{method.name}' não pode retornar um valor."
+            self.fn.line(f"_r = {value}")
+            self.fn.line("if _r is not None:")
+            self.fn.line(f"{INDENT}raise _SemanticError({msg!r})")
+            self.fn.line("return None")
+        else:
+            self.fn.line(f"return {value}")
+
+
+def compile_to_python(program: Program) -> str:
+    """
+    Traduz um programa ArnoldC para código fonte Python.
+
+    O código gerado define a função `__arnoldc_main__(_ctx)`, que executa o
+    programa usando `_ctx` como escopo global, e deve ser executado no
+    namespace retornado por `helpers()` (métodos memoizados também usam as
+    constantes do `PythonTranspiler`; veja `run_program`).
+    """
+    return PythonTranspiler().transpile(program)
+
+
+def run_program(program: Program, ctx: Ctx) -> None:
+    """
+    Traduz o programa para Python, compila com `compile()` e o executa.
+
+    O compilador do CPython limita o aninhamento de laços a 20 níveis.
+    Programas mais aninhados do que isso são executados pela VM.
+    """
+    transpiler = PythonTranspiler()
+    source = transpiler.transpile(program)
+    try:
+        code = compile(source, "<arnoldc>", "exec")
+    except SyntaxError:
+        from .vm import run_program as run_vm
+
+        return run_vm(program, ctx)
+
+    namespace = {**helpers(), **transpiler.constants}
+    exec(code, namespace)
+    namespace[MAIN_NAME](ctx)
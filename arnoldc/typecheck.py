@@ -0,0 +1,555 @@
+"""
+Inferência e verificação de tipos.
+
+ArnoldC só tem três tipos de literais: inteiros (`NUMBER`), booleanos
+(`@I LIED` e `@NO PROBLEMO`) e strings. Esta análise estática rotula cada
+variável e cada expressão do programa com o conjunto de tipos que ela pode
+ter em tempo de execução: `int`, `bool`, `str`, `método` (o valor de um
+método) ou `outro` (valores vindos do ambiente Python, que podem ser
+qualquer coisa).
+
+A análise é insensível ao fluxo: o tipo de uma variável é a união dos tipos
+de todos os valores que ela pode receber (declaração, blocos de atribuição,
+incrementos e resultados de chamadas). Os escopos seguem as mesmas regras
+de `resolver.py`. Os parâmetros de um método recebem os tipos dos
+argumentos de todas as chamadas, a menos que o método seja usado como
+valor (ex.: atribuído a outra variável ou passado como argumento): nesse
+caso ele pode ser chamado de qualquer lugar e os parâmetros podem ter
+qualquer tipo. O resultado de uma chamada tem os tipos dos 'I'LL BE BACK'
+dos métodos que podem ser chamados. Como os tipos só crescem, as passadas
+se repetem até nenhum tipo mudar.
+
+Com os tipos, `specialize` anota os nós que só lidam com inteiros e
+booleanos:
+
+* condições de 'BECAUSE I'M GOING TO SAY PLEASE' e 'STICK AROUND'
+  (`int_cond`) são testadas com `bool`, sem os `isinstance` de
+  `is_arnoldc_true`;
+* blocos de atribuição (`int_ops`) aplicam as operações diretamente, sem
+  escolher a operação pelo tipo do nó a cada execução.
+
+Operações que falham para qualquer combinação dos tipos possíveis (ex.:
+'GET UP' com uma string e um inteiro) são reportadas por `check_types` antes
+da execução (opção `--typecheck`).
+"""
+
+import operator
+from dataclasses import dataclass, field
+from typing import Any, Callable, Collection, Optional
+
+from .arnoldc_ast import (
+    AddOp,
+    AndOp,
+    AssignmentBlock,
+    Bool,
+    CallMethod,
+    DivOp,
+    EqOp,
+    Expr,
+    GtOp,
+    If,
+    Increment,
+    Literal,
+    Method,
+    MulOp,
+    OrOp,
+    Print,
+    Program,
+    Return,
+    StatementBlock,
+    Stmt,
+    SubOp,
+    Var,
+    VarDef,
+    While,
+)
+from .ctx import Ctx
+from .errors import TypeCheckError
+from .node import Node
+from .operations import INT_OPERATIONS, div
+
+INT, BOOL, STR, METHOD, OTHER = "int", "bool", "str", "método", "outro"
+
+Type = frozenset[str]
+NOTHING: Type = frozenset()
+NUMBER: Type = frozenset({INT, BOOL})
+ANY: Type = frozenset({INT, BOOL, STR, METHOD, OTHER})
+
+# Palavras-chave de cada operação, usadas nas mensagens de erro.
+OPERATION_NAMES: dict[type, str] = {
+    AddOp: "GET UP",
+    SubOp: "GET DOWN",
+    MulOp: "YOU'RE FIRED",
+    DivOp: "HE HAD TO SPLIT",
+    EqOp: "YOU ARE NOT YOU YOU ARE ME",
+    GtOp: "LET OFF SOME STEAM BENNET",
+    OrOp: "CONSIDER THAT A DIVORCE",
+    AndOp: "KNOCK KNOCK",
+}
+
+
+def type_name(t: Type) -> str:
+    if t == ANY:
+        return "qualquer"
+    return "|".join(sorted(t)) or "nenhum"
+
+
+def opaque(t: Type) -> Type:
+    """
+    Tipo de um valor cujos métodos não são acompanhados pela análise
+    (parâmetros, retornos e atribuições dinâmicas): se ele puder ser um
+    método, qualquer coisa pode acontecer ao chamá-lo.
+    """
+    return ANY if METHOD in t else t
+
+
+def value_type(value: Any) -> str:
+    if value.__class__ is bool:
+        return BOOL
+    if value.__class__ is int:
+        return INT
+    if value.__class__ is str:
+        return STR
+    return OTHER
+
+
+def result_type(op_type: type, lhs: str, rhs: str) -> Optional[str]:
+    """
+    Tipo do resultado de uma operação entre valores dos tipos dados, ou None
+    se ela lança um erro de tipo (com a semântica do interpretador).
+    """
+    numbers = lhs in NUMBER and rhs in NUMBER
+    if op_type in (EqOp, OrOp, AndOp):
+        return INT
+    if op_type in (SubOp, DivOp):
+        return INT if numbers else None
+    if op_type is AddOp:
+        if numbers:
+            return INT
+        return STR if lhs == rhs == STR else None
+    if op_type is MulOp:
+        if numbers:
+            return INT
+        return STR if {lhs, rhs} in ({STR, INT}, {STR, BOOL}) else None
+    if op_type is GtOp:
+        return INT if numbers or lhs == rhs == STR else None
+    raise NotImplementedError(f"Operação ArnoldC não implementada: {op_type.__name__}")
+
+
+def operation_type(op_type: type, lhs: Type, rhs: Type) -> tuple[Type, bool]:
+    """
+    Tipo do resultado da operação e se ela sempre falha (para qualquer
+    combinação dos tipos dos operandos).
+    """
+    if OTHER in lhs or OTHER in rhs:
+        return ANY, False
+    results = {result_type(op_type, a, b) for a in lhs for b in rhs}
+    results.discard(None)
+    return frozenset(results), bool(lhs and rhs and not results)  # type: ignore[arg-type]
+
+
+def may_fail(op_type: type, lhs: Type, rhs: Type) -> bool:
+    """
+    Verifica se a operação pode lançar um erro de tipo para alguma
+    combinação dos tipos dos operandos.
+    """
+    if OTHER in lhs or OTHER in rhs:
+        return True
+    return any(result_type(op_type, a, b) is None for a in lhs for b in rhs)
+
+
+#
+# INFERÊNCIA
+#
+
+
+@dataclass(eq=False)
+class Binding:
+    """
+    Variável do programa (uma declaração, um parâmetro ou um nome global) e
+    os tipos que ela pode ter. `methods` guarda os métodos que ela pode
+    conter, indexados pelo `id` do nó.
+    """
+
+    name: str
+    line: Optional[int] = None
+    type: Type = NOTHING
+    methods: dict[int, Method] = field(default_factory=dict)
+
+
+@dataclass(eq=False)
+class MethodInfo:
+    """
+    Parâmetros e tipos de retorno de um método. Um método que escapa (é
+    usado como valor) pode ser chamado com argumentos de qualquer tipo.
+    """
+
+    node: Method
+    params: list[Binding]
+    returns: Type = NOTHING
+    escaped: bool = False
+
+
+@dataclass
+class Scope:
+    """
+    Escopo em tempo de compilação, com as mesmas regras do `resolver.Scope`.
+    """
+
+    bindings: dict[str, Binding] = field(default_factory=dict)
+    pending: set[str] = field(default_factory=set)
+    method: bool = False
+
+
+@dataclass
+class TypeInfo:
+    """
+    Resultado da inferência: tipos das expressões (indexados pelo `id` do
+    nó), das variáveis e dos métodos, erros encontrados, as decisões de
+    especialização de cada condição e bloco de atribuição e os comandos que
+    podem lançar um erro de tipo (`fallible`, pelo `id` do nó).
+    """
+
+    expressions: dict[int, Type]
+    bindings: list[Binding]
+    methods: list[MethodInfo]
+    errors: list[TypeCheckError]
+    conditions: list[tuple[If | While, bool]]
+    assignments: list[tuple[AssignmentBlock, Optional[tuple]]]
+    fallible: set[int]
+
+    def type_of(self, node: Expr) -> Type:
+        return self.expressions.get(id(node), NOTHING)
+
+
+class TypeInference:
+    """
+    Infere os tipos de um programa.
+
+    `env` são os nomes já definidos no escopo global antes da execução:
+    eles podem ter qualquer tipo até serem redefinidos pelo programa.
+    """
+
+    def __init__(self, env: Collection[str] = ()):
+        self.env = set(env)
+        self.globals: dict[str, Binding] = {}
+        self.declared: dict[int, Binding] = {}
+        self.method_info: dict[int, MethodInfo] = {}
+        # Tipos atribuídos a nomes buscados dinamicamente: valem para todas
+        # as variáveis com o mesmo nome.
+        self.dynamic: dict[str, Type] = {}
+        self.changed = False
+        self._dispatch: dict[type, Callable[[Node], None]] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        self.scopes: list[Optional[Scope]] = []
+        self.method_stack: list[MethodInfo] = []
+        self.expressions: dict[int, Type] = {}
+        self.errors: list[TypeCheckError] = []
+        self.conditions: list[tuple[If | While, bool]] = []
+        self.assignments: list[tuple[AssignmentBlock, Optional[tuple]]] = []
+        self.fallible: set[int] = set()
+
+    def infer(self, program: Program) -> TypeInfo:
+        while True:
+            self.reset()
+            self.changed = False
+            self.visit(program)
+            if not self.changed:
+                break
+        bindings = [*self.globals.values(), *self.declared.values()]
+        for info in self.method_info.values():
+            bindings.extend(info.params)
+        return TypeInfo(
+            self.expressions,
+            bindings,
+            list(self.method_info.values()),
+            self.errors,
+            self.conditions,
+            self.assignments,
+            self.fallible,
+        )
+
+    #
+    # Variáveis
+    #
+
+    def widen(self, binding: Binding, t: Type) -> None:
+        if not t <= binding.type:
+            binding.type |= t
+            self.changed = True
+
+    def global_binding(self, name: str) -> Binding:
+        if name not in self.globals:
+            binding = self.globals[name] = Binding(name)
+            if name in self.env:
+                binding.type = ANY
+        binding = self.globals[name]
+        self.widen(binding, self.dynamic.get(name, NOTHING))
+        return binding
+
+    def lookup(self, name: str) -> Optional[Binding]:
+        """
+        Variável que o nome acessa no ponto atual do programa, ou None se o
+        nome for buscado dinamicamente (endereço `DYNAMIC`).
+        """
+        in_method = False
+        for scope in reversed(self.scopes):
+            if scope is None:
+                break
+            if name in scope.bindings:
+                return scope.bindings[name]
+            if in_method and name in scope.pending:
+                return None
+            in_method = in_method or scope.method
+        return self.global_binding(name)
+
+    def declare(self, node: VarDef | Method) -> Binding:
+        scope = self.scopes[-1]
+        if scope is None:
+            return self.global_binding(node.name)
+        if id(node) not in self.declared:
+            self.declared[id(node)] = Binding(node.name, node.line)
+        binding = scope.bindings[node.name] = self.declared[id(node)]
+        self.widen(binding, self.dynamic.get(node.name, NOTHING))
+        return binding
+
+    def store(self, name: str, t: Type, methods: Optional[dict[int, Method]] = None) -> None:
+        binding = self.lookup(name)
+        if binding is None:
+            self.store_dynamic(name, opaque(t))
+            return
+        self.widen(binding, t)
+        for key, method in (methods or {}).items():
+            if key not in binding.methods:
+                binding.methods[key] = method
+                self.changed = True
+
+    def store_dynamic(self, name: str, t: Type) -> None:
+        current = self.dynamic.get(name, NOTHING)
+        if not t <= current:
+            self.dynamic[name] = current | t
+            self.changed = True
+
+    def error(self, node: Stmt, message: str) -> None:
+        self.errors.append(TypeCheckError(message, line=node.line))
+
+    #
+    # Expressões
+    #
+
+    def expr(self, node: Expr) -> Type:
+        match node:
+            case Var(name=name):
+                binding = self.lookup(name)
+                if binding is None:
+                    t = ANY
+                else:
+                    t = binding.type
+                    # O método é usado como valor e pode ser chamado de
+                    # qualquer lugar.
+                    for method in binding.methods.values():
+                        info = self.info(method)
+                        if not info.escaped:
+                            info.escaped = True
+                            self.changed = True
+            case Literal(value=value):
+                t = frozenset({value_type(value)})
+            case Bool():
+                t = frozenset({BOOL})
+            case _:
+                raise NotImplementedError(f"Expressão não suportada: {type(node).__name__}")
+        self.expressions[id(node)] = t
+        return t
+
+    def var_methods(self, node: Expr) -> dict[int, Method]:
+        if isinstance(node, Var) and (binding := self.lookup(node.name)) is not None:
+            return binding.methods
+        return {}
+
+    def condition(self, node: If | While) -> None:
+        t = self.expr(node.cond)
+        self.conditions.append((node, bool(t) and t <= NUMBER))
+
+    #
+    # Comandos
+    #
+
+    def visit(self, node: Node) -> None:
+        cls = type(node)
+        try:
+            handler = self._dispatch[cls]
+        except KeyError:
+            handler = getattr(self, f"visit_{cls.__name__}", self.generic_visit)
+            self._dispatch[cls] = handler
+        handler(node)
+
+    def generic_visit(self, node: Node) -> None:
+        for child in node.children():
+            self.visit(child)
+
+    def visit_Program(self, node: Program) -> None:
+        self.scopes.append(None)
+        for stmt in node.stmts:
+            self.visit(stmt)
+        self.scopes.pop()
+
+    def visit_StatementBlock(self, node: StatementBlock) -> None:
+        pending = {stmt.name for stmt in node.stmts if isinstance(stmt, (VarDef, Method))}
+        if pending:
+            self.scopes.append(Scope(pending=pending))
+        for stmt in node.stmts:
+            self.visit(stmt)
+        if pending:
+            self.scopes.pop()
+
+    def visit_Print(self, node: Print) -> None:
+        self.expr(node.target)
+
+    def visit_VarDef(self, node: VarDef) -> None:
+        # O valor inicial é avaliado antes da declaração.
+        t = self.expr(node.value)
+        methods = self.var_methods(node.value)
+        binding = self.declare(node)
+        self.widen(binding, t)
+        for key, method in methods.items():
+            binding.methods.setdefault(key, method)
+
+    def visit_If(self, node: If) -> None:
+        self.condition(node)
+        self.visit(node.then_branch)
+        if node.else_branch is not None:
+            self.visit(node.else_branch)
+
+    def visit_While(self, node: While) -> None:
+        self.condition(node)
+        self.visit(node.body)
+
+    def visit_AssignmentBlock(self, node: AssignmentBlock) -> None:
+        t = initial = self.expr(node.initial_value_expr)
+        numbers = bool(initial) and initial <= NUMBER
+        ops = []
+        for op_node in node.operations:
+            op_type = type(op_node)
+            operand = self.expr(op_node.operand)
+            numbers = numbers and bool(operand) and operand <= NUMBER
+            result, fails = operation_type(op_type, t, operand)
+            if may_fail(op_type, t, operand):
+                self.fallible.add(id(node))
+            if fails:
+                self.error(
+                    node,
+                    f"'{OPERATION_NAMES[op_type]}' não pode ser aplicado a {type_name(t)} e {type_name(operand)}.",
+                )
+            t = result
+            operation = INT_OPERATIONS[op_type]
+            if operation is div and isinstance(op_node.operand, Literal) and op_node.operand.value != 0:
+                operation = operator.floordiv
+            ops.append((operation, op_node.operand))
+        self.assignments.append((node, tuple(ops) if numbers else None))
+        methods = self.var_methods(node.initial_value_expr) if not node.operations else None
+        self.store(node.target_var, t, methods)
+
+    def visit_Increment(self, node: Increment) -> None:
+        binding = self.lookup(node.target_var)
+        if binding is None:
+            self.fallible.add(id(node))
+            self.store_dynamic(node.target_var, frozenset({INT}))
+            return
+        op_type = AddOp if node.delta >= 0 else SubOp
+        result, fails = operation_type(op_type, binding.type, frozenset({INT}))
+        if may_fail(op_type, binding.type, frozenset({INT})):
+            self.fallible.add(id(node))
+        if fails:
+            self.error(node, f"'{OPERATION_NAMES[op_type]}' não pode ser aplicado a {type_name(binding.type)}.")
+        self.widen(binding, result)
+
+    def visit_Method(self, node: Method) -> None:
+        binding = self.declare(node)
+        self.widen(binding, frozenset({METHOD}))
+        if id(node) not in binding.methods:
+            binding.methods[id(node)] = node
+            self.changed = True
+
+        info = self.info(node)
+        if info.escaped:
+            for param in info.params:
+                self.widen(param, ANY)
+        scope = Scope({param.name: param for param in info.params}, method=True)
+        self.scopes.append(scope)
+        self.method_stack.append(info)
+        self.visit(node.body)
+        self.method_stack.pop()
+        self.scopes.pop()
+
+    def info(self, node: Method) -> MethodInfo:
+        if id(node) not in self.method_info:
+            params = [Binding(param, node.line) for param in node.params]
+            self.method_info[id(node)] = MethodInfo(node, params)
+        return self.method_info[id(node)]
+
+    def visit_Return(self, node: Return) -> None:
+        if node.value is None:
+            return
+        t = opaque(self.expr(node.value))
+        if self.method_stack:
+            info = self.method_stack[-1]
+            if not t <= info.returns:
+                info.returns |= t
+                self.changed = True
+
+    def visit_CallMethod(self, node: CallMethod) -> None:
+        callee = self.lookup(node.method_name)
+        args = [self.expr(arg) for arg in node.arguments]
+        if callee is None or OTHER in callee.type:
+            self.store(node.result_var, ANY)
+            return
+        if callee.type and METHOD not in callee.type:
+            self.error(node, f"'{node.method_name}' não é um método ({type_name(callee.type)}).")
+            return
+
+        result = NOTHING
+        arity_errors = 0
+        for method in callee.methods.values():
+            info = self.info(method)
+            if len(info.params) != len(args):
+                arity_errors += 1
+                continue
+            for param, t in zip(info.params, args):
+                self.widen(param, opaque(t))
+            result |= info.returns
+        if callee.methods and arity_errors == len(callee.methods):
+            self.error(node, f"Número incorreto de argumentos na chamada do método '{node.method_name}'.")
+        if result:
+            self.store(node.result_var, result)
+
+
+def infer_types(program: Program, env: Collection[str] = ()) -> TypeInfo:
+    """
+    Infere os tipos das variáveis e expressões do programa. `env` são os
+    nomes definidos no escopo global antes da execução.
+    """
+    return TypeInference(env).infer(program)
+
+
+def check_types(program: Program) -> list[TypeCheckError]:
+    """
+    Erros de tipo do programa: operações que certamente falham se forem
+    executadas.
+    """
+    return infer_types(program).errors
+
+
+def specialize(program: Program, ctx: Optional[Ctx] = None) -> TypeInfo:
+    """
+    Anota as condições e blocos de atribuição do programa que só lidam com
+    inteiros (veja `If.int_cond`, `While.int_cond` e
+    `AssignmentBlock.int_ops`).
+    """
+    info = infer_types(program, ctx.to_dict() if ctx is not None else ())
+    for node, int_cond in info.conditions:
+        node.int_cond = int_cond
+    for assignment, ops in info.assignments:
+        assignment.int_ops = ops
+    return info
@@ -0,0 +1,103 @@
+"""
+Análise semântica da árvore sintática em uma única passada.
+
+O validador percorre a árvore uma única vez, de cima para baixo, carregando
+em uma pilha os métodos envolventes e, em cada bloco, as variáveis já
+declaradas. Assim, cada nó é visitado exatamente uma vez e o custo da
+validação é linear no tamanho do programa.
+"""
+
+from typing import Callable
+
+from .arnoldc_ast import (
+    RESERVED_KEYWORDS,
+    Method,
+    Return,
+    StatementBlock,
+    VarDef,
+)
+from .errors import SemanticError
+from .node import Node
+
+
+class Validator:
+    """
+    Percorre a árvore e lança `SemanticError` no primeiro erro encontrado.
+
+    A ordem de visita é a mesma da validação baseada em cursores (pré-ordem),
+    de modo que o erro reportado é o mesmo.
+    """
+
+    def __init__(self):
+        self.methods: list[Method] = []
+        self._dispatch: dict[type, Callable[[Node], None]] = {}
+
+    def validate(self, node: Node) -> None:
+        """
+        Valida o nó e todos os seus descendentes.
+        """
+        cls = type(node)
+        try:
+            handler = self._dispatch[cls]
+        except KeyError:
+            handler = getattr(self, f"visit_{cls.__name__}", self.generic_visit)
+            self._dispatch[cls] = handler
+        handler(node)
+
+    def generic_visit(self, node: Node) -> None:
+        for child in node.children():
+            self.validate(child)
+
+    def visit_StatementBlock(self, node: StatementBlock) -> None:
+        declared: set[str] = set()
+        for stmt in node.stmts:
+            if isinstance(stmt, VarDef):
+                if stmt.name in declared:
+                    raise SemanticError("variável já declarada", token=stmt.name)
+                declared.add(stmt.name)
+            self.validate(stmt)
+
+    def visit_VarDef(self, node: VarDef) -> None:
+        if node.name in RESERVED_KEYWORDS:
+            raise SemanticError("nome inválido", token=node.name)
+        if self.methods and node.name in self.methods[-1].params:
+            raise SemanticError("variável com nome de parâmetro", token=node.name)
+        self.validate(node.value)
+
+    def visit_Return(self, node: Return) -> None:
+        if not self.methods:
+            raise SemanticError(
+                "Não é possível usar 'I'LL BE BACK' fora de um método.",
+                token="I'LL BE BACK",
+            )
+        if node.value:
+            self.validate(node.value)
+
+    def visit_Method(self, node: Method) -> None:
+        check_method_signature(node)
+        self.methods.append(node)
+        try:
+            self.validate(node.body)
+        finally:
+            self.methods.pop()
+
+
+def check_method_signature(method: Method) -> None:
+    """
+    Verifica o nome e os parâmetros de um método.
+    """
+    if method.name in RESERVED_KEYWORDS:
+        raise SemanticError("nome inválido", token=method.name)
+
+    seen_params: set[str] = set()
+    for p_name in method.params:
+        if p_name in seen_params:
+            raise SemanticError("parâmetro duplicado", token=p_name)
+        seen_params.add(p_name)
+
+
+def validate(node: Node) -> None:
+    """
+    Valida semanticamente o nó e todos os seus descendentes.
+    """
+    Validator().validate(node)
@@ -0,0 +1,345 @@
+"""
+Máquina virtual de pilha para o bytecode gerado em `bytecode.py`.
+
+O laço de despacho mantém o estado do frame corrente (código, constantes,
+locais e pilha de operandos) em variáveis locais. Chamadas de métodos ArnoldC
+não usam a pilha do Python: o frame do chamador é salvo em uma lista e
+restaurado no retorno, de modo que recursões profundas não esbarram no
+limite de recursão do interpretador. Pelo mesmo motivo, o cache de métodos
+memoizados (veja `memo.py`) é consultado na própria chamada e o resultado é
+guardado no retorno do frame.
+"""
+
+from typing import Any, Optional
+
+from .arnoldc_ast import Program, Value, is_arnoldc_true
+from .bytecode import CALL_MASK, CALL_SHIFT, DEREF_MASK, DEREF_SHIFT, CodeObject, Op, compile_program
+from .ctx import Ctx
+from .errors import ArnoldCError, ForceReturn, SemanticError
+from .memo import MISSING as NOT_CACHED
+from .memo import cache_key, method_cache
+from .output import emit
+
+# Opcodes como inteiros simples: comparações mais baratas no laço de despacho.
+LOAD_FAST = int(Op.LOAD_FAST)
+LOAD_GLOBAL = int(Op.LOAD_GLOBAL)
+LOAD_CONST = int(Op.LOAD_CONST)
+LOAD_DEREF = int(Op.LOAD_DEREF)
+STORE_FAST = int(Op.STORE_FAST)
+STORE_GLOBAL = int(Op.STORE_GLOBAL)
+STORE_DEREF = int(Op.STORE_DEREF)
+DEF_GLOBAL = int(Op.DEF_GLOBAL)
+ADD_CONST = int(Op.ADD_CONST)
+SUB_CONST = int(Op.SUB_CONST)
+ADD_FAST = int(Op.ADD_FAST)
+SUB_FAST = int(Op.SUB_FAST)
+ADD_GLOBAL = int(Op.ADD_GLOBAL)
+SUB_GLOBAL = int(Op.SUB_GLOBAL)
+JUMP_IF_TRUE = int(Op.JUMP_IF_TRUE)
+JUMP_IF_FALSE = int(Op.JUMP_IF_FALSE)
+JUMP = int(Op.JUMP)
+RHS_CONST = int(Op.RHS_CONST)
+RHS_FAST = int(Op.RHS_FAST)
+RHS_GLOBAL = int(Op.RHS_GLOBAL)
+RHS_DEREF = int(Op.RHS_DEREF)
+ADD = int(Op.ADD)
+SUB = int(Op.SUB)
+MUL = int(Op.MUL)
+DIV = int(Op.DIV)
+EQ = int(Op.EQ)
+GT = int(Op.GT)
+OR = int(Op.OR)
+AND = int(Op.AND)
+PUSH = int(Op.PUSH)
+CALL = int(Op.CALL)
+JUMP_IF_NONE = int(Op.JUMP_IF_NONE)
+RETURN_VALUE = int(Op.RETURN_VALUE)
+RETURN_NONE = int(Op.RETURN_NONE)
+RETURN_FROM_VOID = int(Op.RETURN_FROM_VOID)
+MISSING_RETURN = int(Op.MISSING_RETURN)
+PRINT = int(Op.PRINT)
+MAKE_METHOD = int(Op.MAKE_METHOD)
+HALT = int(Op.HALT)
+
+# Marca nomes que não estão no escopo global do `Ctx`.
+MISSING = object()
+
+
+class Frame:
+    """
+    Registro de ativação de um `CodeObject`.
+
+    `parent` é o frame onde o método foi definido (usado para acessar
+    variáveis de escopos externos) e `call_name` é o nome usado no ponto de
+    chamada, usado nas mensagens de erro. `memo_key` é a chave com que o
+    resultado será guardado no cache de um método memoizado.
+    """
+
+    __slots__ = ("code", "slots", "parent", "pc", "call_name", "memo_key")
+
+    def __init__(
+        self,
+        code: CodeObject,
+        slots: list[Any],
+        parent: Optional["Frame"],
+        call_name: Optional[str] = None,
+        memo_key: Optional[tuple] = None,
+    ):
+        self.code = code
+        self.slots = slots
+        self.parent = parent
+        self.pc = 0
+        self.call_name = call_name
+        self.memo_key = memo_key
+
+
+class VMMethod:
+    """
+    Método ArnoldC criado pela VM.
+
+    Pode ser chamado a partir do Python (por exemplo, depois de
+    `arnoldc_eval`), o que executa o método em uma nova invocação da VM.
+    """
+
+    __slots__ = ("code", "parent", "vm")
+
+    def __init__(self, code: CodeObject, parent: Frame, vm: "VM"):
+        self.code = code
+        self.parent = parent
+        self.vm = vm
+
+    def __call__(self, *args: Value) -> Optional[Value]:
+        return self.vm.call(self, args)
+
+    def __str__(self) -> str:
+        return f"<method {self.code.name}>"
+
+    __repr__ = __str__
+
+
+def wrong_arity(method: CodeObject, argc: int) -> TypeError:
+    return TypeError(
+        f"Número incorreto de argumentos para o método '{method.name}'. "
+        f"Esperado {method.nparams}, recebido {argc}"
+    )
+
+
+class VM:
+    """
+    Executa bytecode usando o `Ctx` informado como escopo global.
+    """
+
+    def __init__(self, ctx: Ctx):
+        self.ctx = ctx
+
+    def run(self, code: CodeObject) -> None:
+        self.execute(Frame(code, [None] * code.nslots, None))
+
+    def call(self, method: VMMethod, args: tuple[Value, ...]) -> Optional[Value]:
+        code = method.code
+        if len(args) != code.nparams:
+            raise wrong_arity(code, len(args))
+        slots = [*args, *[None] * (code.nslots - code.nparams)]
+        return self.execute(Frame(code, slots, method.parent))
+
+    def execute(self, frame: Frame) -> Optional[Value]:
+        ctx = self.ctx
+        scope = ctx.scope
+        lookup = scope.get
+        frames: list[Frame] = []
+        stack: list[Any] = []
+        push = stack.append
+
+        code = frame.code
+        ops = code.code
+        consts = code.consts
+        names = code.names
+        slots = frame.slots
+        pc = 0
+        acc: Any = None
+        rhs: Any = None
+
+        try:
+            while True:
+                op = ops[pc]
+                arg = ops[pc + 1]
+                pc += 2
+
+                if op == LOAD_FAST:
+                    acc = slots[arg]
+                elif op == LOAD_GLOBAL:
+                    acc = lookup(names[arg], MISSING)
+                    if acc is MISSING:
+                        acc = ctx[names[arg]]
+                elif op == LOAD_CONST:
+                    acc = consts[arg]
+                elif op == STORE_FAST:
+                    slots[arg] = acc
+                elif op == STORE_GLOBAL:
+                    name = names[arg]
+                    if name in scope:
+                        scope[name] = acc
+                    else:
+                        ctx.assign(name, acc)
+                elif op == ADD_CONST:
+                    acc = acc + consts[arg]
+                elif op == SUB_CONST:
+                    acc = acc - consts[arg]
+                elif op == JUMP_IF_TRUE:
+                    if acc.__class__ is int:
+                        if acc:
+                            pc = arg
+                    elif is_arnoldc_true(acc):
+                        pc = arg
+                elif op == JUMP_IF_FALSE:
+                    if acc.__class__ is int:
+                        if not acc:
+                            pc = arg
+                    elif not is_arnoldc_true(acc):
+                        pc = arg
+                elif op == JUMP:
+                    pc = arg
+                elif op == ADD_FAST:
+                    acc = acc + slots[arg]
+                elif op == SUB_FAST:
+                    acc = acc - slots[arg]
+                elif op == ADD_GLOBAL:
+                    rhs = lookup(names[arg], MISSING)
+                    if rhs is MISSING:
+                        rhs = ctx[names[arg]]
+                    acc = acc + rhs
+                elif op == SUB_GLOBAL:
+                    rhs = lookup(names[arg], MISSING)
+                    if rhs is MISSING:
+                        rhs = ctx[names[arg]]
+                    acc = acc - rhs
+                elif op == RHS_CONST:
+                    rhs = consts[arg]
+                elif op == RHS_FAST:
+                    rhs = slots[arg]
+                elif op == RHS_GLOBAL:
+                    rhs = lookup(names[arg], MISSING)
+                    if rhs is MISSING:
+                        rhs = ctx[names[arg]]
+                elif op == MUL:
+                    acc = acc * rhs
+                elif op == GT:
+                    acc = 1 if acc > rhs else 0
+                elif op == EQ:
+                    acc = 1 if acc == rhs else 0
+                elif op == DIV:
+                    if rhs == 0:
+                        raise ArnoldCError("Divisão por zero!")
+                    acc = acc // rhs
+                elif op == ADD:
+                    acc = acc + rhs
+                elif op == SUB:
+                    acc = acc - rhs
+                elif op == OR:
+                    acc = 1 if (is_arnoldc_true(acc) or is_arnoldc_true(rhs)) else 0
+                elif op == AND:
+                    acc = 1 if (is_arnoldc_true(acc) and is_arnoldc_true(rhs)) else 0
+                elif op == PUSH:
+                    push(acc)
+                elif op == CALL:
+                    argc = arg & CALL_MASK
+                    args = stack[-argc:] if argc else []
+                    method = stack[-argc - 1]
+                    del stack[-argc - 1 :]
+                    call_name = names[arg >> CALL_SHIFT]
+
+                    if method.__class__ is VMMethod:
+                        callee = method.code
+                        if argc != callee.nparams:
+                            error = wrong_arity(callee, argc)
+                            raise ArnoldCError(f"Erro na chamada do método '{call_name}': {error}")
+                        memo_key = None
+                        if callee.memo_method is not None and (memo_key := cache_key(args)) is not None:
+                            cached = method_cache(callee.memo_method).lookup(memo_key)
+                            if cached is not NOT_CACHED:
+                                acc = cached
+                                continue
+                        if callee.nslots > argc:
+                            args.extend([None] * (callee.nslots - argc))
+
+                        frame.pc = pc
+                        frames.append(frame)
+                        frame = Frame(callee, args, method.parent, call_name, memo_key)
+                        code = callee
+                        ops = code.code
+                        consts = code.consts
+                        names = code.names
+                        slots = args
+                        pc = 0
+                    else:
+                        acc = self.call_external(method, call_name, args)
+                elif op == JUMP_IF_NONE:
+                    if acc is None:
+                        pc = arg
+                elif op == RETURN_VALUE or op == RETURN_NONE or op == RETURN_FROM_VOID:
+                    if op == RETURN_NONE:
+                        acc = None
+                    elif op == RETURN_FROM_VOID and acc is not None:
+                        raise SemanticError(f"Método void '{code.name}' não pode retornar um valor.")
+                    if frame.memo_key is not None:
+                        method_cache(code.memo_method).store(frame.memo_key, acc)  # type: ignore[arg-type]
+                    if not frames:
+                        return acc
+
+                    frame = frames.pop()
+                    code = frame.code
+                    ops = code.code
+                    consts = code.consts
+                    names = code.names
+                    slots = frame.slots
+                    pc = frame.pc
+                elif op == LOAD_DEREF or op == RHS_DEREF or op == STORE_DEREF:
+                    outer = frame
+                    for _ in range(arg >> DEREF_SHIFT):
+                        outer = outer.parent  # type: ignore[assignment]
+                    if op == LOAD_DEREF:
+                        acc = outer.slots[arg & DEREF_MASK]
+                    elif op == RHS_DEREF:
+                        rhs = outer.slots[arg & DEREF_MASK]
+                    else:
+                        outer.slots[arg & DEREF_MASK] = acc
+                elif op == PRINT:
+                    emit(acc)
+                elif op == DEF_GLOBAL:
+                    ctx.var_def(names[arg], acc)
+                elif op == MAKE_METHOD:
+                    acc = VMMethod(consts[arg], frame, self)
+                elif op == MISSING_RETURN:
+                    raise SemanticError(f"Método '{code.name}' que retorna valor não tem 'I'LL BE BACK' explícito.")
+                elif op == HALT:
+                    return None
+                else:
+                    raise RuntimeError(f"Opcode inválido: {op}")
+
+        except TypeError as error:
+            # Assim como em `CallMethod.eval`, erros de tipo dentro de um
+            # método são reportados como erro na chamada mais interna.
+            if frame.call_name is None:
+                raise
+            raise ArnoldCError(f"Erro na chamada do método '{frame.call_name}': {error}") from error
+
+    def call_external(self, method: Any, call_name: str, args: list[Value]) -> Optional[Value]:
+        """
+        Chama um objeto que não foi criado pela VM (ex.: uma função Python
+        presente no ambiente inicial).
+        """
+        if not callable(method):
+            raise ArnoldCError(f"'{call_name}' não é um método.")
+        try:
+            return method(*args)
+        except TypeError as e:
+            raise ArnoldCError(f"Erro na chamada do método '{call_name}': {e}")
+        except ForceReturn as e:
+            return e.value
+
+
+def run_program(program: Program, ctx: Ctx) -> None:
+    """
+    Compila o programa para bytecode e o executa na VM.
+    """
+    VM(ctx).run(compile_program(program))
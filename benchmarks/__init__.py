@@ -0,0 +1,9 @@
+"""
+Scripts de benchmark do interpretador.
+
+Os scripts importam o pacote `arnoldc` e devem ser executados como módulos a
+partir da raiz do repositório, por exemplo:
+
+    python -m benchmarks.call_overhead
+    python -m benchmarks.validation_scaling
+"""
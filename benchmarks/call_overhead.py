@@ -0,0 +1,163 @@
+"""
+Benchmark do custo de chamadas de métodos em programas recursivos.
+
+Executa um Fibonacci recursivo (duas chamadas por nível, retorno com
+'I'LL BE BACK' em todos os métodos) e uma contagem regressiva recursiva
+(uma chamada por nível) e mostra o tempo médio por chamada em cada engine.
+
+Os resultados podem ser salvos em JSON e comparados com uma execução
+anterior, por exemplo antes e depois de uma mudança no interpretador:
+
+    python -m benchmarks.call_overhead --save antes.json
+    # ... altera o interpretador ...
+    python -m benchmarks.call_overhead --compare antes.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+
+from arnoldc import Ctx, parse
+from arnoldc.runtime import ENGINES, evaluate
+
+FIB = """
+IT'S SHOWTIME
+LISTEN TO ME VERY CAREFULLY fib
+I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE n
+GIVE THESE PEOPLE AIR
+    HEY CHRISTMAS TREE c YOU SET US UP 0
+    GET TO THE CHOPPER c
+    HERE IS MY INVITATION 2
+    LET OFF SOME STEAM BENNET n
+    ENOUGH TALK
+    BECAUSE I'M GOING TO SAY PLEASE c
+        I'LL BE BACK n
+    BULLSHIT
+        HEY CHRISTMAS TREE a YOU SET US UP 0
+        HEY CHRISTMAS TREE b YOU SET US UP 0
+        HEY CHRISTMAS TREE m YOU SET US UP 0
+        GET TO THE CHOPPER m
+        HERE IS MY INVITATION n
+        GET DOWN 1
+        ENOUGH TALK
+        GET YOUR ASS TO MARS a DO IT NOW fib m
+        GET TO THE CHOPPER m
+        HERE IS MY INVITATION n
+        GET DOWN 2
+        ENOUGH TALK
+        GET YOUR ASS TO MARS b DO IT NOW fib m
+        GET TO THE CHOPPER a
+        HERE IS MY INVITATION a
+        GET UP b
+        ENOUGH TALK
+        I'LL BE BACK a
+    YOU HAVE NO RESPECT FOR LOGIC
+HASTA LA VISTA, BABY
+HEY CHRISTMAS TREE out YOU SET US UP 0
+GET YOUR ASS TO MARS out DO IT NOW fib {n}
+TALK TO THE HAND out
+YOU HAVE BEEN TERMINATED
+"""
+
+COUNTDOWN = """
+IT'S SHOWTIME
+LISTEN TO ME VERY CAREFULLY down
+I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE n
+GIVE THESE PEOPLE AIR
+    BECAUSE I'M GOING TO SAY PLEASE n
+        HEY CHRISTMAS TREE r YOU SET US UP 0
+        HEY CHRISTMAS TREE m YOU SET US UP n
+        GET TO THE CHOPPER m
+        HERE IS MY INVITATION m
+        GET DOWN 1
+        ENOUGH TALK
+        GET YOUR ASS TO MARS r DO IT NOW down m
+        I'LL BE BACK r
+    BULLSHIT
+    YOU HAVE NO RESPECT FOR LOGIC
+    I'LL BE BACK 0
+HASTA LA VISTA, BABY
+HEY CHRISTMAS TREE out YOU SET US UP 0
+HEY CHRISTMAS TREE i YOU SET US UP {repeat}
+STICK AROUND i
+    GET YOUR ASS TO MARS out DO IT NOW down {n}
+    GET TO THE CHOPPER i
+    HERE IS MY INVITATION i
+    GET DOWN 1
+    ENOUGH TALK
+CHILL
+YOU HAVE BEEN TERMINATED
+"""
+
+
+def fib_calls(n: int) -> int:
+    """
+    Número de chamadas feitas pelo Fibonacci recursivo para `n`.
+    """
+    a, b = 1, 1
+    for _ in range(n):
+        a, b = b, a + b + 1
+    return a
+
+
+def workloads(fib_n: int, depth: int, repeat: int) -> dict[str, tuple[str, int]]:
+    """
+    Programas do benchmark e o número de chamadas que cada um faz.
+    """
+    return {
+        f"fib({fib_n})": (FIB.format(n=fib_n), fib_calls(fib_n)),
+        f"countdown({depth})x{repeat}": (COUNTDOWN.format(n=depth, repeat=repeat), (depth + 1) * repeat),
+    }
+
+
+def measure(src: str, engine: str, repeat: int) -> float:
+    program = parse(src)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            evaluate(program, Ctx.from_dict({}), engine)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=["tree", "closure"])
+    parser.add_argument("--fib", type=int, default=20, help="Argumento do Fibonacci.")
+    parser.add_argument("--depth", type=int, default=100, help="Profundidade da contagem regressiva.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", metavar="ARQUIVO", help="Salva os resultados em JSON.")
+    parser.add_argument("--compare", metavar="ARQUIVO", help="Compara com resultados salvos.")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results: dict[str, float] = {}
+    print(f"{'programa':>22} {'engine':>8} {'chamadas':>10} {'tempo (ms)':>12} {'ns/chamada':>12}", end="")
+    print(f" {'antes':>10} {'ganho':>7}" if baseline else "")
+    for name, (src, calls) in workloads(args.fib, args.depth, 20).items():
+        for engine in args.engines:
+            elapsed = measure(src, engine, args.repeat)
+            per_call = elapsed / calls * 1e9
+            key = f"{name}/{engine}"
+            results[key] = per_call
+            line = f"{name:>22} {engine:>8} {calls:>10} {elapsed * 1e3:>12.2f} {per_call:>12.1f}"
+            if key in baseline:
+                line += f" {baseline[key]:>10.1f} {baseline[key] / per_call:>6.2f}x"
+            print(line)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
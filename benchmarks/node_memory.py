@@ -0,0 +1,105 @@
+"""
+Benchmark da memória ocupada pelos nós da árvore sintática.
+
+Gera um programa grande (os mesmos métodos de `validation_scaling`), mede
+com `tracemalloc` a memória retida pela árvore logo depois do
+`ArnoldCTransformer` e depois do `resolver.py` (que anota os nós com os
+endereços das variáveis) e mostra o custo em bytes por nó. Também mede o
+tempo de percorrer a árvore com `Node.descendants()`.
+
+Os resultados podem ser salvos em JSON e comparados com uma execução
+anterior, por exemplo antes e depois de uma mudança nas classes dos nós:
+
+    python -m benchmarks.node_memory --save antes.json
+    # ... altera os nós ...
+    python -m benchmarks.node_memory --compare antes.json
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+from arnoldc.parser import get_parser
+from arnoldc.resolver import resolve
+from arnoldc.transformer import ArnoldCTransformer
+
+from benchmarks.validation_scaling import UNIT
+
+
+def make_tree(units: int):
+    """
+    Árvore do Lark de um programa com `units` métodos.
+    """
+    body = "".join(UNIT.format(i=i) for i in range(units))
+    src = f"IT'S SHOWTIME\n{body}\nYOU HAVE BEEN TERMINATED\n"
+    return get_parser().parse(src, start="start")
+
+
+def measure_memory(units: int) -> tuple[int, dict[str, int]]:
+    """
+    Retorna o número de nós e a memória retida (em bytes) em cada fase.
+    """
+    tree = make_tree(units)
+    tracemalloc.start()
+    try:
+        program = ArnoldCTransformer().transform(tree)
+        transformed, _ = tracemalloc.get_traced_memory()
+        resolve(program)
+        resolved, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    nodes = sum(1 for _ in program.descendants())
+    return nodes, {"transformado": transformed, "resolvido": resolved}
+
+
+def measure_traversal(units: int, repeat: int) -> float:
+    """
+    Menor tempo (em segundos) de uma travessia completa da árvore.
+    """
+    program = ArnoldCTransformer().transform(make_tree(units))
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in program.descendants():
+            pass
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--units", type=int, default=2000, help="Número de métodos do programa.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", metavar="ARQUIVO", help="Salva os resultados em JSON.")
+    parser.add_argument("--compare", metavar="ARQUIVO", help="Compara com resultados salvos.")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    nodes, memory = measure_memory(args.units)
+    traversal = measure_traversal(args.units, args.repeat)
+    results: dict[str, float] = {f"{phase} (bytes/nó)": used / nodes for phase, used in memory.items()}
+    results["travessia (ns/nó)"] = traversal / nodes * 1e9
+
+    print(f"{args.units} métodos, {nodes} nós")
+    print(f"{'medida':>24} {'valor':>10}", end="")
+    print(f" {'antes':>10} {'ganho':>7}" if baseline else "")
+    for key, value in results.items():
+        line = f"{key:>24} {value:>10.1f}"
+        if key in baseline:
+            line += f" {baseline[key]:>10.1f} {baseline[key] / value:>6.2f}x"
+        print(line)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
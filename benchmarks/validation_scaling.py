@@ -0,0 +1,110 @@
+"""
+Benchmark da validação semântica em programas grandes gerados
+automaticamente.
+
+Gera programas com tamanhos crescentes (dobrando a cada passo), mede o tempo
+de `validate_tree()` (o menor de várias repetições) e mostra o custo por nó.
+Se a validação for linear, o custo por nó permanece aproximadamente
+constante. Como a medida varia de uma máquina para outra, a razão entre o
+maior e o menor custo por nó só é tratada como erro se `--tolerance` for
+informado.
+
+Uso (a partir da raiz do repositório, como módulo):
+
+    python -m benchmarks.validation_scaling [--sizes 250 500 1000 2000 4000]
+    python -m benchmarks.validation_scaling --repeat 10 --tolerance 3
+"""
+
+import argparse
+import sys
+import time
+
+from arnoldc.parser import get_parser
+from arnoldc.transformer import ArnoldCTransformer
+
+UNIT = """
+LISTEN TO ME VERY CAREFULLY metodo{i}
+I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE a{i}
+I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE b{i}
+GIVE THESE PEOPLE AIR
+    HEY CHRISTMAS TREE acc YOU SET US UP 0
+    STICK AROUND a{i}
+        BECAUSE I'M GOING TO SAY PLEASE b{i}
+            HEY CHRISTMAS TREE tmp YOU SET US UP 1
+            GET TO THE CHOPPER acc
+            HERE IS MY INVITATION acc
+            GET UP tmp
+            YOU'RE FIRED 2
+            ENOUGH TALK
+        BULLSHIT
+            TALK TO THE HAND "else"
+        YOU HAVE NO RESPECT FOR LOGIC
+        GET TO THE CHOPPER a{i}
+        HERE IS MY INVITATION a{i}
+        GET DOWN 1
+        ENOUGH TALK
+    CHILL
+    I'LL BE BACK acc
+HASTA LA VISTA, BABY
+HEY CHRISTMAS TREE r{i} YOU SET US UP 0
+GET YOUR ASS TO MARS r{i} DO IT NOW metodo{i} 3 @NO PROBLEMO
+TALK TO THE HAND r{i}
+"""
+
+
+def make_program(units: int):
+    """
+    Gera e transforma (sem validar) um programa com `units` métodos.
+    """
+    body = "".join(UNIT.format(i=i) for i in range(units))
+    src = f"IT'S SHOWTIME\n{body}\nYOU HAVE BEEN TERMINATED\n"
+    return ArnoldCTransformer().transform(get_parser().parse(src, start="start"))
+
+
+def count_nodes(program) -> int:
+    return sum(1 for _ in program.descendants())
+
+
+def measure(program, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        program.validate_tree()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[250, 500, 1000, 2000, 4000])
+    parser.add_argument("--repeat", type=int, default=5, help="Repetições de cada medida (vale a menor).")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=None,
+        help="Razão máxima aceitável entre o maior e o menor custo por nó (padrão: só mostra a razão).",
+    )
+    args = parser.parse_args(argv)
+
+    print(f"{'métodos':>8} {'nós':>10} {'tempo (ms)':>12} {'ns/nó':>10}")
+    per_node = []
+    for size in args.sizes:
+        program = make_program(size)
+        nodes = count_nodes(program)
+        elapsed = measure(program, args.repeat)
+        per_node.append(elapsed / nodes * 1e9)
+        print(f"{size:>8} {nodes:>10} {elapsed * 1e3:>12.2f} {per_node[-1]:>10.1f}")
+
+    ratio = max(per_node) / min(per_node)
+    if args.tolerance is None:
+        print(f"\nrazão entre custos por nó: {ratio:.2f}")
+        return 0
+    print(f"\nrazão entre custos por nó: {ratio:.2f} (limite {args.tolerance:.2f})")
+    if ratio > args.tolerance:
+        print("ERRO: a validação não escala linearmente.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""
+Funções auxiliares dos testes: executam um programa e comparam o resultado
+com o do interpretador de árvore sem otimizações (a referência).
+"""
+
+import contextlib
+import io
+from dataclasses import dataclass
+from typing import Optional
+
+from arnoldc import CaptureSink, arnoldc_eval, enable_memo, parse
+from arnoldc.runtime import ENGINES
+
+
+@dataclass
+class Result:
+    """
+    Saída do programa e o erro (tipo e mensagem) que interrompeu a execução.
+    """
+
+    output: str
+    error: Optional[tuple[str, str]] = None
+
+
+def run(source: str, engine: str = "tree", opt_level: int = 0, memo: Optional[int] = None) -> Result:
+    program = parse(source)
+    if memo is not None:
+        enable_memo(program, memo)
+    sink = CaptureSink()
+    error = None
+    # A mensagem de erro de `report_errors` vai para o stdout.
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            arnoldc_eval(program, engine=engine, opt_level=opt_level, skip_validation=True, output=sink)
+        except Exception as e:
+            error = (type(e).__name__, str(e))
+    return Result(sink.getvalue(), error)
+
+
+def assert_same_as_reference(source: str, engine: str = "tree", opt_level: int = 0, memo: Optional[int] = None) -> Result:
+    """
+    Verifica que o programa produz o mesmo resultado que no interpretador de
+    árvore sem otimizações e retorna esse resultado.
+    """
+    expected = run(source)
+    assert run(source, engine, opt_level, memo) == expected
+    return expected
+
+
+def program(body: str) -> str:
+    return f"IT'S SHOWTIME\n{body.strip()}\nYOU HAVE BEEN TERMINATED\n"
+
+
+__all__ = ["ENGINES", "Result", "assert_same_as_reference", "program", "run"]
@@ -0,0 +1,166 @@
+import pytest
+
+from arnoldc import parse
+from arnoldc.deadcode import eliminate_dead_code
+
+from .helpers import ENGINES, Result, assert_same_as_reference, program
+
+# O corpo é executado dentro de um método, onde as variáveis locais não
+# usadas são removidas já no -O1.
+IN_METHOD = """
+LISTEN TO ME VERY CAREFULLY imprime
+GIVE THESE PEOPLE AIR
+TALK TO THE HAND "efeito"
+I'LL BE BACK 1
+HASTA LA VISTA, BABY
+LISTEN TO ME VERY CAREFULLY f
+GIVE THESE PEOPLE AIR
+{body}
+I'LL BE BACK 0
+HASTA LA VISTA, BABY
+HEY CHRISTMAS TREE r
+YOU SET US UP 0
+GET YOUR ASS TO MARS r
+DO IT NOW f
+TALK TO THE HAND "fim"
+"""
+
+# Variáveis mortas cujas atribuições têm efeitos ou podem falhar.
+BODIES = {
+    "division_by_zero": """
+HEY CHRISTMAS TREE x
+YOU SET US UP 1
+GET TO THE CHOPPER x
+HERE IS MY INVITATION x
+HE HAD TO SPLIT 0
+ENOUGH TALK
+""",
+    "division_by_variable": """
+HEY CHRISTMAS TREE x
+YOU SET US UP 0
+GET TO THE CHOPPER x
+HERE IS MY INVITATION x
+HE HAD TO SPLIT x
+ENOUGH TALK
+""",
+    "undefined_variable": """
+HEY CHRISTMAS TREE x
+YOU SET US UP 0
+GET TO THE CHOPPER x
+HERE IS MY INVITATION nada
+ENOUGH TALK
+""",
+    "undefined_initial_value": """
+HEY CHRISTMAS TREE x
+YOU SET US UP nada
+""",
+    "string_assignment": """
+HEY CHRISTMAS TREE x
+YOU SET US UP "s"
+GET TO THE CHOPPER x
+HERE IS MY INVITATION x
+GET DOWN 1
+ENOUGH TALK
+""",
+    "string_increment": """
+HEY CHRISTMAS TREE x
+YOU SET US UP "s"
+GET TO THE CHOPPER x
+HERE IS MY INVITATION x
+GET UP 1
+ENOUGH TALK
+""",
+}
+
+# Variáveis e ramos mortos cujos efeitos devem continuar acontecendo.
+EFFECTS = {
+    "call_result": (
+        """
+HEY CHRISTMAS TREE x
+YOU SET US UP 0
+GET YOUR ASS TO MARS x
+DO IT NOW imprime
+""",
+        "efeito\nfim\n",
+    ),
+    "else_branch": (
+        """
+BECAUSE I'M GOING TO SAY PLEASE @I LIED
+TALK TO THE HAND "então"
+BULLSHIT
+TALK TO THE HAND "senão"
+YOU HAVE NO RESPECT FOR LOGIC
+""",
+        "senão\nfim\n",
+    ),
+    "declaration_in_branch": (
+        """
+BECAUSE I'M GOING TO SAY PLEASE @NO PROBLEMO
+HEY CHRISTMAS TREE y
+YOU SET US UP 2
+TALK TO THE HAND y
+BULLSHIT
+TALK TO THE HAND "senão"
+YOU HAVE NO RESPECT FOR LOGIC
+""",
+        "2\nfim\n",
+    ),
+    "int_variable": (
+        """
+HEY CHRISTMAS TREE x
+YOU SET US UP 1
+GET TO THE CHOPPER x
+HERE IS MY INVITATION x
+GET UP 2
+YOU'RE FIRED 3
+ENOUGH TALK
+TALK TO THE HAND "corpo"
+""",
+        "corpo\nfim\n",
+    ),
+}
+
+# No -O2 as variáveis globais também são removidas.
+GLOBAL_DIVISION = """
+HEY CHRISTMAS TREE x
+YOU SET US UP 1
+GET TO THE CHOPPER x
+HERE IS MY INVITATION x
+HE HAD TO SPLIT 0
+ENOUGH TALK
+TALK TO THE HAND "fim"
+"""
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("opt_level", [1, 2])
+@pytest.mark.parametrize("body", BODIES.values(), ids=BODIES.keys())
+def test_errors_are_kept(engine, opt_level, body):
+    result = assert_same_as_reference(program(IN_METHOD.format(body=body)), engine, opt_level)
+    assert result.output == ""
+    assert result.error is not None
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("opt_level", [1, 2])
+@pytest.mark.parametrize("body, output", EFFECTS.values(), ids=EFFECTS.keys())
+def test_effects_are_kept(engine, opt_level, body, output):
+    result = assert_same_as_reference(program(IN_METHOD.format(body=body)), engine, opt_level)
+    assert result == Result(output)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_global_division_by_zero(engine):
+    result = assert_same_as_reference(program(GLOBAL_DIVISION), engine, 2)
+    assert result.error is not None
+
+
+@pytest.mark.parametrize("body", BODIES.values(), ids=BODIES.keys())
+def test_fallible_variables_are_not_removed(body):
+    stats = eliminate_dead_code(parse(program(IN_METHOD.format(body=body))))
+    assert (stats.variables, stats.assignments) == (0, 0)
+
+
+def test_int_variable_is_removed():
+    stats = eliminate_dead_code(parse(program(IN_METHOD.format(body=EFFECTS["int_variable"][0]))))
+    assert (stats.variables, stats.assignments) == (1, 1)
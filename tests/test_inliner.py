@@ -0,0 +1,122 @@
+import pytest
+
+from arnoldc import parse
+from arnoldc.inliner import inline_methods
+
+from .helpers import ENGINES, Result, assert_same_as_reference, program
+
+# Os parâmetros e variáveis do método têm os mesmos nomes das variáveis de
+# quem chama, e os argumentos usam esses nomes.
+CAPTURE = """
+LISTEN TO ME VERY CAREFULLY soma
+I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE a
+I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE b
+GIVE THESE PEOPLE AIR
+HEY CHRISTMAS TREE t
+YOU SET US UP 0
+GET TO THE CHOPPER t
+HERE IS MY INVITATION a
+GET UP b
+ENOUGH TALK
+I'LL BE BACK t
+HASTA LA VISTA, BABY
+HEY CHRISTMAS TREE a
+YOU SET US UP 1
+HEY CHRISTMAS TREE b
+YOU SET US UP 10
+HEY CHRISTMAS TREE t
+YOU SET US UP 100
+GET YOUR ASS TO MARS t
+DO IT NOW soma b a
+GET YOUR ASS TO MARS a
+DO IT NOW soma t b
+TALK TO THE HAND a
+TALK TO THE HAND b
+TALK TO THE HAND t
+"""
+
+# Duas chamadas no mesmo bloco e uma em um bloco interno: as declarações
+# das cópias não podem colidir.
+REPEATED = """
+LISTEN TO ME VERY CAREFULLY dobro
+I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE n
+GIVE THESE PEOPLE AIR
+HEY CHRISTMAS TREE d
+YOU SET US UP 0
+GET TO THE CHOPPER d
+HERE IS MY INVITATION n
+GET UP n
+ENOUGH TALK
+I'LL BE BACK d
+HASTA LA VISTA, BABY
+HEY CHRISTMAS TREE x
+YOU SET US UP 3
+HEY CHRISTMAS TREE _dobro_n
+YOU SET US UP 5
+GET YOUR ASS TO MARS x
+DO IT NOW dobro x
+GET YOUR ASS TO MARS x
+DO IT NOW dobro _dobro_n
+BECAUSE I'M GOING TO SAY PLEASE x
+HEY CHRISTMAS TREE d
+YOU SET US UP 1
+GET YOUR ASS TO MARS d
+DO IT NOW dobro x
+TALK TO THE HAND d
+BULLSHIT
+TALK TO THE HAND "não"
+YOU HAVE NO RESPECT FOR LOGIC
+TALK TO THE HAND x
+TALK TO THE HAND _dobro_n
+"""
+
+# O erro de tipo acontece no corpo do método: a mensagem cita a chamada.
+FALLIBLE = """
+LISTEN TO ME VERY CAREFULLY m
+I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE p
+GIVE THESE PEOPLE AIR
+HEY CHRISTMAS TREE v
+YOU SET US UP 3
+TALK TO THE HAND p
+GET TO THE CHOPPER v
+HERE IS MY INVITATION "s"
+LET OFF SOME STEAM BENNET 7
+ENOUGH TALK
+TALK TO THE HAND v
+I'LL BE BACK p
+HASTA LA VISTA, BABY
+HEY CHRISTMAS TREE r
+YOU SET US UP 0
+GET YOUR ASS TO MARS r
+DO IT NOW m 1
+TALK TO THE HAND r
+"""
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("opt_level", [1, 2])
+def test_arguments_are_not_captured(engine, opt_level):
+    result = assert_same_as_reference(program(CAPTURE), engine, opt_level)
+    assert result == Result("21\n10\n11\n")
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("opt_level", [1, 2])
+def test_copies_do_not_collide(engine, opt_level):
+    result = assert_same_as_reference(program(REPEATED), engine, opt_level)
+    assert result == Result("20\n10\n5\n")
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("opt_level", [1, 2])
+def test_type_error_names_the_call(engine, opt_level):
+    result = assert_same_as_reference(program(FALLIBLE), engine, opt_level)
+    assert result.output == "1\n"
+    assert result.error is not None
+    assert result.error[1].startswith("Erro na chamada do método 'm'")
+
+
+@pytest.mark.parametrize("opt_level", [1, 2])
+@pytest.mark.parametrize("source, inlined", [(CAPTURE, 2), (REPEATED, 3), (FALLIBLE, 0)])
+def test_inlined_calls(opt_level, source, inlined):
+    assert inline_methods(parse(program(source)), opt_level) == inlined
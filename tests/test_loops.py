@@ -0,0 +1,247 @@
+import pytest
+
+from arnoldc import parse
+from arnoldc.arnoldc_ast import While
+from arnoldc.resolver import resolve
+
+from .helpers import ENGINES, Result, assert_same_as_reference, program
+
+# Acumuladores com constantes e com o contador antes e depois da atualização.
+COUNT_DOWN = """
+HEY CHRISTMAS TREE i
+YOU SET US UP 5
+HEY CHRISTMAS TREE x
+YOU SET US UP 0
+HEY CHRISTMAS TREE y
+YOU SET US UP 10
+HEY CHRISTMAS TREE z
+YOU SET US UP 0
+STICK AROUND i
+GET TO THE CHOPPER x
+HERE IS MY INVITATION x
+GET UP 2
+ENOUGH TALK
+GET TO THE CHOPPER y
+HERE IS MY INVITATION y
+GET DOWN i
+ENOUGH TALK
+GET TO THE CHOPPER i
+HERE IS MY INVITATION i
+GET DOWN 1
+ENOUGH TALK
+GET TO THE CHOPPER z
+HERE IS MY INVITATION z
+GET UP i
+GET UP 1
+ENOUGH TALK
+CHILL
+TALK TO THE HAND i
+TALK TO THE HAND x
+TALK TO THE HAND y
+TALK TO THE HAND z
+"""
+
+COUNT_UP = """
+HEY CHRISTMAS TREE i
+YOU SET US UP 0
+GET TO THE CHOPPER i
+HERE IS MY INVITATION i
+GET DOWN 4
+ENOUGH TALK
+HEY CHRISTMAS TREE x
+YOU SET US UP 0
+STICK AROUND i
+GET TO THE CHOPPER i
+HERE IS MY INVITATION i
+GET UP 1
+ENOUGH TALK
+GET TO THE CHOPPER x
+HERE IS MY INVITATION x
+GET UP i
+ENOUGH TALK
+CHILL
+TALK TO THE HAND i
+TALK TO THE HAND x
+"""
+
+# Mesmo laço dentro de um método, com variáveis locais.
+IN_METHOD = """
+LISTEN TO ME VERY CAREFULLY soma
+I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE n
+GIVE THESE PEOPLE AIR
+HEY CHRISTMAS TREE acc
+YOU SET US UP 0
+STICK AROUND n
+GET TO THE CHOPPER acc
+HERE IS MY INVITATION acc
+GET UP n
+ENOUGH TALK
+GET TO THE CHOPPER n
+HERE IS MY INVITATION n
+GET DOWN 1
+ENOUGH TALK
+CHILL
+I'LL BE BACK acc
+HASTA LA VISTA, BABY
+HEY CHRISTMAS TREE r
+YOU SET US UP 0
+GET YOUR ASS TO MARS r
+DO IT NOW soma 100
+TALK TO THE HAND r
+"""
+
+# Laço contado sem forma fechada: o corpo imprime.
+PRINTS = """
+HEY CHRISTMAS TREE i
+YOU SET US UP 3
+STICK AROUND i
+TALK TO THE HAND i
+GET TO THE CHOPPER i
+HERE IS MY INVITATION i
+GET DOWN 1
+ENOUGH TALK
+CHILL
+"""
+
+# O corpo declara uma variável, então ganha um escopo novo a cada volta.
+SCOPED_BODY = """
+HEY CHRISTMAS TREE i
+YOU SET US UP 3
+HEY CHRISTMAS TREE x
+YOU SET US UP 0
+STICK AROUND i
+HEY CHRISTMAS TREE dobro
+YOU SET US UP 0
+GET TO THE CHOPPER dobro
+HERE IS MY INVITATION i
+GET UP i
+ENOUGH TALK
+GET TO THE CHOPPER x
+HERE IS MY INVITATION x
+GET UP dobro
+ENOUGH TALK
+GET TO THE CHOPPER i
+HERE IS MY INVITATION i
+GET DOWN 1
+ENOUGH TALK
+CHILL
+TALK TO THE HAND x
+"""
+
+# O contador é alterado duas vezes por volta: não é um laço contado.
+TWO_UPDATES = """
+HEY CHRISTMAS TREE i
+YOU SET US UP 6
+HEY CHRISTMAS TREE n
+YOU SET US UP 0
+STICK AROUND i
+GET TO THE CHOPPER i
+HERE IS MY INVITATION i
+GET DOWN 1
+ENOUGH TALK
+GET TO THE CHOPPER n
+HERE IS MY INVITATION n
+GET UP 1
+ENOUGH TALK
+GET TO THE CHOPPER i
+HERE IS MY INVITATION i
+GET DOWN 1
+ENOUGH TALK
+CHILL
+TALK TO THE HAND n
+"""
+
+# Contador que não é um inteiro ou que começa com o sinal do passo.
+COUNTER = """
+HEY CHRISTMAS TREE i
+YOU SET US UP {start}
+HEY CHRISTMAS TREE n
+YOU SET US UP 0
+STICK AROUND i
+GET TO THE CHOPPER n
+HERE IS MY INVITATION n
+GET UP 1
+ENOUGH TALK
+GET TO THE CHOPPER i
+HERE IS MY INVITATION i
+GET DOWN 1
+ENOUGH TALK
+CHILL
+TALK TO THE HAND n
+"""
+
+# Acumulador que não guarda um inteiro.
+ACCUMULATOR = """
+HEY CHRISTMAS TREE i
+YOU SET US UP 3
+HEY CHRISTMAS TREE x
+YOU SET US UP {initial}
+STICK AROUND i
+GET TO THE CHOPPER x
+HERE IS MY INVITATION x
+GET UP 1
+ENOUGH TALK
+GET TO THE CHOPPER i
+HERE IS MY INVITATION i
+GET DOWN 1
+ENOUGH TALK
+CHILL
+TALK TO THE HAND x
+"""
+
+PROGRAMS = {
+    "count_down": (COUNT_DOWN, "0\n10\n-5\n15\n"),
+    "count_up": (COUNT_UP, "0\n-6\n"),
+    "in_method": (IN_METHOD, "5050\n"),
+    "prints": (PRINTS, "3\n2\n1\n"),
+    "scoped_body": (SCOPED_BODY, "12\n"),
+    "two_updates": (TWO_UPDATES, "3\n"),
+    "zero": (COUNTER.format(start=0), "0\n"),
+    "false": (COUNTER.format(start="@I LIED"), "0\n"),
+    "true": (COUNTER.format(start="@NO PROBLEMO"), "1\n"),
+    "bool_accumulator": (ACCUMULATOR.format(initial="@NO PROBLEMO"), "4\n"),
+}
+
+
+def loops(source):
+    tree = parse(source)
+    resolve(tree)
+    return [node for node in tree.descendants() if isinstance(node, While)]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("opt_level", [0, 1, 2])
+@pytest.mark.parametrize("source, output", PROGRAMS.values(), ids=PROGRAMS.keys())
+def test_counted_loops(engine, opt_level, source, output):
+    result = assert_same_as_reference(program(source), engine, opt_level)
+    assert result == Result(output)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("opt_level", [0, 1, 2])
+@pytest.mark.parametrize("initial", ['"s"', '"10"'])
+def test_accumulator_type_errors(engine, opt_level, initial):
+    result = assert_same_as_reference(program(ACCUMULATOR.format(initial=initial)), engine, opt_level)
+    assert result.error is not None
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("opt_level", [0, 1, 2])
+def test_string_counter(engine, opt_level):
+    result = assert_same_as_reference(program(COUNTER.format(start='"s"')), engine, opt_level)
+    assert result.error is not None
+
+
+@pytest.mark.parametrize(
+    "source, closed",
+    [(COUNT_DOWN, True), (COUNT_UP, True), (IN_METHOD, True), (PRINTS, False), (SCOPED_BODY, False)],
+)
+def test_closed_form_detection(source, closed):
+    (node,) = loops(program(source))
+    assert node.counted is not None
+    assert (node.counted.accumulators is not None) == closed
+
+
+def test_two_updates_are_not_counted():
+    (node,) = loops(program(TWO_UPDATES))
+    assert node.counted is None
@@ -0,0 +1,194 @@
+from pathlib import Path
+
+import pytest
+
+from arnoldc import CaptureSink, Ctx, arnoldc_eval, enable_memo, parse
+from arnoldc.cli import check_memo_args, make_argparser
+from arnoldc.memo import memo_stats
+
+from .helpers import ENGINES, assert_same_as_reference, program
+
+FIBONACCI = Path(__file__).parent.parent / "benchmarks" / "corpus" / "fibonacci.arnoldc"
+
+# `g` chama `f` antes e depois da redefinição de `f`.
+REDEFINED = """
+LISTEN TO ME VERY CAREFULLY f
+I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE n
+GIVE THESE PEOPLE AIR
+I'LL BE BACK n
+HASTA LA VISTA, BABY
+LISTEN TO ME VERY CAREFULLY g
+I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE n
+GIVE THESE PEOPLE AIR
+HEY CHRISTMAS TREE r
+YOU SET US UP 0
+GET YOUR ASS TO MARS r
+DO IT NOW f n
+I'LL BE BACK r
+HASTA LA VISTA, BABY
+HEY CHRISTMAS TREE out
+YOU SET US UP 0
+GET YOUR ASS TO MARS out
+DO IT NOW g 5
+TALK TO THE HAND out
+LISTEN TO ME VERY CAREFULLY f
+I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE n
+GIVE THESE PEOPLE AIR
+HEY CHRISTMAS TREE d
+YOU SET US UP 0
+GET TO THE CHOPPER d
+HERE IS MY INVITATION n
+YOU'RE FIRED 2
+ENOUGH TALK
+I'LL BE BACK d
+HASTA LA VISTA, BABY
+GET YOUR ASS TO MARS out
+DO IT NOW g 5
+TALK TO THE HAND out
+"""
+
+# `h` é declarado de novo como variável depois de ser chamado por `g`.
+REDECLARED_AS_VARIABLE = """
+LISTEN TO ME VERY CAREFULLY h
+I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE n
+GIVE THESE PEOPLE AIR
+I'LL BE BACK n
+HASTA LA VISTA, BABY
+LISTEN TO ME VERY CAREFULLY g
+I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE n
+GIVE THESE PEOPLE AIR
+HEY CHRISTMAS TREE r
+YOU SET US UP 0
+GET YOUR ASS TO MARS r
+DO IT NOW h n
+I'LL BE BACK r
+HASTA LA VISTA, BABY
+HEY CHRISTMAS TREE out
+YOU SET US UP 0
+GET YOUR ASS TO MARS out
+DO IT NOW g 5
+TALK TO THE HAND out
+HEY CHRISTMAS TREE h
+YOU SET US UP 3
+GET YOUR ASS TO MARS out
+DO IT NOW g 5
+TALK TO THE HAND out
+"""
+
+# Métodos com efeitos (impressão, leitura e escrita de variável global,
+# chamada de método impuro) chamados duas vezes com os mesmos argumentos.
+EFFECTS = """
+HEY CHRISTMAS TREE total
+YOU SET US UP 0
+LISTEN TO ME VERY CAREFULLY imprime
+I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE n
+GIVE THESE PEOPLE AIR
+TALK TO THE HAND n
+I'LL BE BACK n
+HASTA LA VISTA, BABY
+LISTEN TO ME VERY CAREFULLY acumula
+I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE n
+GIVE THESE PEOPLE AIR
+GET TO THE CHOPPER total
+HERE IS MY INVITATION total
+GET UP n
+ENOUGH TALK
+I'LL BE BACK total
+HASTA LA VISTA, BABY
+LISTEN TO ME VERY CAREFULLY indireto
+I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE n
+GIVE THESE PEOPLE AIR
+HEY CHRISTMAS TREE r
+YOU SET US UP 0
+GET YOUR ASS TO MARS r
+DO IT NOW imprime n
+I'LL BE BACK r
+HASTA LA VISTA, BABY
+LISTEN TO ME VERY CAREFULLY dobro
+I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE n
+GIVE THESE PEOPLE AIR
+GET TO THE CHOPPER n
+HERE IS MY INVITATION n
+YOU'RE FIRED 2
+ENOUGH TALK
+I'LL BE BACK n
+HASTA LA VISTA, BABY
+HEY CHRISTMAS TREE x
+YOU SET US UP 0
+GET YOUR ASS TO MARS x
+DO IT NOW imprime 1
+GET YOUR ASS TO MARS x
+DO IT NOW imprime 1
+GET YOUR ASS TO MARS x
+DO IT NOW acumula 2
+GET YOUR ASS TO MARS x
+DO IT NOW acumula 2
+TALK TO THE HAND x
+GET YOUR ASS TO MARS x
+DO IT NOW indireto 3
+GET YOUR ASS TO MARS x
+DO IT NOW indireto 3
+GET YOUR ASS TO MARS x
+DO IT NOW dobro 4
+GET YOUR ASS TO MARS x
+DO IT NOW dobro 4
+TALK TO THE HAND x
+"""
+
+PROGRAMS = [REDEFINED, REDECLARED_AS_VARIABLE, EFFECTS]
+PROGRAM_IDS = ["redefined", "redeclared_as_variable", "effects"]
+
+
+def memoized_names(source: str) -> list[str]:
+    return [method.name for method in enable_memo(parse(program(source)))]
+
+
+def test_only_pure_methods_are_memoized():
+    assert memoized_names(EFFECTS) == ["dobro"]
+
+
+@pytest.mark.parametrize("source", [REDEFINED, REDECLARED_AS_VARIABLE], ids=["method", "variable"])
+def test_redeclared_names_make_callers_impure(source):
+    assert memoized_names(source) == []
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("source", PROGRAMS, ids=PROGRAM_IDS)
+def test_memo_matches_reference(source, engine):
+    assert_same_as_reference(program(source), engine, memo=64)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("source", PROGRAMS, ids=PROGRAM_IDS)
+def test_o2_matches_reference(source, engine):
+    assert_same_as_reference(program(source), engine, opt_level=2)
+
+
+def test_redefined_method_output():
+    assert assert_same_as_reference(program(REDEFINED), memo=64).output == "5\n10\n"
+
+
+@pytest.mark.parametrize("engine", [engine for engine in ENGINES if engine != "flat"])
+def test_engines_use_the_cache(engine):
+    ast = parse(FIBONACCI.read_text())
+    enable_memo(ast, 64)
+    sink = CaptureSink()
+    arnoldc_eval(ast, Ctx.from_dict({}), engine=engine, output=sink)
+    assert sink.getvalue() == "2584\n"
+    [(name, cache)] = memo_stats(ast)
+    assert name == "fib"
+    assert (cache.hits, cache.misses) == (16, 19)
+
+
+def test_memo_flag_does_not_take_the_file():
+    args = make_argparser().parse_args(["run", "--memo", "programa.arnoldc"])
+    assert args.memo and args.memo_size is None
+    assert args.file == "programa.arnoldc"
+
+
+def test_memo_is_rejected_on_flat(capsys):
+    parser = make_argparser()
+    args = parser.parse_args(["run", "--memo", "-e", "flat", "programa.arnoldc"])
+    with pytest.raises(SystemExit):
+        check_memo_args(parser, args)
+    assert "não suporta memoização" in capsys.readouterr().err
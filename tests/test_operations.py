@@ -0,0 +1,64 @@
+import pytest
+
+from .helpers import ENGINES, assert_same_as_reference, program
+
+OPERATIONS = """
+HEY CHRISTMAS TREE x
+YOU SET US UP 7
+HEY CHRISTMAS TREE s
+YOU SET US UP "ab"
+HEY CHRISTMAS TREE t
+YOU SET US UP @NO PROBLEMO
+GET TO THE CHOPPER x
+HERE IS MY INVITATION x
+HE HAD TO SPLIT 2
+YOU'RE FIRED 3
+ENOUGH TALK
+TALK TO THE HAND x
+GET TO THE CHOPPER x
+HERE IS MY INVITATION s
+CONSIDER THAT A DIVORCE @I LIED
+ENOUGH TALK
+TALK TO THE HAND x
+GET TO THE CHOPPER x
+HERE IS MY INVITATION t
+KNOCK KNOCK s
+ENOUGH TALK
+TALK TO THE HAND x
+GET TO THE CHOPPER x
+HERE IS MY INVITATION s
+YOU ARE NOT YOU YOU ARE ME "ab"
+ENOUGH TALK
+TALK TO THE HAND x
+GET TO THE CHOPPER x
+HERE IS MY INVITATION s
+LET OFF SOME STEAM BENNET "aa"
+ENOUGH TALK
+TALK TO THE HAND x
+"""
+
+DIVISION_BY_ZERO = """
+HEY CHRISTMAS TREE z
+YOU SET US UP 0
+HEY CHRISTMAS TREE x
+YOU SET US UP 10
+GET TO THE CHOPPER x
+HERE IS MY INVITATION x
+HE HAD TO SPLIT z
+ENOUGH TALK
+TALK TO THE HAND x
+"""
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("opt_level", [0, 1, 2])
+def test_operations_match_reference(engine, opt_level):
+    result = assert_same_as_reference(program(OPERATIONS), engine, opt_level)
+    assert result.output == "9\n1\n1\n1\n1\n"
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("opt_level", [0, 1, 2])
+def test_division_by_zero(engine, opt_level):
+    result = assert_same_as_reference(program(DIVISION_BY_ZERO), engine, opt_level)
+    assert result.error == ("ArnoldCError", "Divisão por zero!")
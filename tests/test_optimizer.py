@@ -0,0 +1,67 @@
+import pytest
+
+from .helpers import ENGINES, assert_same_as_reference, program
+
+IDENTITIES = ["GET UP 0", "GET DOWN 0", "YOU'RE FIRED 1", "HE HAD TO SPLIT 1"]
+
+IDENTITY_ON = """
+HEY CHRISTMAS TREE x
+YOU SET US UP {value}
+GET TO THE CHOPPER x
+HERE IS MY INVITATION x
+{operation}
+ENOUGH TALK
+TALK TO THE HAND x
+"""
+
+MAYBE_STRING = """
+LISTEN TO ME VERY CAREFULLY valor
+I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE n
+GIVE THESE PEOPLE AIR
+BECAUSE I'M GOING TO SAY PLEASE n
+I'LL BE BACK "texto"
+BULLSHIT
+I'LL BE BACK n
+YOU HAVE NO RESPECT FOR LOGIC
+HASTA LA VISTA, BABY
+HEY CHRISTMAS TREE x
+YOU SET US UP 0
+GET YOUR ASS TO MARS x
+DO IT NOW valor {flag}
+GET TO THE CHOPPER x
+HERE IS MY INVITATION x
+{operation}
+ENOUGH TALK
+TALK TO THE HAND x
+"""
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("opt_level", [1, 2])
+@pytest.mark.parametrize("operation", IDENTITIES)
+@pytest.mark.parametrize("value", ['"s"', "@NO PROBLEMO", "@I LIED", "7"])
+def test_identities_keep_reference_semantics(value, operation, opt_level, engine):
+    source = program(IDENTITY_ON.format(value=value, operation=operation))
+    assert_same_as_reference(source, engine, opt_level)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("opt_level", [1, 2])
+@pytest.mark.parametrize("operation", IDENTITIES)
+@pytest.mark.parametrize("flag", ["0", "1"])
+def test_identities_on_values_that_may_be_strings(flag, operation, opt_level, engine):
+    source = program(MAYBE_STRING.format(flag=flag, operation=operation))
+    assert_same_as_reference(source, engine, opt_level)
+
+
+@pytest.mark.parametrize("opt_level", [1, 2])
+def test_string_plus_zero_is_still_an_error(opt_level):
+    source = program(IDENTITY_ON.format(value='"s"', operation="GET UP 0"))
+    result = assert_same_as_reference(source, "tree", opt_level)
+    assert result.error is not None and result.error[0] == "TypeError"
+
+
+@pytest.mark.parametrize("opt_level", [1, 2])
+def test_boolean_identity_prints_integer(opt_level):
+    source = program(IDENTITY_ON.format(value="@NO PROBLEMO", operation="GET UP 0"))
+    assert assert_same_as_reference(source, "tree", opt_level).output == "1\n"
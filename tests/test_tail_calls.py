@@ -0,0 +1,127 @@
+import pytest
+
+from .helpers import ENGINES, assert_same_as_reference, program
+
+SUM = """
+LISTEN TO ME VERY CAREFULLY soma
+I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE n
+I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE acc
+GIVE THESE PEOPLE AIR
+BECAUSE I'M GOING TO SAY PLEASE n
+HEY CHRISTMAS TREE m
+YOU SET US UP 0
+GET TO THE CHOPPER m
+HERE IS MY INVITATION n
+GET DOWN 1
+ENOUGH TALK
+HEY CHRISTMAS TREE a
+YOU SET US UP 0
+GET TO THE CHOPPER a
+HERE IS MY INVITATION acc
+GET UP n
+ENOUGH TALK
+HEY CHRISTMAS TREE r
+YOU SET US UP 0
+GET YOUR ASS TO MARS r
+DO IT NOW soma m a
+I'LL BE BACK r
+BULLSHIT
+I'LL BE BACK acc
+YOU HAVE NO RESPECT FOR LOGIC
+HASTA LA VISTA, BABY
+HEY CHRISTMAS TREE total
+YOU SET US UP 0
+GET YOUR ASS TO MARS total
+DO IT NOW soma {n} 0
+TALK TO THE HAND total
+"""
+
+# O erro de tipo acontece na terceira execução do corpo, iniciada por uma
+# chamada em cauda.
+LATE_TYPE_ERROR = """
+LISTEN TO ME VERY CAREFULLY f
+I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE n
+I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE x
+GIVE THESE PEOPLE AIR
+BECAUSE I'M GOING TO SAY PLEASE n
+HEY CHRISTMAS TREE m
+YOU SET US UP 0
+GET TO THE CHOPPER m
+HERE IS MY INVITATION n
+GET DOWN 1
+ENOUGH TALK
+HEY CHRISTMAS TREE r
+YOU SET US UP 0
+GET YOUR ASS TO MARS r
+DO IT NOW f m "s"
+I'LL BE BACK r
+BULLSHIT
+GET TO THE CHOPPER x
+HERE IS MY INVITATION x
+GET UP 1
+ENOUGH TALK
+I'LL BE BACK x
+YOU HAVE NO RESPECT FOR LOGIC
+HASTA LA VISTA, BABY
+HEY CHRISTMAS TREE v
+YOU SET US UP 0
+GET YOUR ASS TO MARS v
+DO IT NOW f 2 0
+TALK TO THE HAND v
+"""
+
+# A chamada em cauda de `f` encontra, em tempo de execução, a segunda
+# definição do método.
+REDEFINED = """
+LISTEN TO ME VERY CAREFULLY f
+I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE n
+GIVE THESE PEOPLE AIR
+HEY CHRISTMAS TREE r
+YOU SET US UP 0
+GET YOUR ASS TO MARS r
+DO IT NOW f n
+I'LL BE BACK r
+HASTA LA VISTA, BABY
+LISTEN TO ME VERY CAREFULLY f
+I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE n
+GIVE THESE PEOPLE AIR
+GET TO THE CHOPPER n
+HERE IS MY INVITATION n
+YOU'RE FIRED 10
+ENOUGH TALK
+I'LL BE BACK n
+HASTA LA VISTA, BABY
+HEY CHRISTMAS TREE v
+YOU SET US UP 0
+GET YOUR ASS TO MARS v
+DO IT NOW f 4
+TALK TO THE HAND v
+"""
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("opt_level", [0, 2])
+def test_deep_tail_recursion(engine, opt_level):
+    result = assert_same_as_reference(program(SUM.format(n=20000)), engine, opt_level)
+    assert result.output == f"{20000 * 20001 // 2}\n"
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_deep_tail_recursion_with_memo(engine):
+    result = assert_same_as_reference(program(SUM.format(n=20000)), engine, memo=16)
+    assert result.output == f"{20000 * 20001 // 2}\n"
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("opt_level", [0, 2])
+def test_type_error_after_tail_call(engine, opt_level):
+    result = assert_same_as_reference(program(LATE_TYPE_ERROR), engine, opt_level)
+    assert result.error is not None
+    assert result.error[1].startswith("Erro na chamada do método 'f'")
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("opt_level", [0, 2])
+def test_tail_call_to_redefined_method(engine, opt_level):
+    result = assert_same_as_reference(program(REDEFINED), engine, opt_level)
+    assert result.output == "40\n"
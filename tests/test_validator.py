@@ -0,0 +1,73 @@
+import pytest
+
+from arnoldc import SemanticError, parse
+
+from .helpers import ENGINES, assert_same_as_reference, program
+
+METHOD = """
+LISTEN TO ME VERY CAREFULLY soma
+I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE a
+I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE b
+GIVE THESE PEOPLE AIR
+{body}
+HASTA LA VISTA, BABY
+"""
+
+
+def method(body: str, params: str = "") -> str:
+    src = METHOD.format(body=body)
+    if params:
+        src = src.replace("I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE b", params)
+    return src
+
+
+@pytest.mark.parametrize(
+    ("body", "message"),
+    [
+        (
+            method("HEY CHRISTMAS TREE x\nYOU SET US UP 1\nHEY CHRISTMAS TREE x\nYOU SET US UP 2"),
+            "variável já declarada",
+        ),
+        (method("HEY CHRISTMAS TREE a\nYOU SET US UP 1"), "variável com nome de parâmetro"),
+        (
+            method("I'LL BE BACK a", "I NEED YOUR CLOTHES YOUR BOOTS AND YOUR MOTORCYCLE a"),
+            "parâmetro duplicado",
+        ),
+        ("I'LL BE BACK 1", "fora de um método"),
+    ],
+)
+def test_invalid_programs(body, message):
+    with pytest.raises(SemanticError, match=message):
+        parse(program(body))
+
+
+def test_nested_block_may_redeclare():
+    src = program(
+        """
+HEY CHRISTMAS TREE x
+YOU SET US UP 1
+BECAUSE I'M GOING TO SAY PLEASE x
+HEY CHRISTMAS TREE x
+YOU SET US UP 2
+TALK TO THE HAND x
+BULLSHIT
+YOU HAVE NO RESPECT FOR LOGIC
+TALK TO THE HAND x
+"""
+    )
+    assert assert_same_as_reference(src).output == "2\n1\n"
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_valid_method_runs_on_every_engine(engine):
+    body = """
+HEY CHRISTMAS TREE r
+YOU SET US UP a
+GET TO THE CHOPPER r
+HERE IS MY INVITATION r
+GET UP b
+ENOUGH TALK
+I'LL BE BACK r
+"""
+    src = program(method(body) + "HEY CHRISTMAS TREE s\nYOU SET US UP 0\nGET YOUR ASS TO MARS s\nDO IT NOW soma 2 3\nTALK TO THE HAND s")
+    assert assert_same_as_reference(src, engine).output == "5\n"